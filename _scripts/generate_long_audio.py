@@ -13,8 +13,37 @@ import numpy as np
 import re
 import os
 import sys
+import threading
+import time
 from datetime import datetime
 
+try:
+    from tracing import span
+    import metrics
+except ImportError:
+    # Standalone use (tracing/metrics live with the video tools)
+    from contextlib import nullcontext
+
+    def span(name, **attrs):
+        return nullcontext(attrs)
+
+    metrics = None
+
+# Models loaded in this process, by device (loading takes far longer than a short slide)
+_TTS_MODELS = {}
+
+# One model instance is shared by every caller in the process (batch/worker modes)
+_TTS_LOCK = threading.Lock()
+
+def load_tts_model(device="cpu"):
+    """Load the Chatterbox model once per process and reuse it"""
+    if device not in _TTS_MODELS:
+        print("\nLoading Chatterbox model...")
+        with span('tts.model_load', device=device):
+            _TTS_MODELS[device] = ChatterboxTTS.from_pretrained(device=device)
+        print("Model loaded!\n")
+    return _TTS_MODELS[device]
+
 def split_into_sentences(text):
     """Split text into sentences"""
     # Split on sentence endings
@@ -23,7 +52,8 @@ def split_into_sentences(text):
     sentences = [s.strip() for s in sentences if s.strip()]
     return sentences
 
-def generate_long_audio(text, voice_reference, output_name="long_audio", save_parts=True):
+def generate_long_audio(text, voice_reference, output_name="long_audio", save_parts=True,
+                        output_file=None):
     """
     Generate long audio from text using voice cloning
 
@@ -32,6 +62,8 @@ def generate_long_audio(text, voice_reference, output_name="long_audio", save_pa
         voice_reference: Path to reference audio file
         output_name: Name for output files
         save_parts: Whether to save individual sentence files
+        output_file: Exact path for the combined audio (default:
+                     {output_name}_{timestamp}_complete.wav)
     """
 
     print("="*60)
@@ -53,10 +85,9 @@ def generate_long_audio(text, voice_reference, output_name="long_audio", save_pa
     print("\nStarting generation...")
     print("-" * 60)
 
-    # Load model
-    print("\nLoading Chatterbox model...")
-    tts = ChatterboxTTS.from_pretrained(device="cpu")
-    print("Model loaded!\n")
+    # Load model (cached after the first call)
+    with _TTS_LOCK:
+        tts = load_tts_model()
 
     # Create output directory
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -75,8 +106,19 @@ def generate_long_audio(text, voice_reference, output_name="long_audio", save_pa
         print(f"{progress} {preview}")
 
         # Generate audio
-        audio = tts.generate(sentence, audio_prompt_path=voice_reference)
-        audio_np = audio.cpu().numpy().squeeze()
+        with span('tts.sentence', index=i, chars=len(sentence)) as attrs:
+            started = time.perf_counter()
+            with _TTS_LOCK:
+                audio = tts.generate(sentence, audio_prompt_path=voice_reference)
+            audio_np = audio.cpu().numpy().squeeze()
+            attrs['audio_s'] = round(len(audio_np) / 24000, 3)
+
+        if metrics:
+            latency = time.perf_counter() - started
+            metrics.TTS_SENTENCES.inc()
+            metrics.TTS_LATENCY.observe(latency)
+            if attrs['audio_s'] > 0:
+                metrics.TTS_REAL_TIME_FACTOR.observe(latency / attrs['audio_s'])
         audio_chunks.append(audio_np)
 
         # Optionally save individual parts
@@ -95,8 +137,14 @@ def generate_long_audio(text, voice_reference, output_name="long_audio", save_pa
     combined_audio = np.concatenate(audio_chunks)
 
     # Save combined audio
-    output_file = f"{output_name}_{timestamp}_complete.wav"
-    sf.write(output_file, combined_audio, 24000, subtype='PCM_16')
+    if output_file:
+        # Fixed name: write aside and rename so readers never see a partial file
+        tmp_file = f"{output_file}.partial.wav"
+        sf.write(tmp_file, combined_audio, 24000, subtype='PCM_16')
+        os.replace(tmp_file, output_file)
+    else:
+        output_file = f"{output_name}_{timestamp}_complete.wav"
+        sf.write(output_file, combined_audio, 24000, subtype='PCM_16')
 
     # Calculate audio length
     audio_length = len(combined_audio) / 24000  # seconds
@@ -155,11 +203,15 @@ if __name__ == "__main__":
     print("LONG AUDIO GENERATOR - Universal Voice Clone Tool")
     print("="*60)
 
+    # --profile: cProfile, torch trace and flamegraph stacks in <voice>_profile/
+    profile = '--profile' in sys.argv
+    argv = [arg for arg in sys.argv if arg != '--profile']
+
     # Parse command line arguments
-    if len(sys.argv) >= 3:
-        # Command line mode: python generate_long_audio.py <voice> <text_file>
-        voice_choice = sys.argv[1].lower()
-        text_file = sys.argv[2]
+    if len(argv) >= 3:
+        # Command line mode: python generate_long_audio.py <voice> <text_file> [--profile]
+        voice_choice = argv[1].lower()
+        text_file = argv[2]
 
         # Select voice reference
         if voice_choice in ["amit", "a"]:
@@ -192,12 +244,17 @@ if __name__ == "__main__":
             text_content = f.read()
 
         # Generate audio
-        output_file = generate_long_audio(
-            text=text_content,
-            voice_reference=voice_ref,
-            output_name=output_prefix,
-            save_parts=True
-        )
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '_video_automation'))
+        from profiling import StageProfiler
+
+        profiler = StageProfiler('tts' if profile else None, f"{output_prefix}_profile")
+        with profiler.stage('tts', torch_trace=True):
+            output_file = generate_long_audio(
+                text=text_content,
+                voice_reference=voice_ref,
+                output_name=output_prefix,
+                save_parts=True
+            )
 
         if output_file:
             print(f"\n{'='*60}")
@@ -209,7 +266,7 @@ if __name__ == "__main__":
         print("\nUSAGE:")
         print("="*60)
         print("\nCommand line (RECOMMENDED):")
-        print("  python generate_long_audio.py <voice> <text_file>")
+        print("  python generate_long_audio.py <voice> <text_file> [--profile]")
         print("\nExamples:")
         print("  python generate_long_audio.py amit my_script.txt")
         print("  python generate_long_audio.py saanvi story.txt")
@@ -3,13 +3,16 @@ Multi-Account API Manager
 Handles API calls with automatic failover across multiple accounts
 """
 
+import atexit
 import time
-from typing import Optional, Dict, Any, List
+from collections import deque
+from typing import Optional, Dict, Any, List, Iterable
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-import json
 from pathlib import Path
 
+from api_state import ApiStateStore
+
 
 @dataclass
 class AccountStatus:
@@ -21,6 +24,7 @@ class AccountStatus:
     last_reset: datetime = field(default_factory=datetime.now)
     is_exhausted: bool = False
     last_error: Optional[str] = None
+    recent_results: deque = field(default_factory=lambda: deque(maxlen=20), repr=False)
 
     def remaining(self) -> int:
         """Get remaining quota"""
@@ -41,6 +45,16 @@ class AccountStatus:
         self.last_reset = datetime.now()
         self.last_error = None
 
+    def record_result(self, ok: bool):
+        """Remember the outcome of a request (for the scheduler's error rate)"""
+        self.recent_results.append(ok)
+
+    def error_rate(self) -> float:
+        """Share of recent requests that failed (0 when there is no history)"""
+        if not self.recent_results:
+            return 0.0
+        return self.recent_results.count(False) / len(self.recent_results)
+
     def mark_used(self):
         """Mark one request as used"""
         self.used_today += 1
@@ -52,6 +66,10 @@ class AccountStatus:
         self.is_exhausted = True
         self.last_error = error_msg
 
+    def seconds_until_reset(self) -> float:
+        """Seconds until quota resets"""
+        return max(0.0, (self.last_reset + timedelta(days=1) - datetime.now()).total_seconds())
+
     def time_until_reset(self) -> str:
         """Get time until quota resets"""
         next_reset = self.last_reset + timedelta(days=1)
@@ -64,12 +82,24 @@ class AccountStatus:
 
 
 class MultiAccountAPIManager:
-    """Manages multiple API accounts with automatic failover"""
+    """
+    Manages multiple API accounts with automatic failover
+
+    Requests are spread over all usable accounts by smooth weighted
+    round-robin instead of draining accounts in order. An account's weight
+    is its remaining quota discounted by its recent error rate, so healthy
+    accounts with the most quota left take the most requests and nothing
+    is sent to an account that is about to run dry.
+    """
+
+    # Accounts that keep failing still get an occasional request
+    MIN_HEALTH = 0.05
 
     def __init__(self, accounts: List[Dict], state_file: Optional[str] = None):
         self.accounts: List[AccountStatus] = []
         self.current_account_index = 0
-        self.state_file = state_file or str(Path(__file__).parent / ".api_state.json")
+        self._wrr_current: Dict[str, float] = {}
+        self.state_file = state_file or str(Path(__file__).parent / ".api_state.db")
 
         # Initialize accounts
         for acc in accounts:
@@ -79,96 +109,173 @@ class MultiAccountAPIManager:
                 daily_limit=acc.get('daily_limit', 50)
             ))
 
-        # Load previous state
+        # Shared usage store (a legacy JSON state file is imported once)
+        db_path = Path(self.state_file).with_suffix('.db')
+        self.store = ApiStateStore(str(db_path))
+        try:
+            self.store.import_json(str(db_path.with_suffix('.json')))
+        except Exception as e:
+            print(f"Warning: Could not import old API state: {e}")
+
+        # Load previous state; buffered usage is written on exit
         self.load_state()
+        atexit.register(self.save_state)
 
     def load_state(self):
-        """Load API usage state from file"""
-        if not Path(self.state_file).exists():
-            return
-
+        """Load API usage state (including other processes' usage)"""
         try:
-            with open(self.state_file, 'r') as f:
-                state = json.load(f)
-
-            for acc in self.accounts:
-                if acc.name in state:
-                    acc_state = state[acc.name]
-                    acc.used_today = acc_state.get('used_today', 0)
-                    last_reset_str = acc_state.get('last_reset')
-                    if last_reset_str:
-                        acc.last_reset = datetime.fromisoformat(last_reset_str)
-
-                    # Check if it's a new day
-                    if (datetime.now() - acc.last_reset).days >= 1:
-                        acc.reset_daily_quota()
-
+            self._apply_state(self.store.load(acc.name for acc in self.accounts))
         except Exception as e:
             print(f"Warning: Could not load API state: {e}")
 
     def save_state(self):
-        """Save API usage state to file"""
+        """Write buffered usage now and pick up other processes' usage"""
         try:
-            state = {}
-            for acc in self.accounts:
-                state[acc.name] = {
-                    'used_today': acc.used_today,
-                    'last_reset': acc.last_reset.isoformat(),
-                    'is_exhausted': acc.is_exhausted
-                }
-
-            with open(self.state_file, 'w') as f:
-                json.dump(state, f, indent=2)
-
+            self._apply_state(self.store.flush(acc.name for acc in self.accounts))
         except Exception as e:
             print(f"Warning: Could not save API state: {e}")
 
+    def _apply_state(self, states: Dict[str, Dict]):
+        for acc in self.accounts:
+            state = states.get(acc.name)
+            if not state:
+                continue
+            acc.used_today = state['used_today'] + self.store.pending_used(acc.name)
+            acc.last_reset = state['last_reset']
+            acc.is_exhausted = state['is_exhausted'] or acc.used_today >= acc.daily_limit
+            acc.last_error = state['last_error']
+
+    def _record(self, acc: AccountStatus, **update):
+        """Buffer a usage update; written in batches (see ApiStateStore)"""
+        if self.store.record(acc.name, **update):
+            self.save_state()
+
     def get_current_account(self) -> Optional[AccountStatus]:
-        """Get current active account"""
-        if not self.accounts:
+        """Account for the next request (chosen by the scheduler)"""
+        acc = self.next_account()
+        if acc:
+            self.current_account_index = self.accounts.index(acc)
+        return acc
+
+    def account_weight(self, acc: AccountStatus, reserved: int = 0) -> float:
+        """Scheduling weight: spare quota discounted by recent failures"""
+        spare = acc.remaining() - reserved
+        if spare <= 0 or not acc.can_use():
+            return 0.0
+        return spare * max(self.MIN_HEALTH, 1.0 - acc.error_rate())
+
+    def next_account(self, exclude: Iterable[str] = (),
+                     reserved: Optional[Dict[str, int]] = None) -> Optional[AccountStatus]:
+        """
+        Pick the account for one request (smooth weighted round-robin)
+
+        Args:
+            exclude: Account names to avoid (e.g. the one that just failed);
+                     ignored if no other account is usable
+            reserved: Requests already in flight per account name
+
+        Returns:
+            AccountStatus, or None if no account has spare quota
+        """
+        reserved = reserved or {}
+        weights = {acc.name: self.account_weight(acc, reserved.get(acc.name, 0))
+                   for acc in self.accounts}
+        candidates = [acc for acc in self.accounts if weights[acc.name] > 0]
+        preferred = [acc for acc in candidates if acc.name not in set(exclude)]
+        candidates = preferred or candidates
+        if not candidates:
             return None
 
-        # Try to find next available account
-        for _ in range(len(self.accounts)):
-            acc = self.accounts[self.current_account_index]
-
-            if acc.can_use():
-                return acc
-
-            # Try next account
-            self.current_account_index = (self.current_account_index + 1) % len(self.accounts)
-
-        # No accounts available
-        return None
+        total = sum(weights[acc.name] for acc in candidates)
+        for acc in candidates:
+            self._wrr_current[acc.name] = self._wrr_current.get(acc.name, 0.0) + weights[acc.name]
+        chosen = max(candidates, key=lambda acc: self._wrr_current[acc.name])
+        self._wrr_current[chosen.name] -= total
+
+        return chosen
+
+    def plan_requests(self, count: int) -> List[str]:
+        """
+        Assign `count` requests to accounts up front
+
+        Each usable account gets a share proportional to its weight (never
+        more than its remaining quota), interleaved so consecutive requests
+        go to different accounts.
+
+        Returns:
+            Account name per request, in order (shorter than `count` if
+            quota runs out)
+        """
+        weights = {acc.name: self.account_weight(acc) for acc in self.accounts}
+        remaining = {acc.name: acc.remaining() for acc in self.accounts if weights[acc.name] > 0}
+
+        # Proportional shares, capped by quota (largest remainder, then refill)
+        shares = {name: 0 for name in remaining}
+        left = min(count, sum(remaining.values()))
+        while left > 0:
+            open_names = [name for name in remaining if shares[name] < remaining[name]]
+            total = sum(weights[name] for name in open_names)
+            ideal = {name: left * weights[name] / total for name in open_names}
+            granted = 0
+            for name in open_names:
+                extra = min(int(ideal[name]), remaining[name] - shares[name])
+                shares[name] += extra
+                granted += extra
+            if granted == 0:
+                # Fractions only: hand out one by one, largest first
+                name = max(open_names, key=lambda n: (ideal[n], weights[n]))
+                shares[name] += 1
+                granted = 1
+            left -= granted
+
+        # Interleave with smooth weighted round-robin over the shares
+        order = []
+        current = {name: 0 for name in shares}
+        total = sum(shares.values())
+        for _ in range(total):
+            for name in shares:
+                current[name] += shares[name]
+            chosen = max(shares, key=lambda n: current[n])
+            current[chosen] -= total
+            order.append(chosen)
+
+        return order
 
     def get_total_remaining_quota(self) -> int:
         """Get total remaining quota across all accounts"""
         return sum(acc.remaining() for acc in self.accounts)
 
-    def mark_request_success(self):
-        """Mark current request as successful"""
-        acc = self.accounts[self.current_account_index]
+    def get_usable_accounts(self) -> List[AccountStatus]:
+        """All accounts that still have quota"""
+        return [acc for acc in self.accounts if acc.can_use()]
+
+    def mark_request_success(self, account: Optional[AccountStatus] = None):
+        """Mark a request as successful (on `account`, default: current account)"""
+        acc = account or self.accounts[self.current_account_index]
         acc.mark_used()
-        self.save_state()
+        acc.record_result(True)
+        self._record(acc, used=1)
 
-    def mark_request_failed(self, error_msg: str, quota_exceeded: bool = False):
-        """Mark current request as failed"""
-        acc = self.accounts[self.current_account_index]
+    def mark_request_failed(self, error_msg: str, quota_exceeded: bool = False,
+                            account: Optional[AccountStatus] = None):
+        """Mark a request as failed (on `account`, default: current account)"""
+        acc = account or self.accounts[self.current_account_index]
+        acc.last_error = error_msg
+        acc.record_result(False)
 
         if quota_exceeded:
             acc.mark_exhausted(error_msg)
             print(f"[\!]  {acc.name} quota exhausted")
 
-            # Try next account
-            self.current_account_index = (self.current_account_index + 1) % len(self.accounts)
-
-            next_acc = self.get_current_account()
-            if next_acc:
-                print(f"   -> Switching to {next_acc.name} ({next_acc.remaining()} remaining)")
+            # The scheduler skips exhausted accounts from now on
+            usable = self.get_usable_accounts()
+            if usable:
+                print(f"   -> Continuing on {len(usable)} account(s) "
+                      f"({sum(a.remaining() for a in usable)} remaining)")
             else:
                 print(f"   [X] All accounts exhausted!")
 
-        self.save_state()
+        self._record(acc, exhausted=quota_exceeded, error=error_msg)
 
     def get_status_summary(self) -> str:
         """Get formatted status summary"""
@@ -202,16 +309,55 @@ class MultiAccountAPIManager:
         return "\n".join(lines)
 
     def check_capacity(self, required_requests: int) -> Dict[str, Any]:
-        """Check if there's enough capacity for required requests"""
-        total_remaining = self.get_total_remaining_quota()
+        """
+        Check capacity and plan which account serves each request
+
+        Returns:
+            Dict with sufficient/available/required/shortfall, plus
+            'assignments' (account name per request), 'plan' (requests,
+            remaining quota and error rate per account) and 'next_reset'
+            (time until the earliest exhausted account resets, or None)
+        """
+        total_remaining = sum(acc.remaining() for acc in self.accounts if acc.can_use())
+        assignments = self.plan_requests(required_requests)
+
+        plan = []
+        for acc in self.accounts:
+            planned = assignments.count(acc.name)
+            if planned:
+                plan.append({
+                    'account': acc.name,
+                    'requests': planned,
+                    'remaining': acc.remaining(),
+                    'error_rate': round(acc.error_rate(), 2)
+                })
+
+        exhausted = [acc for acc in self.accounts if not acc.can_use()]
+        next_reset = min(exhausted, key=lambda acc: acc.seconds_until_reset()).time_until_reset() \
+            if exhausted else None
 
         return {
-            'sufficient': total_remaining >= required_requests,
+            'sufficient': len(assignments) >= required_requests,
             'available': total_remaining,
             'required': required_requests,
-            'shortfall': max(0, required_requests - total_remaining)
+            'shortfall': max(0, required_requests - len(assignments)),
+            'assignments': assignments,
+            'plan': plan,
+            'next_reset': next_reset
         }
 
+    def format_plan(self, capacity: Dict[str, Any]) -> str:
+        """Execution plan from check_capacity() as text"""
+        lines = ["Execution plan:"]
+        for entry in capacity['plan']:
+            errors = f", {entry['error_rate']:.0%} recent errors" if entry['error_rate'] else ""
+            lines.append(f"   {entry['account']}: {entry['requests']} requests "
+                         f"({entry['remaining']} remaining{errors})")
+        if capacity['shortfall']:
+            reset = f", next reset in {capacity['next_reset']}" if capacity['next_reset'] else ""
+            lines.append(f"   Unassigned: {capacity['shortfall']}{reset}")
+        return "\n".join(lines)
+
     def get_api_key(self) -> Optional[str]:
         """Get API key for current account"""
         acc = self.get_current_account()
@@ -239,6 +385,7 @@ def main():
     print(f"Sufficient: {capacity['sufficient']}")
     print(f"Available: {capacity['available']}")
     print(f"Required: {capacity['required']}")
+    print(manager.format_plan(capacity))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,188 @@
+"""
+API State Store
+Quota counters shared by every process using the same accounts (SQLite, batched writes)
+"""
+
+import contextlib
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+
+class ApiStateStore:
+    """
+    Per-account usage in a SQLite file
+
+    Writers record deltas ("one more request used"), not absolute counts,
+    so processes sharing the accounts add up instead of overwriting each
+    other. Deltas are buffered in memory and written in one transaction
+    every `flush_every` requests or `flush_interval` seconds (and on
+    flush()). A usage day rolls over inside the transaction, so only one
+    process resets an account.
+    """
+
+    def __init__(self, db_path: str, flush_every: int = 10, flush_interval: float = 5.0):
+        """
+        Args:
+            db_path: SQLite file (created if missing)
+            flush_every: Write after this many buffered updates
+            flush_interval: Write when the oldest buffered update is this old (seconds)
+        """
+        self.db_path = db_path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+
+        self._pending: Dict[str, Dict] = {}
+        self._pending_count = 0
+        self._pending_since: Optional[float] = None
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS accounts (
+                    name TEXT PRIMARY KEY,
+                    used_today INTEGER NOT NULL DEFAULT 0,
+                    last_reset TEXT NOT NULL,
+                    is_exhausted INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Write transaction holding the database lock from the start"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def import_json(self, json_path: str):
+        """One-time import of a legacy .api_state.json (skipped if accounts exist)"""
+        path = Path(json_path)
+        if not path.exists():
+            return
+
+        with open(path, 'r') as f:
+            state = json.load(f)
+
+        with self._transaction() as conn:
+            if conn.execute("SELECT COUNT(*) FROM accounts").fetchone()[0]:
+                return
+            for name, acc_state in state.items():
+                conn.execute(
+                    "INSERT INTO accounts (name, used_today, last_reset, is_exhausted) VALUES (?, ?, ?, ?)",
+                    (name, acc_state.get('used_today', 0),
+                     acc_state.get('last_reset') or datetime.now().isoformat(),
+                     int(acc_state.get('is_exhausted', False))))
+
+    def pending_used(self, name: str) -> int:
+        """Requests recorded for an account but not yet flushed"""
+        with self._lock:
+            return self._pending.get(name, {}).get('used', 0)
+
+    def load(self, names: Iterable[str]) -> Dict[str, Dict]:
+        """Current state of these accounts (rolled over if a day has passed)"""
+        with self._transaction() as conn:
+            return {name: self._row(conn, name) for name in names}
+
+    def record(self, name: str, used: int = 0, exhausted: bool = False,
+               error: Optional[str] = None) -> bool:
+        """
+        Buffer an update for one account
+
+        Returns:
+            True if the buffer is due to be flushed
+        """
+        with self._lock:
+            pending = self._pending.setdefault(name, {'used': 0, 'exhausted': False, 'error': None})
+            pending['used'] += used
+            pending['exhausted'] = pending['exhausted'] or exhausted
+            if error is not None:
+                pending['error'] = error
+
+            self._pending_count += 1
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+
+            return (exhausted or self._pending_count >= self.flush_every
+                    or time.monotonic() - self._pending_since >= self.flush_interval)
+
+    def flush(self, names: Iterable[str] = ()) -> Dict[str, Dict]:
+        """
+        Write buffered updates in one transaction
+
+        Args:
+            names: Accounts whose merged state should be returned as well
+
+        Returns:
+            Dict name -> state (used_today, last_reset, is_exhausted, last_error)
+            for the flushed accounts and `names`, including other processes' usage
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._pending_count = 0
+            self._pending_since = None
+
+        try:
+            with self._transaction() as conn:
+                for name, update in pending.items():
+                    self._row(conn, name)
+                    conn.execute("""
+                        UPDATE accounts
+                        SET used_today = used_today + ?,
+                            is_exhausted = MAX(is_exhausted, ?),
+                            last_error = COALESCE(?, last_error)
+                        WHERE name = ?
+                    """, (update['used'], int(update['exhausted']), update['error'], name))
+
+                return {name: self._row(conn, name) for name in set(names) | set(pending)}
+        except sqlite3.Error:
+            # Keep the updates for the next attempt
+            with self._lock:
+                for name, update in pending.items():
+                    current = self._pending.setdefault(name, {'used': 0, 'exhausted': False, 'error': None})
+                    current['used'] += update['used']
+                    current['exhausted'] = current['exhausted'] or update['exhausted']
+                    current['error'] = current['error'] or update['error']
+                    self._pending_count += 1
+                if self._pending_since is None:
+                    self._pending_since = time.monotonic()
+            raise
+
+    def _row(self, conn: sqlite3.Connection, name: str) -> Dict:
+        """Read (creating or rolling over) one account's row inside a transaction"""
+        row = conn.execute("SELECT * FROM accounts WHERE name = ?", (name,)).fetchone()
+        now = datetime.now()
+
+        if row is None:
+            conn.execute("INSERT INTO accounts (name, last_reset) VALUES (?, ?)",
+                         (name, now.isoformat()))
+        elif now - datetime.fromisoformat(row['last_reset']) >= timedelta(days=1):
+            conn.execute("UPDATE accounts SET used_today = 0, is_exhausted = 0, last_error = NULL, "
+                         "last_reset = ? WHERE name = ?", (now.isoformat(), name))
+        else:
+            return {
+                'used_today': row['used_today'],
+                'last_reset': datetime.fromisoformat(row['last_reset']),
+                'is_exhausted': bool(row['is_exhausted']),
+                'last_error': row['last_error']
+            }
+
+        return {'used_today': 0, 'last_reset': now, 'is_exhausted': False, 'last_error': None}
@@ -0,0 +1,433 @@
+"""
+Async Image Generator
+Generates slide images concurrently across all API accounts with per-account rate limits
+"""
+
+import asyncio
+import base64
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config_manager import DEFAULT_IMAGE_API
+from image_cache import ImageCache
+from placeholder_generator import clear_placeholders, find_slide_image
+import metrics
+
+
+MIME_EXTENSIONS = {'image/png': 'png', 'image/jpeg': 'jpg'}
+RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504)
+
+# Error text of a 400 that is about the prompt rather than the request or key
+SAFETY_TERMS = ('safety', 'blocked', 'filtered', 'responsible ai', 'sensitive', 'prohibited')
+
+# Sent with every request; part of the image cache key
+REQUEST_PARAMETERS = {'sampleCount': 1, 'aspectRatio': '16:9'}
+
+
+class TokenBucket:
+    """
+    Request rate limit for one account
+
+    Holds up to `capacity` tokens, refilled at requests_per_minute / 60 per
+    second. reserve() always takes a token (going into debt if needed) and
+    returns how long the caller must wait, so concurrent callers queue up
+    fairly without a lock held across an await.
+    """
+
+    def __init__(self, requests_per_minute: float, capacity: float = 2):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token; returns seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def block(self, seconds: float):
+        """Pause this account (server asked us to back off)"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = min(self.tokens, 0)
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class ImageApiError(Exception):
+    """Failed image API call"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: float = 0.0,
+                 quota_exceeded: bool = False, auth_failed: bool = False,
+                 prompt_rejected: bool = False):
+        """
+        Args:
+            quota_exceeded: The account's daily quota is used up
+            auth_failed: The account's key was refused (other accounts may work)
+            prompt_rejected: The prompt was filtered; no account or retry will help
+        """
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.quota_exceeded = quota_exceeded
+        self.auth_failed = auth_failed
+        self.prompt_rejected = prompt_rejected
+
+    @property
+    def retryable(self) -> bool:
+        return self.status is None or self.status in RETRYABLE_STATUS
+
+    @classmethod
+    def from_http(cls, error: urllib.error.HTTPError) -> 'ImageApiError':
+        try:
+            body = error.read().decode('utf-8', errors='replace')
+        except Exception:
+            body = ''
+
+        try:
+            retry_after = float(error.headers.get('Retry-After', 0))
+        except (TypeError, ValueError):
+            retry_after = 0.0
+
+        # 429 is both the per-minute limit and the daily quota; only the latter exhausts the account
+        text = body.lower()
+        quota_exceeded = error.code == 429 and ('per day' in text or 'daily' in text)
+
+        # A bad or expired key comes back as 400 INVALID_ARGUMENT as well as 401/403
+        auth_failed = error.code in (401, 403) or (
+            error.code == 400 and ('api key' in text or 'api_key' in text))
+        prompt_rejected = (error.code == 400 and not auth_failed
+                           and any(term in text for term in SAFETY_TERMS))
+
+        return cls(f"HTTP {error.code}: {body[:200]}", status=error.code,
+                   retry_after=retry_after, quota_exceeded=quota_exceeded,
+                   auth_failed=auth_failed, prompt_rejected=prompt_rejected)
+
+
+@dataclass
+class ImageJob:
+    """One image to generate"""
+    slide_number: int
+    title: str
+    prompt: str
+
+
+@dataclass
+class ImageResult:
+    """Outcome of one ImageJob"""
+    slide_number: int
+    success: bool
+    path: Optional[Path]
+    message: str
+    account: Optional[str] = None
+    attempts: int = 0
+    prompt_rejected: bool = False
+
+
+class AsyncImageGenerator:
+    """
+    Sends image requests concurrently across every account of an API manager
+
+    - Each account has its own token bucket (requests per minute)
+    - At most `concurrency` requests are in flight in total
+    - Jobs start on the accounts planned by api_manager.plan_requests()
+    - Failures back off exponentially with full jitter and retry on the
+      scheduler's next account, avoiding the one that just failed;
+      Retry-After pauses only the account that got it
+    - A daily-quota 429 marks the account exhausted and fails over at once
+    - With an ImageCache, prompts generated before (by any project) and
+      repeats within the batch are linked from the cache without a request
+    """
+
+    def __init__(self, api_manager, output_dir: str, endpoint: str = DEFAULT_IMAGE_API['endpoint'],
+                 model: str = DEFAULT_IMAGE_API['model'],
+                 requests_per_minute: float = DEFAULT_IMAGE_API['requests_per_minute'],
+                 concurrency: int = DEFAULT_IMAGE_API['concurrency'],
+                 max_retries: int = DEFAULT_IMAGE_API['max_retries'],
+                 timeout: float = DEFAULT_IMAGE_API['timeout'],
+                 backoff_base: float = 1.0, backoff_cap: float = 60.0,
+                 cache: Optional[ImageCache] = None):
+        """
+        Args:
+            api_manager: MultiAccountAPIManager (quota bookkeeping)
+            output_dir: Where slide_NN.png/jpg are written
+            endpoint: Imagen-style predict URL ({model} is substituted)
+            model: Model name
+            requests_per_minute: Rate limit per account
+            concurrency: Max requests in flight across all accounts
+            max_retries: Retries per image after the first attempt
+            timeout: Seconds per HTTP request
+            backoff_base, backoff_cap: Exponential backoff bounds (seconds)
+            cache: Shared image cache (None: always request)
+        """
+        self.api_manager = api_manager
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self.url = endpoint.format(model=model)
+        self.model = model
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self.buckets: Dict[str, TokenBucket] = {
+            acc.name: TokenBucket(requests_per_minute) for acc in api_manager.accounts}
+        self.in_flight: Dict[str, int] = {acc.name: 0 for acc in api_manager.accounts}
+        self._accounts = {acc.name: acc for acc in api_manager.accounts}
+        self._auth_failed = set()  # accounts whose key was refused this run
+
+    @classmethod
+    def from_config(cls, api_manager, output_dir: str, settings: Optional[Dict] = None):
+        """Build from APIConfig.get_image_api() settings"""
+        settings = {**DEFAULT_IMAGE_API, **(settings or {})}
+        cache = None
+        if settings.get('cache_dir'):
+            cache = ImageCache(settings['cache_dir'], settings['cache_max_mb'])
+        return cls(api_manager, output_dir,
+                   endpoint=settings['endpoint'],
+                   model=settings['model'],
+                   requests_per_minute=settings['requests_per_minute'],
+                   concurrency=settings['concurrency'],
+                   max_retries=settings['max_retries'],
+                   timeout=settings['timeout'],
+                   cache=cache)
+
+    def check_existing_image(self, slide_number: int) -> Optional[Path]:
+        """Check if image already exists (manual or previously generated, not a placeholder)"""
+        return find_slide_image(self.output_dir, slide_number)
+
+    def generate_many(self, jobs: Sequence[ImageJob]) -> List[ImageResult]:
+        """Generate all images (blocking); results are in job order"""
+        if not jobs:
+            return []
+        return asyncio.run(self.generate_all(jobs))
+
+    def generate_image(self, prompt: str, slide_number: int, slide_title: str) -> Tuple[bool, Optional[Path], str]:
+        """Single image, same contract as ImageGenerator.generate_image"""
+        existing = self.check_existing_image(slide_number)
+        if existing:
+            return True, existing, f"Using existing image: {existing.name}"
+
+        result = self.generate_many([ImageJob(slide_number, slide_title, prompt)])[0]
+        return result.success, result.path, result.message
+
+    async def generate_all(self, jobs: Sequence[ImageJob]) -> List[ImageResult]:
+        results: List[Optional[ImageResult]] = [None] * len(jobs)
+        done = 0
+
+        def report(index, result):
+            nonlocal done
+            results[index] = result
+            done += 1
+            job = jobs[index]
+            status = "[OK]" if result.success else "[X]"
+            print(f"  {status} [{done}/{len(jobs)}] slide {job.slide_number:02d} "
+                  f"{job.title[:40]} - {result.message}")
+
+        # Cache hits first, so they take no quota and no plan slots;
+        # a prompt repeated in this batch is requested once
+        to_request: Dict[object, List[int]] = {}
+        for i, job in enumerate(jobs):
+            key = self.cache_key(job.prompt)
+            cached = self._from_cache(job, key)
+            if cached:
+                report(i, cached)
+            elif key is None:
+                to_request[i] = [i]  # no cache: every job on its own
+            else:
+                to_request.setdefault(key, []).append(i)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        plan = self.api_manager.plan_requests(len(to_request))
+
+        async def run(indexes, planned):
+            async with semaphore:
+                result = await self._generate(jobs[indexes[0]], planned)
+            report(indexes[0], result)
+            for index in indexes[1:]:
+                repeat = jobs[index]
+                if result.success:
+                    path = self._link(result.path, repeat.slide_number)
+                    message = f"Same prompt as slide {result.slide_number:02d}: {path.name}"
+                    report(index, ImageResult(repeat.slide_number, True, path, message))
+                else:
+                    report(index, ImageResult(repeat.slide_number, False, None, result.message,
+                                              prompt_rejected=result.prompt_rejected))
+
+        await asyncio.gather(*(run(indexes, plan[i] if i < len(plan) else None)
+                               for i, indexes in enumerate(to_request.values())))
+        self.api_manager.save_state()
+        clear_placeholders(self.output_dir, {r.slide_number: r.path for r in results if r.success})
+        return results
+
+    def requests_needed(self, jobs: Sequence[ImageJob]) -> int:
+        """API requests generate_all would make (cache hits and repeats excluded)"""
+        if self.cache is None:
+            return len(jobs)
+        keys = {self.cache_key(job.prompt) for job in jobs}
+        return sum(1 for key in keys if self.cache.get(key) is None)
+
+    def cache_key(self, prompt: str) -> Optional[str]:
+        """Cache key of a prompt for this model and request parameters"""
+        if self.cache is None:
+            return None
+        return self.cache.key(prompt, self.model, REQUEST_PARAMETERS)
+
+    def _from_cache(self, job: ImageJob, key: Optional[str]) -> Optional[ImageResult]:
+        """Link a cached image for this job into the project, if there is one"""
+        if key is None:
+            return None
+
+        cached = self.cache.get(key)
+        metrics.cache_lookup('image', cached is not None)
+        if cached is None:
+            return None
+
+        path = self._link(cached, job.slide_number)
+        return ImageResult(job.slide_number, True, path, f"Cached: {path.name}")
+
+    async def _generate(self, job: ImageJob, planned: Optional[str] = None) -> ImageResult:
+        last_error = "No attempts made"
+        prompt_rejected = False
+        failed_on = []
+
+        for attempt in range(self.max_retries + 1):
+            account = self._first_account(planned) if attempt == 0 else None
+            account = account or self._pick_account(failed_on[-1:])
+            while account is None and any(self.in_flight.values()):
+                # Remaining quota is all reserved by requests in flight; see how they end
+                await asyncio.sleep(0.5)
+                account = self._pick_account()
+            if account is None:
+                message = "All API accounts exhausted"
+                if self._auth_failed:
+                    message += f" or refused ({', '.join(sorted(self._auth_failed))})"
+                return ImageResult(job.slide_number, False, None, message, attempts=attempt)
+
+            self.in_flight[account.name] += 1
+            try:
+                await self.buckets[account.name].acquire()
+                data, mime_type = await asyncio.to_thread(self._request, account.api_key, job.prompt)
+            except ImageApiError as e:
+                last_error = str(e)
+                failed_on.append(account.name)
+                if e.quota_exceeded:
+                    self.api_manager.mark_request_failed(last_error, quota_exceeded=True, account=account)
+                    continue  # fail over immediately
+
+                self.api_manager.mark_request_failed(last_error, account=account)
+                if e.auth_failed:
+                    self._auth_failed.add(account.name)
+                    print(f"  [!] {account.name}: API key refused, not used again this run")
+                    continue  # fail over immediately
+
+                if e.retry_after:
+                    self.buckets[account.name].block(e.retry_after)
+                if not e.retryable or attempt == self.max_retries:
+                    prompt_rejected = e.prompt_rejected
+                    break
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            finally:
+                self.in_flight[account.name] -= 1
+
+            path = self._save(job.slide_number, data, mime_type, job.prompt)
+            self.api_manager.mark_request_success(account)
+            return ImageResult(job.slide_number, True, path, f"Generated: {path.name}",
+                               account=account.name, attempts=attempt + 1)
+
+        return ImageResult(job.slide_number, False, None, f"API error: {last_error}",
+                           attempts=len(failed_on), prompt_rejected=prompt_rejected)
+
+    def _first_account(self, planned: Optional[str]):
+        """The planned account, if it still has spare quota"""
+        account = self._accounts.get(planned)
+        if account is None or account.name in self._auth_failed:
+            return None
+        if self.api_manager.account_weight(account, self.in_flight[account.name]) > 0:
+            return account
+        return None
+
+    def _pick_account(self, exclude: Sequence[str] = ()):
+        """Scheduler's next account with spare quota beyond the requests in flight"""
+        account = self.api_manager.next_account(exclude=[*exclude, *self._auth_failed],
+                                                reserved=self.in_flight)
+        # exclude is only a preference; accounts with a refused key are never used
+        if account is not None and account.name in self._auth_failed:
+            return None
+        return account
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _request(self, api_key: str, prompt: str) -> Tuple[bytes, str]:
+        """POST one predict request (runs in a worker thread)"""
+        body = json.dumps({
+            'instances': [{'prompt': prompt}],
+            'parameters': REQUEST_PARAMETERS
+        }).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, method='POST', headers={
+            'Content-Type': 'application/json',
+            'x-goog-api-key': api_key
+        })
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.load(response)
+        except urllib.error.HTTPError as e:
+            raise ImageApiError.from_http(e)
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise ImageApiError(f"Request failed: {e}")
+
+        predictions = payload.get('predictions') or []
+        if not predictions or 'bytesBase64Encoded' not in predictions[0]:
+            # Usually the prompt was filtered; retrying will not help
+            raise ImageApiError("No image in response", status=200, prompt_rejected=True)
+
+        prediction = predictions[0]
+        return base64.b64decode(prediction['bytesBase64Encoded']), prediction.get('mimeType', 'image/png')
+
+    def _link(self, source: Path, slide_number: int) -> Path:
+        """Hardlink (or copy) a cached image as this slide's image"""
+        return self.cache.link(source, self.output_dir / f"slide_{slide_number:02d}{source.suffix}")
+
+    def _save(self, slide_number: int, data: bytes, mime_type: str, prompt: str) -> Path:
+        """Write the image atomically (through the cache if there is one)"""
+        extension = MIME_EXTENSIONS.get(mime_type, 'png')
+        if self.cache is not None:
+            cached = self.cache.put(self.cache_key(prompt), data, extension)
+            return self._link(cached, slide_number)
+
+        path = self.output_dir / f"slide_{slide_number:02d}.{extension}"
+        tmp_path = path.with_name(f".{path.name}.tmp")
+
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        return path
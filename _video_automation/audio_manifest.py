@@ -0,0 +1,180 @@
+"""
+Audio Manifest
+Per-project index of the current narration take for each slide
+"""
+
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+
+# Current takes: slide_01_audio.wav; older runs: slide_01_audio_20260101_120000_complete.wav
+AUDIO_FILE_PATTERN = re.compile(r'^slide_(\d+)_audio(?:_(\d{8}_\d{6})_complete)?\.wav$')
+
+
+def narration_hash(text: str, voice_reference: str) -> str:
+    """Hash of everything that determines a slide's narration"""
+    digest = hashlib.sha256()
+    digest.update(Path(voice_reference).name.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class AudioManifest:
+    """Maps slide number -> current audio file, narration hash and duration"""
+
+    FILENAME = "audio_manifest.json"
+
+    def __init__(self, project_dir: str):
+        self.output_dir = Path(project_dir) / "output"
+        self.path = self.output_dir / self.FILENAME
+        self.slides: Dict[str, Dict] = {}
+        self.recorded: Set[int] = set()  # slides given a new take by this instance
+        self.load()
+
+    def exists(self) -> bool:
+        """Check if a manifest has been written for this project"""
+        return self.path.exists()
+
+    def load(self):
+        """Load manifest from disk"""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.slides = json.load(f).get('slides', {})
+        except Exception as e:
+            print(f"Warning: Could not load audio manifest: {e}")
+
+    def save(self):
+        """Save manifest atomically (write temp file, then rename)"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'slides': self.slides}, f, indent=2)
+
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def audio_path_for(project_dir: str, slide_number: int) -> str:
+        """Stable file name for a slide's current take"""
+        return str(Path(project_dir) / "output" / f"slide_{slide_number:02d}_audio.wav")
+
+    def get(self, slide_number: int) -> Optional[Dict]:
+        """Get manifest entry for a slide (None if missing or file deleted)"""
+        entry = self.slides.get(str(slide_number))
+        if entry and (self.output_dir / entry['file']).exists():
+            return entry
+        return None
+
+    def audio_file(self, slide_number: int) -> Optional[str]:
+        """Get path of a slide's current audio file"""
+        entry = self.get(slide_number)
+        return str(self.output_dir / entry['file']) if entry else None
+
+    def is_current(self, slide_number: int, text: str, voice_reference: str) -> bool:
+        """Check if the recorded take was generated from this text and voice"""
+        entry = self.get(slide_number)
+        return bool(entry) and entry.get('hash') == narration_hash(text, voice_reference)
+
+    def record(self, slide_number: int, audio_file: str,
+               text: Optional[str] = None, voice_reference: Optional[str] = None,
+               duration: Optional[float] = None):
+        """Register a slide's current take and persist the manifest"""
+        if duration is None and sf is not None:
+            try:
+                duration = sf.info(audio_file).duration
+            except Exception:
+                duration = None
+
+        self.slides[str(slide_number)] = {
+            'file': os.path.relpath(audio_file, self.output_dir),
+            'hash': narration_hash(text, voice_reference) if text is not None else None,
+            'duration': duration,
+            'recorded_at': datetime.now().isoformat()
+        }
+        self.recorded.add(slide_number)
+        self.save()
+
+    def adopt_legacy_takes(self) -> int:
+        """
+        Build entries from timestamp-named takes of earlier runs
+
+        Picks the newest take per slide. Narration hashes are unknown, so these
+        entries are used as-is but never count as current for regeneration.
+
+        Returns:
+            Number of slides adopted
+        """
+        if not self.output_dir.exists():
+            return 0
+
+        newest: Dict[int, tuple] = {}
+        for entry in os.scandir(self.output_dir):
+            match = AUDIO_FILE_PATTERN.match(entry.name)
+            if not match or not match.group(2):
+                continue
+
+            slide_number = int(match.group(1))
+            stamp = match.group(2)
+            if slide_number not in newest or stamp > newest[slide_number][0]:
+                newest[slide_number] = (stamp, entry.path)
+
+        for slide_number, (_, path) in newest.items():
+            if str(slide_number) not in self.slides:
+                self.slides[str(slide_number)] = {
+                    'file': os.path.relpath(path, self.output_dir),
+                    'hash': None,
+                    'duration': None,
+                    'recorded_at': datetime.now().isoformat()
+                }
+
+        if newest:
+            self.save()
+
+        return len(newest)
+
+    def collect_garbage(self, slide_numbers: Optional[Iterable[int]] = None) -> int:
+        """
+        Delete earlier timestamped takes of slides that have a newer take
+
+        Only takes of the given slides are touched (default: slides recorded
+        by this instance), and only timestamp-named ones: plain
+        slide_NN_audio.wav files may have been placed by hand.
+
+        Returns:
+            Number of files removed
+        """
+        if not self.output_dir.exists():
+            return 0
+
+        slide_numbers = set(self.recorded if slide_numbers is None else slide_numbers)
+        referenced = {entry['file'] for entry in self.slides.values()}
+        removed = 0
+
+        for entry in os.scandir(self.output_dir):
+            match = AUDIO_FILE_PATTERN.match(entry.name)
+            if not match or not match.group(2) or entry.name in referenced:
+                continue
+            if int(match.group(1)) not in slide_numbers:
+                continue
+
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except OSError as e:
+                print(f"Warning: Could not remove old take {entry.name}: {e}")
+
+        return removed
@@ -0,0 +1,111 @@
+"""
+Audio Track Assembler
+Builds one continuous narration track from per-slide audio on the video timeline
+"""
+
+import numpy as np
+import soundfile as sf
+
+
+class AudioTrackAssembler:
+    """Place each slide's audio at its timeline offset in a single streaming pass"""
+
+    BLOCK_SIZE = 65536  # frames per read/write
+
+    def __init__(self, sample_rate=None):
+        """
+        Initialize assembler
+
+        Args:
+            sample_rate: Output sample rate (None = rate of the first audio file)
+        """
+        self.sample_rate = sample_rate
+
+    def assemble(self, audio_files, timings, output_path):
+        """
+        Write one mono PCM track for the whole timeline
+
+        Args:
+            audio_files: Per-slide audio paths (None for silent slides)
+            timings: Per-slide durations in seconds (audio + pause)
+            output_path: Output .wav path
+
+        Returns:
+            Path to written track, or None if there is no audio at all
+        """
+        sources = [f for f in audio_files if f]
+        if not sources:
+            return None
+
+        sample_rate = self.sample_rate or sf.info(sources[0]).samplerate
+
+        # Sample-exact slide boundaries from the cumulative timeline, so
+        # rounding never accumulates into drift
+        boundaries = [0]
+        elapsed = 0.0
+        for duration in timings:
+            elapsed += duration
+            boundaries.append(int(round(elapsed * sample_rate)))
+
+        with sf.SoundFile(output_path, 'w', samplerate=sample_rate,
+                          channels=1, subtype='PCM_16') as out:
+            for i, audio_file in enumerate(audio_files):
+                slot = boundaries[i + 1] - boundaries[i]
+                written = 0
+
+                if audio_file:
+                    written, error = self._copy_audio(audio_file, out, slot, sample_rate)
+                    if error:
+                        print(f"      Warning: Could not read audio for slide {i+1}: {error}")
+
+                self._write_silence(out, slot - written)
+
+        return output_path
+
+    def _copy_audio(self, audio_file, out, max_frames, sample_rate):
+        """
+        Stream one slide's audio into the track (mono, truncated to its slot)
+
+        Returns:
+            (frames written, error or None) - frames already in the track are
+            counted even when reading fails partway, so the caller pads only
+            the rest of the slot
+        """
+        written = 0
+        try:
+            info = sf.info(audio_file)
+
+            if info.samplerate != sample_rate:
+                # Rare: resample the whole (short) slide clip in one go
+                data, _ = sf.read(audio_file, dtype='float32', always_2d=True)
+                data = self._resample(data.mean(axis=1), info.samplerate, sample_rate)
+                data = data[:max_frames]
+                out.write(data)
+                return len(data), None
+
+            for block in sf.blocks(audio_file, blocksize=self.BLOCK_SIZE,
+                                   dtype='float32', always_2d=True):
+                if written >= max_frames:
+                    break
+                block = block.mean(axis=1)[:max_frames - written]
+                out.write(block)
+                written += len(block)
+
+        except Exception as e:
+            return written, e
+
+        return written, None
+
+    def _write_silence(self, out, frames):
+        """Pad with exact digital silence"""
+        while frames > 0:
+            chunk = min(frames, self.BLOCK_SIZE)
+            out.write(np.zeros(chunk, dtype='float32'))
+            frames -= chunk
+
+    @staticmethod
+    def _resample(data, source_rate, target_rate):
+        """Linear-interpolation resample"""
+        target_len = int(round(len(data) * target_rate / source_rate))
+        source_positions = np.arange(target_len) * (source_rate / target_rate)
+        return np.interp(source_positions, np.arange(len(data)), data).astype('float32')
@@ -0,0 +1,171 @@
+"""
+Batch Runner
+Render many decks in one process so models, fonts and caches stay warm
+"""
+
+import argparse
+import glob
+import json
+import os
+import shlex
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import video_creator
+
+
+def resolve_decks(source: str) -> List[Tuple[str, List[str]]]:
+    """
+    Expand a batch source into (presentation, extra args) jobs
+
+    Args:
+        source: Directory of .pptx files, glob pattern, or manifest file
+                (.json list of paths / {"presentation", "args"} objects,
+                or .txt with one "deck.pptx [options]" per line)
+
+    Returns:
+        List of (presentation path, per-deck argument list)
+    """
+    path = Path(source)
+
+    if path.is_dir():
+        return [(str(p), []) for p in sorted(path.glob('*.pptx'))
+                if not p.name.startswith('~$')]
+
+    if path.is_file() and path.suffix.lower() == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        jobs = []
+        for entry in entries:
+            if isinstance(entry, str):
+                jobs.append((entry, []))
+            else:
+                jobs.append((entry['presentation'], list(entry.get('args', []))))
+        return jobs
+
+    if path.is_file() and path.suffix.lower() == '.txt':
+        jobs = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    parts = shlex.split(line)
+                    jobs.append((parts[0], parts[1:]))
+        return jobs
+
+    return [(p, []) for p in sorted(glob.glob(source))]
+
+
+def run_deck(presentation: str, shared_args: List[str], deck_args: List[str]) -> Dict:
+    """Render one deck in this process and return its report entry"""
+    entry = {'presentation': presentation, 'status': 'failed'}
+    start = time.time()
+
+    try:
+        args = video_creator.build_parser().parse_args(
+            [presentation] + shared_args + deck_args)
+        summary = {}
+        code = video_creator.run(args, summary)
+        entry.update(summary)
+        entry['status'] = 'ok' if code == 0 else 'failed'
+        entry['exit_code'] = code
+    except SystemExit as e:
+        # argparse rejected the per-deck options
+        entry['error'] = f"Invalid options (exit {e.code})"
+    except Exception as e:
+        entry['error'] = str(e)
+
+    entry['seconds'] = round(time.time() - start, 1)
+    return entry
+
+
+def batch_main(argv=None) -> int:
+    """
+    Entry point for `video_creator.py batch`
+
+    Options not listed here are passed to every deck (e.g., --voice,
+    --use-existing-audio, --quality).
+
+    Returns:
+        Exit code (0 = every deck succeeded)
+    """
+    parser = argparse.ArgumentParser(
+        prog='video_creator.py batch',
+        description='Render many presentations in one process'
+    )
+    parser.add_argument('source',
+                        help='Directory of .pptx files, glob pattern, or manifest (.json/.txt)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Decks rendered concurrently (default: 1)')
+    parser.add_argument('--report', default=None,
+                        help='Report path (default: _projects/batch_report_<timestamp>.json)')
+
+    args, shared_args = parser.parse_known_args(argv)
+
+    jobs = resolve_decks(args.source)
+    if not jobs:
+        print(f"ERROR: No presentations found for: {args.source}")
+        return 1
+
+    workers = max(1, min(args.workers, len(jobs)))
+
+    print("=" * 70)
+    print("VIDEO CREATOR - Batch Mode")
+    print("=" * 70)
+    print(f"Decks: {len(jobs)}")
+    print(f"Workers: {workers}")
+    if shared_args:
+        print(f"Options: {' '.join(shared_args)}")
+    print()
+
+    start = time.time()
+    results = []
+
+    # Largest decks first so one long deck does not finish the batch alone
+    jobs.sort(key=lambda job: os.path.getsize(job[0]) if os.path.exists(job[0]) else 0,
+              reverse=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_deck, pres, shared_args, deck_args): pres
+                   for pres, deck_args in jobs}
+        for future in as_completed(futures):
+            entry = future.result()
+            results.append(entry)
+            mark = "[OK]" if entry['status'] == 'ok' else "[X]"
+            print(f"\n{mark} {Path(entry['presentation']).name} ({entry['seconds']}s)")
+
+    results.sort(key=lambda entry: entry['presentation'])
+    elapsed = round(time.time() - start, 1)
+    succeeded = sum(1 for entry in results if entry['status'] == 'ok')
+
+    report_path = args.report or (
+        f"_projects/batch_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    Path(report_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'source': args.source,
+            'workers': workers,
+            'options': shared_args,
+            'started_at': datetime.fromtimestamp(start).isoformat(),
+            'seconds': elapsed,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'decks': results
+        }, f, indent=2)
+
+    print()
+    print("=" * 70)
+    print("BATCH SUMMARY")
+    print("=" * 70)
+    for entry in results:
+        mark = "[OK]" if entry['status'] == 'ok' else "[X]"
+        detail = entry.get('video') or entry.get('error') or ''
+        print(f"{mark} {Path(entry['presentation']).name:40s} {entry['seconds']:>8}s  {detail}")
+    print()
+    print(f"Succeeded: {succeeded}/{len(results)}  Total time: {elapsed}s")
+    print(f"Report: {report_path}")
+
+    return 0 if succeeded == len(results) else 1
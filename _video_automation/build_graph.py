@@ -0,0 +1,240 @@
+"""
+Build Graph
+Make-like dependency engine: rebuild only stale nodes, in parallel where possible
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from tracing import bind
+
+
+def fingerprint(*values: Any) -> str:
+    """Stable hash of JSON-serializable values"""
+    data = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def file_fingerprint(path) -> Optional[str]:
+    """Hash of a file's contents (None if it does not exist)"""
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildNode:
+    """One unit of work in the graph"""
+
+    def __init__(self, node_id: str, action: Callable[[], Optional[bool]],
+                 inputs: Callable[[], Any] = None, deps: Iterable[str] = (),
+                 outputs: Iterable[str] = (), resource: Optional[str] = None,
+                 after: Iterable[str] = ()):
+        """
+        Args:
+            node_id: Unique id (e.g., 'image:03')
+            action: Builds the outputs. Return False when the node ran but
+                    should be retried next build (e.g., placeholder used)
+            inputs: Returns the values that determine the outputs
+            deps: Ids of nodes that must be built first
+            outputs: Files produced (missing outputs make the node stale)
+            resource: Nodes sharing a resource name never run concurrently
+            after: Ids of nodes that must be built first but are not part of
+                   this node's key (e.g. a shared file of which the node
+                   only uses its own part, covered by its inputs)
+        """
+        self.id = node_id
+        self.action = action
+        self.inputs = inputs or (lambda: None)
+        self.deps = list(deps)
+        self.outputs = [str(p) for p in outputs]
+        self.resource = resource
+        self.after = list(after)
+
+
+class BuildGraph:
+    """Dependency graph with input-hash keyed, incremental, parallel builds"""
+
+    def __init__(self, state_file: str):
+        self.state_file = Path(state_file)
+        self.nodes: Dict[str, BuildNode] = {}
+        self.state: Dict[str, Dict] = {}
+        self._keys: Dict[str, str] = {}
+        self._state_lock = threading.Lock()
+        self._resource_locks: Dict[str, threading.Lock] = {}
+        self.load_state()
+
+    def add(self, node: BuildNode) -> BuildNode:
+        """Add a node to the graph"""
+        if node.id in self.nodes:
+            raise ValueError(f"Duplicate build node: {node.id}")
+        self.nodes[node.id] = node
+        if node.resource and node.resource not in self._resource_locks:
+            self._resource_locks[node.resource] = threading.Lock()
+        return node
+
+    def load_state(self):
+        """Load recorded node keys from disk"""
+        if not self.state_file.exists():
+            return
+
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load build state: {e}")
+
+    def save_state(self):
+        """Save recorded node keys atomically"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, self.state_file)
+
+    def key(self, node_id: str) -> str:
+        """Node key: hash of its own inputs plus the keys of its dependencies"""
+        if node_id not in self._keys:
+            node = self.nodes[node_id]
+            dep_keys = [self.key(dep) for dep in node.deps]
+            self._keys[node_id] = fingerprint(node.id, node.inputs(), dep_keys)
+        return self._keys[node_id]
+
+    def is_stale(self, node_id: str) -> bool:
+        """Check if a node needs rebuilding"""
+        node = self.nodes[node_id]
+        recorded = self.state.get(node_id, {}).get('key')
+        if recorded != self.key(node_id):
+            return True
+        return any(not os.path.exists(path) for path in node.outputs)
+
+    def closure(self, targets: Optional[Iterable[str]] = None) -> List[str]:
+        """Targets plus everything they depend on, in dependency order"""
+        order: List[str] = []
+        visiting = set()
+        done = set()
+
+        def visit(node_id):
+            if node_id in done:
+                return
+            if node_id in visiting:
+                raise ValueError(f"Dependency cycle at: {node_id}")
+            if node_id not in self.nodes:
+                raise ValueError(f"Unknown build node: {node_id}")
+            visiting.add(node_id)
+            for dep in self.nodes[node_id].deps + self.nodes[node_id].after:
+                visit(dep)
+            visiting.discard(node_id)
+            done.add(node_id)
+            order.append(node_id)
+
+        for node_id in (targets if targets is not None else list(self.nodes)):
+            visit(node_id)
+
+        return order
+
+    def stale_nodes(self, targets: Optional[Iterable[str]] = None) -> List[str]:
+        """Nodes that a build of the targets would run"""
+        return [n for n in self.closure(targets) if self.is_stale(n)]
+
+    def build(self, targets: Optional[Iterable[str]] = None, jobs: int = 1,
+              dry_run: bool = False) -> Dict[str, List[str]]:
+        """
+        Build targets, running only stale nodes
+
+        Args:
+            targets: Node ids to bring up to date (None = all)
+            jobs: Max nodes running concurrently
+            dry_run: Only report what would run (as 'stale')
+
+        Returns:
+            Dict with 'built', 'retry', 'failed', 'skipped' and 'up_to_date'
+            node ids ('stale' and 'up_to_date' for a dry run)
+        """
+        self._keys = {}  # inputs may have changed since the last call
+        order = self.closure(targets)
+        result = {'built': [], 'retry': [], 'failed': [], 'skipped': [], 'up_to_date': []}
+
+        if dry_run:
+            stale = [n for n in order if self.is_stale(n)]
+            return {'stale': stale, 'up_to_date': [n for n in order if n not in stale]}
+
+        remaining = {n: set(self.nodes[n].deps + self.nodes[n].after) & set(order) for n in order}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            while remaining or running:
+                # Start every node whose dependencies are finished
+                for node_id in [n for n, deps in remaining.items() if not deps]:
+                    del remaining[node_id]
+                    running[pool.submit(bind(self._run_node), node_id)] = node_id
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    node_id = running.pop(future)
+                    status = future.result()
+                    result[status].append(node_id)
+
+                    if status == 'failed':
+                        self._skip_dependents(node_id, remaining, result)
+                    else:
+                        for deps in remaining.values():
+                            deps.discard(node_id)
+
+        return result
+
+    def _skip_dependents(self, node_id, remaining, result):
+        """Drop every pending node downstream of a failed node"""
+        blocked = [n for n, deps in remaining.items() if node_id in deps]
+        for dependent in blocked:
+            if dependent in remaining:
+                del remaining[dependent]
+                result['skipped'].append(dependent)
+                self._skip_dependents(dependent, remaining, result)
+
+    def _run_node(self, node_id: str) -> str:
+        """Run one node if stale and record its key"""
+        if not self.is_stale(node_id):
+            return 'up_to_date'
+
+        node = self.nodes[node_id]
+        lock = self._resource_locks.get(node.resource)
+
+        try:
+            if lock:
+                with lock:
+                    outcome = node.action()
+            else:
+                outcome = node.action()
+        except Exception as e:
+            print(f"  [X] {node_id}: {e}")
+            return 'failed'
+
+        if outcome is False:
+            return 'retry'
+
+        # Record the key from the inputs as they are after the build
+        self._keys.pop(node_id, None)
+
+        with self._state_lock:
+            self.state[node_id] = {
+                'key': self.key(node_id),
+                'built_at': datetime.now().isoformat()
+            }
+            self.save_state()
+
+        return 'built'
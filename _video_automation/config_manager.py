@@ -9,6 +9,19 @@ from pathlib import Path
 from typing import List, Dict, Optional
 
 
+# Imagen REST endpoint used by the async image generator ({model} is filled in)
+DEFAULT_IMAGE_API = {
+    'endpoint': 'https://generativelanguage.googleapis.com/v1beta/models/{model}:predict',
+    'model': 'imagen-3.0-generate-002',
+    'requests_per_minute': 10,
+    'concurrency': 4,
+    'max_retries': 5,
+    'timeout': 120,
+    'cache_dir': '_projects/.image_cache',  # shared by all projects; null disables
+    'cache_max_mb': 2048
+}
+
+
 class APIConfig:
     """Manages API keys and configuration"""
 
@@ -16,8 +29,13 @@ class APIConfig:
         self.config_path = config_path or self._default_config_path()
         self.google_accounts: List[Dict] = []
         self.fallback_apis: Dict = {}
+        self.image_api: Dict = dict(DEFAULT_IMAGE_API)
         self.load_config()
 
+        # IMAGE_API_ENDPOINT points the generator elsewhere (e.g. the mock server)
+        if os.getenv('IMAGE_API_ENDPOINT'):
+            self.image_api['endpoint'] = os.getenv('IMAGE_API_ENDPOINT')
+
     def _default_config_path(self) -> str:
         """Get default config file path"""
         script_dir = Path(__file__).parent
@@ -32,6 +50,7 @@ class APIConfig:
                     config = json.load(f)
                     self.google_accounts = config.get('google_accounts', [])
                     self.fallback_apis = config.get('fallback', {})
+                    self.image_api.update(config.get('image_api', {}))
                     print(f"[OK] Loaded config from: {self.config_path}")
                     print(f"  Google accounts: {len(self.google_accounts)}")
                     return
@@ -94,6 +113,10 @@ class APIConfig:
         """Check if any Google accounts are configured"""
         return len(self.google_accounts) > 0
 
+    def get_image_api(self) -> Dict:
+        """Image API settings (endpoint, model, rate limits, retries)"""
+        return self.image_api
+
     def get_fallback_api(self, service: str) -> Optional[str]:
         """Get fallback API key for service (dalle, stability, etc.)"""
         return self.fallback_apis.get(f'{service}_key')
@@ -123,6 +146,16 @@ class APIConfig:
                     "notes": "Emergency backup"
                 }
             ],
+            "image_api": {
+                "endpoint": DEFAULT_IMAGE_API['endpoint'],
+                "model": DEFAULT_IMAGE_API['model'],
+                "requests_per_minute": DEFAULT_IMAGE_API['requests_per_minute'],
+                "concurrency": DEFAULT_IMAGE_API['concurrency'],
+                "cache_dir": DEFAULT_IMAGE_API['cache_dir'],
+                "cache_max_mb": DEFAULT_IMAGE_API['cache_max_mb'],
+                "notes": "Per-account rate limit; concurrency is the total in flight; "
+                         "identical prompts are served from cache_dir"
+            },
             "fallback": {
                 "dalle_key": "sk-... (optional OpenAI key)",
                 "stability_key": "sk-... (optional Stability AI key)",
@@ -0,0 +1,389 @@
+"""
+Deck Parser
+One parsing engine for every stage: a typed slide model read once per deck
+"""
+
+import hashlib
+import json
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from notes_tokenizer import tokenize_notes
+from pptx_reader import SHAPE_KINDS, PptxStreamReader
+
+
+# Bumped whenever the extracted fields change (invalidates parse caches)
+PARSER_VERSION = 5
+
+BULLET_CHARS = ('*', '-', '●', '○')
+LOGO_TEXT = ("SNOWBRIXAI", "SNOWBRIX")
+
+
+@dataclass(slots=True)
+class SlideRecord:
+    """
+    Everything the pipeline needs from one slide
+
+    Plain data only (no python-pptx objects), so records are cheap to
+    cache as JSON and to pickle to worker processes. Geometry is in EMU;
+    pictures are referenced by package part name (pptx_reader.read_media).
+    """
+    number: int
+    title: str
+    content: str
+    notes_raw: str
+    notes: str
+    key_points: List[str] = field(default_factory=list)
+    broll_markers: List[Dict[str, Any]] = field(default_factory=list)
+    pause_markers: List[Dict[str, Any]] = field(default_factory=list)
+    speed_markers: List[Dict[str, Any]] = field(default_factory=list)
+    highlight_markers: List[Dict[str, Any]] = field(default_factory=list)
+    zoom_markers: List[Dict[str, Any]] = field(default_factory=list)
+    note_tokens: List[Dict[str, Any]] = field(default_factory=list)
+    slide_size: List[int] = field(default_factory=list)  # [cx, cy] of the deck
+    shapes: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def images(self) -> List[str]:
+        """Media part names of the slide's pictures, in z-order"""
+        return [shape['image'] for shape in self.shapes if shape.get('image')]
+
+    def to_json(self) -> Dict:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'SlideRecord':
+        return cls(**data)
+
+    def as_video_slide(self) -> Dict:
+        """Slide dict used by the video pipeline (notes cleaned for narration)"""
+        return {
+            'slide_number': self.number,
+            'title': self.title,
+            'content': self.content,
+            'notes': self.notes,
+            'notes_raw': self.notes_raw,  # Keep original with markers
+            'broll_markers': self.broll_markers,
+            'pause_markers': self.pause_markers,
+            'speed_markers': self.speed_markers,
+            'highlight_markers': self.highlight_markers,
+            'zoom_markers': self.zoom_markers,
+            'note_tokens': self.note_tokens,  # Ordered text spans and markers
+            'slide_size': self.slide_size,
+            'shapes': self.shapes,
+            'images': self.images
+        }
+
+    def as_design_slide(self) -> Dict:
+        """Slide dict used by the redesign stages (notes keep their markers)"""
+        return {
+            'number': self.number,
+            'title': self.title,
+            'content': self.content,
+            'notes': self.notes_raw,
+            'key_points': self.key_points
+        }
+
+
+def safe_text(text: str) -> str:
+    """Drop characters that cannot be encoded"""
+    if not text:
+        return ""
+    return text.encode('utf-8', errors='ignore').decode('utf-8')
+
+
+def _frame_text(frame) -> str:
+    """Text of a python-pptx text frame as the stream reader returns it (line breaks as newlines)"""
+    return safe_text(frame.text).replace('\v', '\n').strip()
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DeckCache:
+    """
+    Parsed slide records stored next to the project
+
+    Entries are keyed by deck path and validated by content hash and
+    PARSER_VERSION; an unchanged size/mtime skips re-hashing the deck.
+    """
+
+    FILENAME = ".deck_cache.json"
+
+    def __init__(self, cache_dir: str):
+        self.path = Path(cache_dir) / self.FILENAME
+        self.decks: Dict[str, Dict] = {}
+        self.load()
+
+    def load(self):
+        """Load cache from disk"""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('parser_version') == PARSER_VERSION:
+                self.decks = data.get('decks', {})
+        except Exception as e:
+            print(f"Warning: Could not load parse cache: {e}")
+
+    def save(self):
+        """Save cache atomically (write temp file, then rename)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'parser_version': PARSER_VERSION, 'decks': self.decks}, f)
+
+        os.replace(tmp_path, self.path)
+
+    def get(self, pptx_path: str) -> Optional[List[SlideRecord]]:
+        """Cached records for this deck, or None if missing or stale"""
+        key = os.path.abspath(pptx_path)
+        entry = self.decks.get(key)
+        if not entry:
+            return None
+
+        stat = os.stat(pptx_path)
+        if (entry['size'], entry['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+            # Touched but possibly unchanged (copied, re-saved): compare contents
+            if file_hash(pptx_path) != entry['sha256']:
+                return None
+            entry['size'], entry['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+            self.save()
+
+        return [SlideRecord.from_json(data) for data in entry['slides']]
+
+    def put(self, pptx_path: str, records: List[SlideRecord]):
+        """Store a full parse of this deck"""
+        stat = os.stat(pptx_path)
+        self.decks[os.path.abspath(pptx_path)] = {
+            'sha256': file_hash(pptx_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'slides': [record.to_json() for record in records]
+        }
+        self.save()
+
+
+def load_deck(pptx_path: str, cache_dir: Optional[str] = None,
+              preview_count: Optional[int] = None) -> List[SlideRecord]:
+    """
+    Slide records for a deck, from the parse cache when it is current
+
+    Args:
+        pptx_path: Path to .pptx file
+        cache_dir: Project directory holding the cache (None = no cache)
+        preview_count: Only return first N slides (None = all)
+
+    Returns:
+        List of SlideRecord in slide order
+    """
+    cache = DeckCache(cache_dir) if cache_dir else None
+
+    records = cache.get(pptx_path) if cache else None
+    if records is not None:
+        print(f"   Using cached parse: {Path(pptx_path).name} ({len(records)} slides)")
+        return records[:preview_count] if preview_count else records
+
+    records = parse_deck(pptx_path, preview_count=preview_count)
+
+    # Only complete parses are cached
+    if cache and not preview_count:
+        try:
+            cache.put(pptx_path, records)
+        except OSError as e:
+            print(f"Warning: Could not save parse cache: {e}")
+
+    return records
+
+
+def parse_deck(pptx_path: str, preview_count: Optional[int] = None) -> List[SlideRecord]:
+    """
+    Parse a presentation into slide records
+
+    Reads the package XML directly (no media is loaded); decks with an
+    unexpected package layout fall back to python-pptx.
+
+    Args:
+        pptx_path: Path to .pptx file
+        preview_count: Only parse first N slides (None = all)
+
+    Returns:
+        List of SlideRecord in slide order
+    """
+    try:
+        reader = PptxStreamReader(pptx_path)
+        return [build_record(slide.number, slide.title, slide.texts, safe_text(slide.notes).strip(),
+                             shapes=slide.shapes, slide_size=reader.slide_size)
+                for slide in reader.iter_slides(limit=preview_count)]
+    except (KeyError, ET.ParseError) as e:
+        print(f"   Warning: Fast reader failed ({e}), using python-pptx")
+    except zipfile.BadZipFile as e:
+        raise Exception(f"Failed to load PowerPoint: {e}")
+
+    return parse_deck_pptx(pptx_path, preview_count)
+
+
+def parse_deck_pptx(pptx_path: str, preview_count: Optional[int] = None) -> List[SlideRecord]:
+    """Parse with python-pptx (loads the whole package)"""
+    try:
+        from pptx import Presentation
+    except ImportError:
+        print("ERROR: python-pptx not installed")
+        print("Install with: pip install python-pptx")
+        raise
+
+    try:
+        presentation = Presentation(pptx_path)
+    except Exception as e:
+        raise Exception(f"Failed to load PowerPoint: {e}")
+
+    slide_size = (presentation.slide_width, presentation.slide_height)
+    records = []
+    for number, slide in enumerate(presentation.slides, 1):
+        if preview_count and number > preview_count:
+            break
+        records.append(parse_slide(slide, number, slide_size))
+
+    return records
+
+
+def parse_slide(slide, number: int, slide_size=None) -> SlideRecord:
+    """Build one record from a python-pptx slide (one walk over its shapes)"""
+    from pptx.enum.shapes import PP_PLACEHOLDER
+
+    title_placeholders = {PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE,
+                          PP_PLACEHOLDER.VERTICAL_TITLE}
+    title_text = ""
+    texts = []
+    shapes = []
+
+    for shape in slide.shapes:
+        # Same shapes as the stream reader: p:sp and p:pic, which includes
+        # pictures in picture placeholders (shape_type PLACEHOLDER)
+        kind = SHAPE_KINDS.get(shape._element.tag)
+        if kind is None:
+            continue
+        picture = kind == 'picture'
+
+        info = {
+            'kind': kind,
+            'name': shape.name,
+            'placeholder': _placeholder_type(shape),
+            'x': shape.left, 'y': shape.top, 'cx': shape.width, 'cy': shape.height
+        }
+        if picture:
+            info['image'] = slide.part.related_part(shape._element.blip_rId).partname.lstrip('/')
+        shapes.append(info)
+
+        if not shape.has_text_frame:
+            continue
+        text = _frame_text(shape.text_frame)
+        info['text'] = text
+        if not text:
+            continue
+        texts.append(text)
+        if not title_text and shape.is_placeholder and \
+                shape.placeholder_format.type in title_placeholders:
+            title_text = text
+
+    notes_raw = ""
+    if slide.has_notes_slide:
+        frame = slide.notes_slide.notes_text_frame
+        notes_raw = _frame_text(frame) if frame is not None else ""
+
+    return build_record(number, title_text, texts, notes_raw, shapes=shapes, slide_size=slide_size)
+
+
+def _placeholder_type(shape) -> Optional[str]:
+    """Placeholder type in the XML spelling used by pptx_reader (e.g. 'ctrTitle')"""
+    if not shape.is_placeholder:
+        return None
+    ph = shape._element.ph
+    return ph.get('type', 'obj') if ph is not None else None
+
+
+def build_record(number: int, title_text: str, texts: List[str], notes_raw: str,
+                 shapes: Optional[List[Dict]] = None, slide_size=None) -> SlideRecord:
+    """
+    Apply the shared heuristics to a slide's extracted text
+
+    Args:
+        number: 1-based slide number
+        title_text: Text of the title placeholder ('' if none)
+        texts: Non-empty text of every text shape, in shape order
+        notes_raw: Speaker notes as written (markers included)
+        shapes: Geometry of the slide's shapes and pictures
+        slide_size: Deck slide size (cx, cy) in EMU
+    """
+    title = title_text or _guess_title(texts) or f"Slide {number}"
+    content = "\n".join(texts)
+    notes = tokenize_notes(notes_raw)
+
+    return SlideRecord(
+        number=number,
+        title=title,
+        content=content,
+        notes_raw=notes_raw,
+        notes=notes.text,
+        key_points=extract_key_points(content, title),
+        broll_markers=notes.markers('screen'),
+        pause_markers=notes.markers('pause'),
+        speed_markers=notes.markers('speed'),
+        highlight_markers=notes.markers('highlight'),
+        zoom_markers=notes.markers('zoom'),
+        note_tokens=notes.tokens,
+        slide_size=list(slide_size) if slide_size else [],
+        shapes=shapes or []
+    )
+
+
+def _guess_title(texts: List[str]) -> str:
+    """First text that looks like a heading (skips logos, numbers, short labels)"""
+    for text in texts:
+        if any(logo in text for logo in LOGO_TEXT):
+            continue
+        if text.isdigit() or len(text) < 10 or text.startswith("MDF_"):
+            continue
+        return text.split('\n')[0].strip()
+
+    return texts[0].split('\n')[0].strip() if texts else ""
+
+
+def extract_key_points(content: str, title: str, limit: int = 5) -> List[str]:
+    """Bullets, numbered items and 'NAME - description' lines, deduplicated"""
+    key_points = []
+    lines = [line.strip() for line in content.split('\n') if line.strip()]
+
+    for i, line in enumerate(lines):
+        # Handle various bullet characters
+        if line.startswith(BULLET_CHARS):
+            clean_line = line.lstrip('*-●○ ').strip()
+            if clean_line:
+                key_points.append(clean_line)
+
+        # Handle numbered lists (number shape, text in the next shape)
+        elif line[0].isdigit() and len(line) <= 2:
+            if i + 1 < len(lines):
+                next_line = lines[i + 1]
+                if len(next_line) > 15 and next_line != title:
+                    key_points.append(next_line)
+
+        # Descriptions (e.g., "MDF_ADMIN - Full control...")
+        elif " - " in line and len(line) > 20 and line != title:
+            if not line.startswith(title[:10]):
+                key_points.append(line)
+
+    return list(dict.fromkeys(key_points))[:limit]
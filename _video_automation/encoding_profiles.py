@@ -0,0 +1,63 @@
+"""
+Encoding Profiles
+Named resolution/fps/encoder settings for draft, review and publish renders
+"""
+
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """Complete set of encoding settings for one render quality"""
+    name: str
+    width: int
+    height: int
+    fps: int
+    preset: str
+    crf: int
+    audio_bitrate: str
+
+    @property
+    def resolution(self) -> str:
+        """Resolution string (e.g., '1920x1080')"""
+        return f"{self.width}x{self.height}"
+
+    def with_overrides(self, resolution: Optional[str] = None,
+                       fps: Optional[int] = None) -> 'EncodingProfile':
+        """Return a copy with explicit --resolution/--fps values applied"""
+        profile = self
+        if resolution:
+            w, h = resolution.lower().split('x')
+            profile = replace(profile, width=int(w), height=int(h))
+        if fps:
+            profile = replace(profile, fps=fps)
+        return profile
+
+
+PROFILES: Dict[str, EncodingProfile] = {
+    # Fast review of content and timing: stills need very few frames
+    'draft': EncodingProfile(
+        name='draft', width=960, height=540, fps=5,
+        preset='ultrafast', crf=32, audio_bitrate='64k'
+    ),
+    # Shareable review copy
+    'review': EncodingProfile(
+        name='review', width=1280, height=720, fps=24,
+        preset='veryfast', crf=26, audio_bitrate='128k'
+    ),
+    # Final upload quality
+    'publish': EncodingProfile(
+        name='publish', width=1920, height=1080, fps=30,
+        preset='medium', crf=23, audio_bitrate='192k'
+    ),
+}
+
+
+def get_profile(name: str) -> EncodingProfile:
+    """Look up an encoding profile by name"""
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown encoding profile: {name} "
+                         f"(choose from: {', '.join(PROFILES)})")
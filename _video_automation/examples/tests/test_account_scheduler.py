@@ -0,0 +1,94 @@
+"""
+Tests for the API account scheduler (MultiAccountAPIManager.next_account / plan_requests)
+"""
+
+import atexit
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from api_manager import MultiAccountAPIManager
+
+
+def make_manager(state_dir, **limits):
+    """Manager over accounts name -> daily limit, with its state in state_dir"""
+    manager = MultiAccountAPIManager(
+        [{'name': name, 'api_key': f"key-{name}", 'daily_limit': limit}
+         for name, limit in limits.items()],
+        state_file=str(Path(state_dir) / ".api_state.db"))
+    atexit.unregister(manager.save_state)
+    return manager
+
+
+def test_next_account_follows_remaining_quota():
+    with tempfile.TemporaryDirectory() as state_dir:
+        manager = make_manager(state_dir, A=30, B=10)
+        picks = [manager.next_account().name for _ in range(8)]
+        assert picks.count('A') == 6 and picks.count('B') == 2
+        assert 'B' in picks[:4]  # spread out, not A drained first
+
+
+def test_next_account_exclude_is_a_preference():
+    with tempfile.TemporaryDirectory() as state_dir:
+        manager = make_manager(state_dir, A=30, B=10)
+        assert manager.next_account(exclude=['A']).name == 'B'
+        # Nothing else usable: the excluded account is still returned
+        assert manager.next_account(exclude=['A', 'B']).name in ('A', 'B')
+
+
+def test_next_account_counts_reserved_requests():
+    with tempfile.TemporaryDirectory() as state_dir:
+        manager = make_manager(state_dir, A=30, B=10)
+        assert manager.next_account(reserved={'A': 30}).name == 'B'
+        assert manager.next_account(reserved={'A': 30, 'B': 10}) is None
+
+
+def test_next_account_skips_exhausted_accounts():
+    with tempfile.TemporaryDirectory() as state_dir:
+        manager = make_manager(state_dir, A=30, B=10)
+        manager.accounts[0].mark_exhausted("quota")
+        assert {manager.next_account().name for _ in range(5)} == {'B'}
+        manager.accounts[1].mark_exhausted("quota")
+        assert manager.next_account() is None
+
+
+def test_failures_lower_an_accounts_weight():
+    with tempfile.TemporaryDirectory() as state_dir:
+        manager = make_manager(state_dir, A=30, B=10)
+        healthy = manager.account_weight(manager.accounts[0])
+        for _ in range(10):
+            manager.accounts[0].record_result(False)
+        assert manager.account_weight(manager.accounts[0]) < manager.account_weight(manager.accounts[1])
+        assert manager.account_weight(manager.accounts[0]) == healthy * manager.MIN_HEALTH
+
+
+def test_plan_requests_shares_and_interleaves():
+    with tempfile.TemporaryDirectory() as state_dir:
+        manager = make_manager(state_dir, A=30, B=10)
+        plan = manager.plan_requests(8)
+        assert plan.count('A') == 6 and plan.count('B') == 2
+        assert plan[:4].count('B') == 1 and plan[4:].count('B') == 1
+
+        manager = make_manager(state_dir, C=10, D=10)
+        plan = manager.plan_requests(6)
+        assert all(a != b for a, b in zip(plan, plan[1:]))
+
+
+def test_plan_requests_is_capped_by_quota():
+    with tempfile.TemporaryDirectory() as state_dir:
+        manager = make_manager(state_dir, A=2, B=10)
+        plan = manager.plan_requests(50)
+        assert len(plan) == 12
+        assert plan.count('A') == 2 and plan.count('B') == 10
+
+        manager.accounts[0].mark_exhausted("quota")
+        assert manager.plan_requests(3) == ['B', 'B', 'B']
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"   ✓ {name}")
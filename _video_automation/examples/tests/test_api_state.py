@@ -0,0 +1,96 @@
+"""
+Tests for api_state.ApiStateStore: batched usage deltas and the daily rollover
+"""
+
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from api_state import ApiStateStore
+
+
+def set_last_reset(db_path, name, when):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE accounts SET last_reset = ? WHERE name = ?", (when.isoformat(), name))
+    conn.close()
+
+
+def test_updates_are_buffered_until_due():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "state.db")
+        writer = ApiStateStore(db_path, flush_every=3, flush_interval=3600)
+        reader = ApiStateStore(db_path)
+
+        assert writer.record('A', used=1) is False
+        assert writer.record('A', used=1) is False
+        assert writer.pending_used('A') == 2
+        assert reader.load(['A'])['A']['used_today'] == 0  # nothing written yet
+
+        assert writer.record('A', used=1) is True  # third update: flush due
+        state = writer.flush(['A'])
+        assert state['A']['used_today'] == 3
+        assert writer.pending_used('A') == 0
+        assert reader.load(['A'])['A']['used_today'] == 3
+
+
+def test_exhaustion_is_flushed_at_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ApiStateStore(str(Path(tmp) / "state.db"), flush_every=100, flush_interval=3600)
+        assert store.record('A', exhausted=True, error="429 quota") is True
+        state = store.flush()['A']
+        assert state['is_exhausted'] and state['last_error'] == "429 quota"
+
+
+def test_deltas_from_processes_add_up():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "state.db")
+        first = ApiStateStore(db_path)
+        second = ApiStateStore(db_path)
+
+        for _ in range(2):
+            first.record('A', used=1)
+        for _ in range(3):
+            second.record('A', used=1)
+        first.flush()
+        assert second.flush(['A'])['A']['used_today'] == 5
+
+
+def test_day_rollover_resets_usage():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "state.db")
+        store = ApiStateStore(db_path)
+        store.record('A', used=7, exhausted=True, error="quota")
+        store.flush()
+
+        set_last_reset(db_path, 'A', datetime.now() - timedelta(hours=23))
+        assert store.load(['A'])['A']['used_today'] == 7
+
+        set_last_reset(db_path, 'A', datetime.now() - timedelta(days=1, minutes=1))
+        state = store.load(['A'])['A']
+        assert state['used_today'] == 0
+        assert not state['is_exhausted'] and state['last_error'] is None
+        assert datetime.now() - state['last_reset'] < timedelta(minutes=1)
+
+
+def test_buffered_usage_counts_toward_the_new_day():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "state.db")
+        store = ApiStateStore(db_path, flush_every=100, flush_interval=3600)
+        store.record('A', used=5)
+        store.flush()
+
+        set_last_reset(db_path, 'A', datetime.now() - timedelta(days=2))
+        store.record('A', used=1)
+        assert store.flush(['A'])['A']['used_today'] == 1  # rolled over, then the delta
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"   ✓ {name}")
@@ -0,0 +1,83 @@
+"""
+Tests for AudioManifest: legacy take adoption and collect_garbage
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from audio_manifest import AudioManifest
+
+
+def make_takes(project_dir, *names):
+    output_dir = Path(project_dir) / "output"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (output_dir / name).write_bytes(b"RIFF")
+    return output_dir
+
+
+def take(slide, stamp):
+    return f"slide_{slide:02d}_audio_{stamp}_complete.wav"
+
+
+def test_collect_garbage_removes_superseded_takes_of_recorded_slides():
+    with tempfile.TemporaryDirectory() as project:
+        output_dir = make_takes(project, take(1, "20260101_100000"), take(1, "20260102_100000"))
+        manifest = AudioManifest(project)
+        manifest.adopt_legacy_takes()
+
+        new_take = AudioManifest.audio_path_for(project, 1)
+        Path(new_take).write_bytes(b"RIFF")
+        manifest.record(1, new_take, duration=1.0)
+
+        assert manifest.collect_garbage() == 2
+        assert sorted(p.name for p in output_dir.glob("*.wav")) == ["slide_01_audio.wav"]
+
+
+def test_collect_garbage_keeps_other_slides_and_plain_files():
+    with tempfile.TemporaryDirectory() as project:
+        output_dir = make_takes(
+            project,
+            take(1, "20260101_100000"),
+            take(2, "20260101_100000"),   # slide not re-recorded this run
+            "slide_03_audio.wav",         # placed by hand, not in the manifest
+        )
+        manifest = AudioManifest(project)
+
+        new_take = str(output_dir / take(1, "20260105_100000"))
+        Path(new_take).write_bytes(b"RIFF")
+        manifest.record(1, new_take, duration=1.0)
+
+        assert manifest.collect_garbage() == 1
+        assert sorted(p.name for p in output_dir.glob("*.wav")) == [
+            take(1, "20260105_100000"), take(2, "20260101_100000"), "slide_03_audio.wav"]
+
+
+def test_collect_garbage_keeps_referenced_takes():
+    with tempfile.TemporaryDirectory() as project:
+        output_dir = make_takes(project, take(4, "20260101_100000"), take(4, "20260102_100000"))
+        manifest = AudioManifest(project)
+        assert manifest.adopt_legacy_takes() == 1
+        assert manifest.audio_file(4).endswith(take(4, "20260102_100000"))
+
+        # Explicit slides: only the older, unreferenced take goes
+        assert manifest.collect_garbage([4]) == 1
+        assert [p.name for p in output_dir.glob("*.wav")] == [take(4, "20260102_100000")]
+
+
+def test_collect_garbage_without_recordings_removes_nothing():
+    with tempfile.TemporaryDirectory() as project:
+        output_dir = make_takes(project, take(1, "20260101_100000"), take(1, "20260102_100000"))
+        manifest = AudioManifest(project)
+        assert manifest.collect_garbage() == 0
+        assert len(list(output_dir.glob("*.wav"))) == 2
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"   ✓ {name}")
@@ -0,0 +1,84 @@
+"""
+Tests that the stream reader and the python-pptx fallback build the same slide records
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+from deck_parser import parse_deck, parse_deck_pptx
+
+
+def build_deck(folder: Path) -> str:
+    """Deck with text, notes markers, a picture placeholder and free shapes"""
+    image = str(folder / "red.png")
+    Image.new('RGB', (64, 48), (200, 10, 10)).save(image)
+
+    prs = Presentation()
+
+    slide = prs.slides.add_slide(prs.slide_layouts[1])  # Title and Content
+    slide.shapes.title.text = "Loading data into Snowflake"
+    slide.placeholders[1].text = "* Stage the files first\n* Then run COPY INTO"
+    slide.notes_slide.notes_text_frame.text = (
+        "Start with the stage. [PAUSE:1.5] Then [SCREEN:copy.mp4] run the copy. [SLOW] Done.")
+
+    slide = prs.slides.add_slide(prs.slide_layouts[8])  # Picture with Caption
+    slide.shapes.title.text = "Architecture overview"
+    slide.placeholders[1].insert_picture(image)
+    slide.placeholders[2].text = "Storage, compute and services"
+
+    slide = prs.slides.add_slide(prs.slide_layouts[5])  # Title Only, soft line breaks
+    slide.shapes.title.text = "Line breaks\vinside one paragraph"
+    slide.notes_slide.notes_text_frame.text = "First line\vsecond line\nNext paragraph"
+
+    slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank
+    slide.shapes.add_textbox(Inches(1), Inches(1), Inches(6), Inches(1)).text = \
+        "A free text box without any placeholder"
+    slide.shapes.add_picture(image, Inches(2), Inches(3))
+
+    path = str(folder / "deck.pptx")
+    prs.save(path)
+    return path
+
+
+def test_stream_reader_matches_python_pptx():
+    with tempfile.TemporaryDirectory() as tmp:
+        deck = build_deck(Path(tmp))
+        streamed = [record.to_json() for record in parse_deck(deck)]
+        loaded = [record.to_json() for record in parse_deck_pptx(deck)]
+
+        assert len(streamed) == len(loaded) == 4
+        for fast, full in zip(streamed, loaded):
+            assert fast == full, fast['number']
+
+
+def test_pictures_in_placeholders_are_pictures():
+    with tempfile.TemporaryDirectory() as tmp:
+        deck = build_deck(Path(tmp))
+        for record in (parse_deck(deck)[1], parse_deck_pptx(deck)[1]):
+            picture = next(shape for shape in record.shapes if shape['placeholder'] == 'pic')
+            assert picture['kind'] == 'picture'
+            assert record.images == [picture['image']]
+            assert picture['cx'] and picture['cy']  # inherited from the layout
+
+
+def test_line_breaks_are_newlines():
+    with tempfile.TemporaryDirectory() as tmp:
+        deck = build_deck(Path(tmp))
+        for record in (parse_deck(deck)[2], parse_deck_pptx(deck)[2]):
+            assert record.title == "Line breaks\ninside one paragraph"
+            assert record.notes_raw == "First line\nsecond line\nNext paragraph"
+            assert '\v' not in record.content
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"   ✓ {name}")
@@ -0,0 +1,95 @@
+"""
+Tests for notes_tokenizer.tokenize_notes
+Narration text must match the old regex-based clean_notes, markers keep their positions
+"""
+
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from notes_tokenizer import tokenize_notes
+
+
+# The patterns deck_parser used before the tokenizer (reference behavior)
+OLD_BROLL = re.compile(r'\[(?:SCREEN|BROLL):([^\]]+)\]', re.IGNORECASE)
+OLD_PAUSE = re.compile(r'\[PAUSE:(\d+\.?\d*)\]', re.IGNORECASE)
+OLD_SPEED = re.compile(r'\[(SLOW|FAST)\]|\[SPEED:(\d+\.?\d*)\]', re.IGNORECASE)
+OLD_MARKERS = re.compile(
+    r'\[(?:SCREEN|BROLL|HIGHLIGHT|ZOOM):[^\]]+\]|\[PAUSE:\d+\.?\d*\]'
+    r'|\[(?:SLOW|FAST)\]|\[SPEED:\d+\.?\d*\]', re.IGNORECASE)
+OLD_WHITESPACE = re.compile(r'\s+')
+
+
+def old_clean_notes(notes: str) -> str:
+    if not notes:
+        return ""
+    return OLD_WHITESPACE.sub(' ', OLD_MARKERS.sub('', notes)).strip()
+
+
+SAMPLES = [
+    "",
+    "   ",
+    "Plain narration without markers.",
+    "Welcome to the course. [PAUSE:1.5] Let's get started.",
+    "[SLOW] Careful here.\n\nThis part matters. [FAST] Moving on.",
+    "Open the console [SCREEN:console.mp4] and click Run [HIGHLIGHT: run button].",
+    "Word[PAUSE:2]word and [speed:1.2]mixed case [broll: clip.mp4 ]markers",
+    "Trailing marker [PAUSE:3]",
+    "[ZOOM:chart] [PAUSE:0.5]   [SLOW]Leading markers\tand\ttabs",
+    "Unknown [NOTE:keep me] tags and [PAUSE:x] stay in the text",
+    "Line one\r\nline two\n   [PAUSE:1]\n\nline three",
+]
+
+
+def test_text_matches_old_clean_notes():
+    for notes in SAMPLES:
+        assert tokenize_notes(notes).text == old_clean_notes(notes), notes
+
+
+def test_raw_positions_match_old_marker_scans():
+    for notes in SAMPLES:
+        tokens = tokenize_notes(notes)
+        assert [(m['file'], m['raw_position']) for m in tokens.markers('screen')] == \
+            [(m.group(1).strip(), m.start()) for m in OLD_BROLL.finditer(notes)], notes
+        assert [(m['duration'], m['raw_position']) for m in tokens.markers('pause')] == \
+            [(float(m.group(1)), m.start()) for m in OLD_PAUSE.finditer(notes)], notes
+        assert [m['raw_position'] for m in tokens.markers('speed')] == \
+            [m.start() for m in OLD_SPEED.finditer(notes)], notes
+
+
+def test_markers_anchor_at_next_word():
+    tokens = tokenize_notes("Welcome to the course. [PAUSE:1.5] Let's get started.")
+    pause = tokens.markers('pause')[0]
+    assert tokens.text[pause['position']:].startswith("Let's")
+
+    tokens = tokenize_notes("Word[PAUSE:2]word")
+    assert tokens.text == "Wordword"
+    assert tokens.markers('pause')[0]['position'] == 4
+
+
+def test_markers_at_the_edges():
+    tokens = tokenize_notes("[SLOW] Hi there")
+    assert tokens.markers('speed')[0] == {'type': 'speed', 'factor': 0.85,
+                                          'position': 0, 'raw_position': 0}
+
+    tokens = tokenize_notes("Bye [PAUSE:2]")
+    assert tokens.text == "Bye"
+    assert tokens.markers('pause')[0]['position'] == len(tokens.text)
+
+
+def test_token_stream_interleaves_text_and_markers():
+    tokens = tokenize_notes("Open [SCREEN:demo.mp4] the app [FAST] quickly")
+    assert [token['type'] for token in tokens.tokens] == ['text', 'screen', 'text', 'speed', 'text']
+    for token in tokens.tokens:
+        if token['type'] == 'text':
+            assert tokens.text[token['position']:].startswith(token['text'])
+    assert tokens.markers('speed')[0]['factor'] == 1.15
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"   ✓ {name}")
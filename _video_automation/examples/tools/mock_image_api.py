@@ -0,0 +1,165 @@
+"""
+Mock Image API
+Local stand-in for the Imagen predict endpoint with per-key rate limits, daily quotas, flaky errors and filtered prompts
+"""
+
+import argparse
+import base64
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_png(width, height, color):
+    """Solid-color PNG (stdlib only)"""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    row = b'\x00' + bytes(color) * width
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(row * height))
+            + chunk(b'IEND', b''))
+
+
+class MockState:
+    """Per-key request windows and daily counts"""
+
+    def __init__(self, rpm, daily_limit, failure_rate, latency, blocked_word=None, invalid_keys=()):
+        self.rpm = rpm
+        self.daily_limit = daily_limit
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.blocked_word = blocked_word
+        self.invalid_keys = set(invalid_keys)
+        self.windows = defaultdict(deque)
+        self.used = defaultdict(int)
+        self.stats = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def admit(self, key):
+        """(status, message, retry_after) for a request, or None to serve it"""
+        now = time.monotonic()
+        with self.lock:
+            if self.used[key] >= self.daily_limit:
+                self.stats['quota'] += 1
+                return 429, "Quota exceeded for metric: generate requests per day", 3600
+
+            window = self.windows[key]
+            while window and now - window[0] >= 60:
+                window.popleft()
+            if len(window) >= self.rpm:
+                self.stats['rate_limited'] += 1
+                return 429, "Rate limit exceeded: requests per minute", round(60 - (now - window[0]), 1)
+            window.append(now)
+
+            if random.random() < self.failure_rate:
+                self.stats['failed'] += 1
+                return 503, "The service is currently unavailable", 0
+
+            self.used[key] += 1
+            self.stats['ok'] += 1
+            return None
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            url = urlparse(self.path)
+            if not url.path.endswith(':predict'):
+                self._error(404, "Not found")
+                return
+
+            key = self.headers.get('x-goog-api-key') or parse_qs(url.query).get('key', [''])[0]
+            if not key:
+                self._error(403, "API key missing")
+                return
+            if key in state.invalid_keys:
+                # What the real API answers for a wrong or expired key
+                self._error(400, "API key not valid. Please pass a valid API key.")
+                return
+
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                prompt = body['instances'][0]['prompt']
+            except (ValueError, KeyError, IndexError):
+                self._error(400, "Invalid request")
+                return
+
+            rejected = state.admit(key)
+            if rejected:
+                self._error(*rejected)
+                return
+
+            time.sleep(state.latency * random.uniform(0.5, 1.5))
+
+            if state.blocked_word and state.blocked_word.lower() in prompt.lower():
+                self._json(200, {})  # safety filter: no predictions, like the real API
+                return
+
+            color = zlib.crc32(prompt.encode('utf-8')).to_bytes(4, 'big')[:3]
+            image = base64.b64encode(make_png(160, 90, color)).decode('ascii')
+            self._json(200, {'predictions': [{'bytesBase64Encoded': image, 'mimeType': 'image/png'}]})
+
+        def _error(self, status, message, retry_after=0):
+            names = {400: 'INVALID_ARGUMENT', 403: 'PERMISSION_DENIED', 404: 'NOT_FOUND',
+                     429: 'RESOURCE_EXHAUSTED', 503: 'UNAVAILABLE'}
+            headers = {'Retry-After': str(retry_after)} if retry_after else {}
+            self._json(status, {'error': {'code': status, 'message': message,
+                                          'status': names.get(status, 'UNKNOWN')}}, headers)
+
+        def _json(self, status, payload, headers=None):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Imagen predict API for testing image generation")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rpm', type=int, default=10, help='Requests per minute per API key')
+    parser.add_argument('--daily-limit', type=int, default=50, help='Successful requests per API key')
+    parser.add_argument('--failure-rate', type=float, default=0.05, help='Fraction of 503 responses')
+    parser.add_argument('--latency', type=float, default=1.0, help='Mean response time (seconds)')
+    parser.add_argument('--blocked-word', help='Prompts containing this word get no image (filtered)')
+    parser.add_argument('--invalid-key', action='append', default=[],
+                        help='API key answered with 400 "API key not valid" (repeatable)')
+    args = parser.parse_args()
+
+    state = MockState(args.rpm, args.daily_limit, args.failure_rate, args.latency, args.blocked_word,
+                      args.invalid_key)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(state))
+
+    endpoint = f"http://127.0.0.1:{args.port}/v1beta/models/{{model}}:predict"
+    print(f"Mock image API on {endpoint}")
+    print(f"  Use it with: IMAGE_API_ENDPOINT={endpoint}")
+    print("  Ctrl+C to stop")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\nRequests: {dict(state.stats)}")
+        print(f"Served per key: {dict(state.used)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Image Cache
+Content-addressed store of generated images shared by every project
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+
+DEFAULT_CACHE_DIR = "_projects/.image_cache"
+DEFAULT_MAX_MB = 2048
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Prompt as it matters to the model (case and whitespace insensitive)"""
+    return WHITESPACE.sub(' ', prompt).strip().casefold()
+
+
+class ImageCache:
+    """
+    Generated images keyed by (normalized prompt, model, request parameters)
+
+    Entries live in objects/<key[:2]>/<key>.<ext> and are hardlinked into
+    project image folders (copied where links are not possible), so a
+    prompt shared by many decks is generated and billed once. The store is
+    bounded by size: least recently used entries are evicted, which never
+    touches the linked project copies.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_mb: float = DEFAULT_MAX_MB):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(prompt: str, model: str, params: Optional[Dict] = None) -> str:
+        payload = json.dumps({'prompt': normalize_prompt(prompt), 'model': model,
+                              'params': params or {}}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Path]:
+        """Cached image for this key (marked as recently used), or None"""
+        for path in (self.objects_dir / key[:2]).glob(f"{key}.*"):
+            if path.suffix == '.tmp':
+                continue
+            try:
+                os.utime(path)
+            except OSError:
+                continue  # evicted meanwhile
+            return path
+        return None
+
+    def put(self, key: str, data: bytes, extension: str) -> Path:
+        """Store image bytes (atomic), evicting old entries if over budget"""
+        path = self.objects_dir / key[:2] / f"{key}.{extension}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self.evict()
+        return path
+
+    def link(self, source: Path, destination: Path) -> Path:
+        """Hardlink a cached image into a project folder (copy as fallback)"""
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = destination.with_name(f".{destination.name}.tmp")
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copy2(source, tmp_path)  # other drive or no hardlink support
+
+        os.replace(tmp_path, destination)
+        return destination
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits its budget"""
+        with self._lock:
+            entries = []
+            total = 0
+            for path in self.objects_dir.glob("*/*"):
+                if path.suffix == '.tmp':
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            # Evict down to 90% so every put does not trigger another pass
+            target = self.max_bytes * 0.9
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict:
+        files = [p for p in self.objects_dir.glob("*/*") if p.suffix != '.tmp']
+        return {
+            'entries': len(files),
+            'size_mb': round(sum(p.stat().st_size for p in files) / (1024 * 1024), 1),
+            'max_mb': round(self.max_bytes / (1024 * 1024)),
+            'cache_dir': str(self.cache_dir)
+        }
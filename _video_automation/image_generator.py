@@ -9,6 +9,8 @@ from pathlib import Path
 from typing import Optional, Tuple
 import base64
 
+from placeholder_generator import PlaceholderGenerator, find_slide_image
+
 
 class ImageGenerator:
     """Generates images using Google Gemini API"""
@@ -29,15 +31,8 @@ class ImageGenerator:
             self.api_available = False
 
     def check_existing_image(self, slide_number: int) -> Optional[Path]:
-        """Check if image already exists (manual or previously generated)"""
-        # Check for various formats
-        formats = ['png', 'jpg', 'jpeg']
-        for fmt in formats:
-            image_path = self.output_dir / f"slide_{slide_number:02d}.{fmt}"
-            if image_path.exists():
-                return image_path
-
-        return None
+        """Check if image already exists (manual or previously generated, not a placeholder)"""
+        return find_slide_image(self.output_dir, slide_number)
 
     def generate_image(
         self,
@@ -137,42 +132,7 @@ class ImageGenerator:
         slide_type: str
     ) -> Path:
         """Generate placeholder image when API fails"""
-        try:
-            from PIL import Image, ImageDraw, ImageFont
-
-            # Create image
-            width, height = 1920, 1080
-            img = Image.new('RGB', (width, height), color=(26, 35, 46))  # Dark background
-            draw = ImageDraw.Draw(img)
-
-            # Add text
-            try:
-                font_large = ImageFont.truetype("arial.ttf", 60)
-                font_small = ImageFont.truetype("arial.ttf", 30)
-            except:
-                font_large = ImageFont.load_default()
-                font_small = ImageFont.load_default()
-
-            # Title
-            title_text = slide_title[:50]
-            draw.text((100, 400), title_text, fill=(255, 255, 255), font=font_large)
-
-            # Placeholder text
-            placeholder_text = f"[{slide_type.upper()} IMAGE]"
-            draw.text((100, 500), placeholder_text, fill=(41, 179, 209), font=font_small)
-
-            info_text = "Generate manually or run with API"
-            draw.text((100, 600), info_text, fill=(150, 150, 150), font=font_small)
-
-            # Save
-            output_path = self.output_dir / f"slide_{slide_number:02d}.png"
-            img.save(output_path)
-
-            return output_path
-
-        except Exception as e:
-            print(f"   Could not create placeholder: {e}")
-            return None
+        return PlaceholderGenerator(str(self.output_dir)).generate(slide_number, slide_title, slide_type)
 
     def get_generation_stats(self) -> dict:
         """Get statistics about generated images"""
@@ -0,0 +1,124 @@
+"""
+Image Ingest
+Normalizes slide images once (exact pixel size, watermark crop, compact encoding), cached by source hash
+"""
+
+import hashlib
+import io
+import json
+from pathlib import Path
+from typing import Tuple
+
+from deck_parser import file_hash
+from image_cache import ImageCache
+import metrics
+
+
+DEFAULT_CACHE_DIR = "_projects/.ingest_cache"
+DEFAULT_MAX_MB = 1024
+
+# Pixels per inch of slide: a 16" wide slide becomes 1920 px, the video width
+INGEST_DPI = 120
+EMU_PER_INCH = 914400
+
+# Bump when the processing below changes, so cached results are redone
+INGEST_VERSION = 1
+
+
+def emu_to_pixels(emu: int, dpi: int = INGEST_DPI) -> int:
+    """Pixel size of a slide length (EMU) at the ingest resolution"""
+    return max(1, round(emu * dpi / EMU_PER_INCH))
+
+
+class ImageIngest:
+    """
+    Prepares images for embedding in a deck
+
+    Each source image is processed once per target geometry: the bottom
+    `crop_bottom` fraction is cut off (watermarks), the image is scaled to
+    the exact pixel size of the box it fills ('cover': fill and center-crop,
+    'contain': fit inside, aspect kept) and encoded as optimized JPEG, or
+    PNG if it has transparency. Results are kept in an ImageCache keyed by
+    the source's content hash and the parameters, so a rebuild re-uses them
+    and decks no longer carry full-resolution originals.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_mb: float = DEFAULT_MAX_MB,
+                 jpeg_quality: int = 85):
+        """
+        Args:
+            cache_dir: Where processed images are kept
+            max_mb: Cache size bound (least recently used evicted)
+            jpeg_quality: JPEG quality for opaque images
+        """
+        self.cache = ImageCache(cache_dir, max_mb)
+        self.jpeg_quality = jpeg_quality
+
+    def ingest(self, source, width: int, height: int, fit: str = 'cover',
+               crop_bottom: float = 0.0) -> Path:
+        """
+        Processed version of an image
+
+        Args:
+            source: Image file
+            width, height: Target box in pixels
+            fit: 'cover' (exactly width x height) or 'contain' (within it)
+            crop_bottom: Fraction of the height removed at the bottom first
+
+        Returns:
+            Path of the processed image (inside the cache)
+        """
+        params = {'width': width, 'height': height, 'fit': fit, 'crop_bottom': crop_bottom,
+                  'quality': self.jpeg_quality, 'version': INGEST_VERSION}
+        key = hashlib.sha256(json.dumps({'source': file_hash(str(source)), **params},
+                                        sort_keys=True).encode('utf-8')).hexdigest()
+
+        cached = self.cache.get(key)
+        metrics.cache_lookup('image_ingest', cached is not None)
+        if cached is not None:
+            return cached
+
+        data, extension = self._process(Path(source), width, height, fit, crop_bottom)
+        return self.cache.put(key, data, extension)
+
+    def ingest_for_box(self, source, box_width_emu: int, box_height_emu: int, fit: str = 'cover',
+                       crop_bottom: float = 0.0) -> Path:
+        """ingest() for a slide box given in EMU (e.g. slide or picture size)"""
+        return self.ingest(source, emu_to_pixels(box_width_emu), emu_to_pixels(box_height_emu),
+                           fit=fit, crop_bottom=crop_bottom)
+
+    def _process(self, source: Path, width: int, height: int, fit: str,
+                 crop_bottom: float) -> Tuple[bytes, str]:
+        from PIL import Image, ImageOps
+
+        with Image.open(source) as original:
+            image = ImageOps.exif_transpose(original)
+
+            if crop_bottom > 0:
+                image = image.crop((0, 0, image.width, max(1, round(image.height * (1 - crop_bottom)))))
+
+            if image.mode == 'P':
+                image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+            if fit == 'cover':
+                image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+            elif fit == 'contain':
+                image = ImageOps.contain(image, (width, height), Image.LANCZOS)
+            else:
+                raise ValueError(f"Unknown fit: {fit}")
+
+            buffer = io.BytesIO()
+            if self._has_alpha(image):
+                image.save(buffer, format='PNG', optimize=True)
+                return buffer.getvalue(), 'png'
+
+            image.convert('RGB').save(buffer, format='JPEG', quality=self.jpeg_quality,
+                                      optimize=True, progressive=True)
+            return buffer.getvalue(), 'jpg'
+
+    @staticmethod
+    def _has_alpha(image) -> bool:
+        """True if any pixel is not fully opaque"""
+        if image.mode not in ('RGBA', 'LA', 'PA'):
+            return False
+        return image.getchannel('A').getextrema()[0] < 255
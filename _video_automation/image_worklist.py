@@ -0,0 +1,89 @@
+"""
+Image Work List
+Slides of a project still waiting for a real image, kept across runs
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Sequence
+
+from image_cache import normalize_prompt
+
+
+WORKLIST_FILE = ".worklist.json"
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()[:16]
+
+
+class ImageWorkList:
+    """
+    Remaining image work of one project (images/.worklist.json)
+
+    Which slides still need an image follows from the disk (prompt files
+    without a real image); the work list adds what the disk cannot tell:
+    attempts and last error per slide, and prompts the API rejected, which
+    are not sent again until the prompt file changes. Unattended runs
+    (--generate-inventory from cron) pick the remaining slides up from here
+    once quotas reset.
+    """
+
+    def __init__(self, project_dir: Path):
+        self.path = Path(project_dir) / "images" / WORKLIST_FILE
+        self.slides: Dict[int, Dict] = {}
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.slides = {int(n): entry for n, entry in json.load(f).get('slides', {}).items()}
+            except (OSError, ValueError):
+                self.slides = {}
+
+    def is_rejected(self, slide_number: int, prompt: str) -> bool:
+        """True if the API rejected exactly this prompt before"""
+        entry = self.slides.get(slide_number)
+        return bool(entry and entry['status'] == 'rejected' and entry['prompt'] == prompt_hash(prompt))
+
+    def update(self, jobs: Sequence, results: Sequence):
+        """Record the outcome of ImageJobs (done slides leave the list)"""
+        for job, result in zip(jobs, results):
+            if result.success:
+                self.slides.pop(job.slide_number, None)
+                continue
+
+            entry = self.slides.get(job.slide_number, {})
+            self.slides[job.slide_number] = {
+                'title': job.title,
+                'status': 'rejected' if result.prompt_rejected else 'pending',
+                'attempts': entry.get('attempts', 0) + result.attempts,
+                'error': result.message,
+                'prompt': prompt_hash(job.prompt),
+                'updated': datetime.now().isoformat(timespec='seconds')
+            }
+
+    def mark_done(self, slide_number: int):
+        """A real image appeared (e.g. added manually)"""
+        self.slides.pop(slide_number, None)
+
+    def count(self, status: str) -> int:
+        return sum(1 for entry in self.slides.values() if entry['status'] == status)
+
+    def save(self):
+        """Write atomically (removed once nothing is left)"""
+        if not self.slides:
+            if self.path.exists():
+                self.path.unlink()
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'updated': datetime.now().isoformat(timespec='seconds'),
+                'slides': {str(n): entry for n, entry in sorted(self.slides.items())}
+            }, f, indent=2)
+        os.replace(tmp_path, self.path)
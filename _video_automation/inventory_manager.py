@@ -22,6 +22,10 @@ from enum import Enum
 
 
 
+from placeholder_generator import placeholder_files
+
+
+
 
 
 class InventoryStage(Enum):
@@ -278,7 +282,11 @@ class InventoryManager:
 
             images += list(image_dir.glob("slide_*.jpg"))
 
-            project.images_ready = len(images)
+            # Placeholders still need a real image
+
+            placeholders = placeholder_files(image_dir)
+
+            project.images_ready = len([p for p in images if p.name not in placeholders])
 
 
 
@@ -334,7 +342,7 @@ class InventoryManager:
 
         for proj_dir in self.base_dir.iterdir():
 
-            if proj_dir.is_dir() and proj_dir.name != "__pycache__":
+            if proj_dir.is_dir() and proj_dir.name != "__pycache__" and not proj_dir.name.startswith('.'):
 
                 self.scan_project(proj_dir.name, proj_dir)
 
@@ -0,0 +1,261 @@
+"""
+Metrics
+Prometheus-format counters, gauges and histograms for render workers (textfile or HTTP)
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Sequence, Tuple
+
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """Base class: one metric family with optional labels"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.extend(self._render_sample(key, value))
+        return '\n'.join(lines)
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float],
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, {'counts': [0] * len(self.buckets),
+                                                  'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def _render_sample(self, key, state):
+        lines = []
+        for bound, count in zip(self.buckets, state['counts']):
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+class Registry:
+    """Collection of metric families rendered together"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        return '\n'.join(metric.render() for metric in self.metrics.values()) + '\n'
+
+    def write_textfile(self, path: str):
+        """Write for node_exporter's textfile collector (atomic rename)"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+REGISTRY = Registry()
+
+# Narration
+TTS_SENTENCES = REGISTRY.register(Counter(
+    'video_tts_sentences_total', 'Sentences synthesized'))
+TTS_LATENCY = REGISTRY.register(Histogram(
+    'video_tts_latency_seconds', 'Time to synthesize one sentence',
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120)))
+TTS_REAL_TIME_FACTOR = REGISTRY.register(Histogram(
+    'video_tts_real_time_factor', 'Synthesis time / audio duration per sentence (<1 = faster than real time)',
+    buckets=(0.25, 0.5, 1, 2, 3, 5, 8, 13)))
+
+# Rendering and encoding
+SLIDES_RENDERED = REGISTRY.register(Counter(
+    'video_slides_rendered_total', 'Slide images rendered'))
+ENCODE_FPS = REGISTRY.register(Histogram(
+    'video_encode_fps', 'Frames encoded per second of wall time',
+    buckets=(5, 15, 30, 60, 120, 250, 500, 1000), labelnames=('mode',)))
+
+# Caches (audio takes, rendered slides/build nodes)
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    'video_cache_requests_total', 'Cache lookups by cache and result (hit/miss)',
+    labelnames=('cache', 'result')))
+
+# Render queue
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'video_queue_depth', 'Render jobs by state', labelnames=('status',)))
+JOBS_FINISHED = REGISTRY.register(Counter(
+    'video_jobs_finished_total', 'Render jobs finished by this process', labelnames=('status',)))
+
+
+def cache_lookup(cache: str, hit: bool):
+    """Count one cache hit or miss"""
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep worker output clean
+
+
+class MetricsExporter:
+    """Publishes REGISTRY over HTTP and/or to a textfile on an interval"""
+
+    def __init__(self, port: Optional[int] = None, textfile: Optional[str] = None,
+                 interval: float = 15.0, host: str = '127.0.0.1'):
+        """
+        Args:
+            port: Serve http://host:port/metrics (None = no server)
+            textfile: Path rewritten every `interval` seconds (None = no file)
+            interval: Seconds between textfile writes
+            host: Interface for the HTTP server (local only by default)
+        """
+        self.port = port
+        self.textfile = textfile
+        self.interval = interval
+        self.host = host
+        self._server = None
+        self._stop = threading.Event()
+        self._writer = None
+
+    def start(self):
+        if self.port:
+            self._server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+            threading.Thread(target=self._server.serve_forever, daemon=True,
+                             name='metrics-http').start()
+            print(f"[OK] Metrics: http://{self.host}:{self.port}/metrics")
+
+        if self.textfile:
+            self._writer = threading.Thread(target=self._write_loop, daemon=True,
+                                            name='metrics-textfile')
+            self._writer.start()
+            print(f"[OK] Metrics textfile: {self.textfile}")
+
+        return self
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        """Write the textfile now"""
+        if self.textfile:
+            try:
+                REGISTRY.write_textfile(self.textfile)
+            except OSError as e:
+                print(f"[!] Could not write metrics: {e}")
+
+    def stop(self):
+        """Stop publishing (writes the textfile one last time)"""
+        self._stop.set()
+        self.flush()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+_exporter: Optional[MetricsExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(port: Optional[int] = None, textfile: Optional[str] = None) -> Optional[MetricsExporter]:
+    """Start the process-wide exporter once (later calls reuse it)"""
+    global _exporter
+
+    if not port and not textfile:
+        return None
+
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = MetricsExporter(port=port, textfile=textfile).start()
+        return _exporter
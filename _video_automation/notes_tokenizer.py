@@ -0,0 +1,132 @@
+"""
+Notes Tokenizer
+Single-pass scan of speaker notes into narration text and timed markers
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+# One alternation for every marker plus whitespace runs (collapsed while scanning)
+TOKEN_PATTERN = re.compile(
+    r'\[(?:'
+    r'(?P<media>SCREEN|BROLL):(?P<file>[^\]]+)'
+    r'|(?P<focus>HIGHLIGHT|ZOOM):(?P<target>[^\]]+)'
+    r'|PAUSE:(?P<pause>\d+\.?\d*)'
+    r'|(?P<named_speed>SLOW|FAST)'
+    r'|SPEED:(?P<speed>\d+\.?\d*)'
+    r')\]'
+    r'|(?P<space>\s+)',
+    re.IGNORECASE
+)
+
+NAMED_SPEEDS = {'SLOW': 0.85, 'FAST': 1.15}
+
+
+@dataclass
+class NotesTokens:
+    """
+    Tokenized notes
+
+    text: Narration with markers removed and whitespace collapsed
+    tokens: Ordered stream of {'type': 'text', 'text'} spans and markers.
+            Every token has 'position' (offset in text) and markers also
+            'raw_position' (offset in the original notes).
+    """
+    text: str = ""
+    tokens: List[Dict] = field(default_factory=list)
+
+    def markers(self, marker_type: str) -> List[Dict]:
+        """Markers of one type, in order"""
+        return [token for token in self.tokens if token['type'] == marker_type]
+
+
+def tokenize_notes(notes: str) -> NotesTokens:
+    """
+    Split speaker notes into narration text and markers in one pass
+
+    Markers: [SCREEN:file] / [BROLL:file], [PAUSE:seconds], [SLOW], [FAST],
+    [SPEED:factor], [HIGHLIGHT:target], [ZOOM:target]
+
+    Args:
+        notes: Raw speaker notes
+
+    Returns:
+        NotesTokens with cleaned text and the ordered token stream
+    """
+    if not notes:
+        return NotesTokens()
+
+    parts = []
+    length = 0
+    pending_space = False
+    markers = []
+    last = 0
+
+    for match in TOKEN_PATTERN.finditer(notes):
+        if match.start() > last:
+            if pending_space and length:
+                parts.append(' ')
+                length += 1
+            chunk = notes[last:match.start()]
+            parts.append(chunk)
+            length += len(chunk)
+            pending_space = False
+        last = match.end()
+
+        if match.group('space'):
+            pending_space = True
+            continue
+
+        # Marker: anchored where the next narration word will start
+        position = length + (1 if pending_space and length else 0)
+        markers.append(_marker(match, position))
+
+    if last < len(notes):
+        if pending_space and length:
+            parts.append(' ')
+            length += 1
+        parts.append(notes[last:])
+        length += len(notes) - last
+
+    text = ''.join(parts)
+
+    # Interleave text spans with markers
+    tokens = []
+    start = 0
+    for marker in markers:
+        marker['position'] = min(marker['position'], length)
+        if marker['position'] > start:
+            _add_text(tokens, text, start, marker['position'])
+        start = max(start, marker['position'])
+        tokens.append(marker)
+    if start < length:
+        _add_text(tokens, text, start, length)
+
+    return NotesTokens(text=text, tokens=tokens)
+
+
+def _add_text(tokens, text, start, end):
+    span = text[start:end]
+    stripped = span.strip()
+    if stripped:
+        offset = start + (len(span) - len(span.lstrip()))
+        tokens.append({'type': 'text', 'text': stripped, 'position': offset})
+
+
+def _marker(match, position) -> Dict:
+    if match.group('media'):
+        marker = {'type': 'screen', 'file': match.group('file').strip()}
+    elif match.group('focus'):
+        marker = {'type': match.group('focus').lower(), 'target': match.group('target').strip()}
+    elif match.group('pause'):
+        marker = {'type': 'pause', 'duration': float(match.group('pause'))}
+    elif match.group('named_speed'):
+        marker = {'type': 'speed', 'factor': NAMED_SPEEDS[match.group('named_speed').upper()]}
+    else:
+        marker = {'type': 'speed', 'factor': float(match.group('speed'))}
+
+    marker['position'] = position
+    marker['raw_position'] = match.start()
+    return marker
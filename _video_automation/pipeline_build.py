@@ -0,0 +1,462 @@
+"""
+Pipeline Build
+Incremental prompt -> image -> slide -> audio -> video build for one deck
+"""
+
+import sys
+import os
+import argparse
+import threading
+from pathlib import Path
+
+from build_graph import BuildGraph, BuildNode, file_fingerprint
+from audio_manifest import AudioManifest
+from encoding_profiles import PROFILES, get_profile
+import metrics
+
+MODULE_DIR = Path(__file__).parent
+
+TARGET_GROUPS = ['prompts', 'images', 'deck', 'audio', 'video', 'all']
+
+VOICES = {
+    'amit': "_reference_audio/audio_sample.wav",
+    'saanvi': "_reference_audio/Saanvi_Voice_Clone.wav",
+}
+
+
+class DeckBuild:
+    """Per-slide build graph for one presentation"""
+
+    def __init__(self, pptx_path, project_dir, voice='amit', quality='publish',
+                 brand='snowbrix', pause=0.5, min_duration=3.0, transition='fade',
+                 config_path=None, api_keys=None, slide_render='auto'):
+        self.pptx_path = pptx_path
+        self.pres_name = Path(pptx_path).stem
+        self.project_dir = Path(project_dir)
+        # Own work area: video_creator --parallel numbers segments differently
+        self.work_dir = self.project_dir / "build"
+        self.voice_ref = VOICES[voice]
+        self.profile = get_profile(quality)
+        self.brand = brand
+        self.pause = pause
+        self.min_duration = min_duration
+        self.transition = transition
+        self.slide_render = self._resolve_slide_render(slide_render)
+        self.config_path = config_path
+        self.api_keys = api_keys
+
+        self.project_dir.mkdir(parents=True, exist_ok=True)
+        self.graph = BuildGraph(str(self.project_dir / ".build_state.json"))
+
+        self._lock = threading.Lock()
+        self._image_generator = None
+        self._composer = None
+        self._encoder = None
+
+        from deck_parser import load_deck
+        records = load_deck(pptx_path, cache_dir=str(self.project_dir))
+        self.slides = [record.as_design_slide() for record in records]
+        self.narration = {record.number: record.notes for record in records}
+        self._add_nodes()
+
+    # ------------------------------------------------------------------
+    # Graph
+    # ------------------------------------------------------------------
+
+    def _add_nodes(self):
+        """Create prompt/image/render/audio/segment nodes per slide"""
+        from prompt_generator import PromptGenerator
+
+        prompt_gen = PromptGenerator()
+        prompt_dir = self.project_dir / "image_prompts"
+        prompt_dir.mkdir(parents=True, exist_ok=True)
+        generator_hash = file_fingerprint(MODULE_DIR / "prompt_generator.py")
+        composer_hash = file_fingerprint(MODULE_DIR / "video_composer.py")
+        total = len(self.slides)
+
+        for slide in self.slides:
+            n = slide['number']
+            slide_type = prompt_gen.detect_slide_type(slide['title'], slide['content'], n)
+
+            self.graph.add(BuildNode(
+                f"prompt:{n:02d}",
+                action=lambda slide=slide: self._build_prompt(slide, prompt_gen, prompt_dir),
+                inputs=lambda slide=slide: (slide['title'], slide['content'],
+                                            slide['key_points'], generator_hash),
+                outputs=[prompt_dir / f"slide_{n:02d}_{slide_type.value}.txt"]
+            ))
+
+            self.graph.add(BuildNode(
+                f"image:{n:02d}",
+                action=lambda slide=slide: self._build_image(slide, prompt_dir),
+                inputs=lambda n=n: self._image_state(n),
+                deps=[f"prompt:{n:02d}"],
+                resource='image_api'
+            ))
+
+            # Real slides are exported from the redesigned deck, which is rebuilt
+            # as a whole; keying on this slide's part of it (text, image, brand)
+            # keeps the other slides' renders and segments up to date
+            self.graph.add(BuildNode(
+                f"render:{n:02d}",
+                action=lambda slide=slide: self._composer_for_build().render_slide_image(
+                    slide['number'], self._video_slide(slide)),
+                inputs=lambda slide=slide: (slide, self._image_state(slide['number']), self.brand,
+                                            total, self.slide_render, self.profile.resolution,
+                                            composer_hash),
+                deps=[f"image:{n:02d}"],
+                after=['deck'] if self.slide_render != 'draw' else [],
+                outputs=[self._render_path(n)]
+            ))
+
+            self.graph.add(BuildNode(
+                f"audio:{n:02d}",
+                action=lambda slide=slide: self._build_audio(slide, total),
+                inputs=lambda n=n: (self.narration[n], Path(self.voice_ref).name),
+                outputs=[AudioManifest.audio_path_for(str(self.project_dir), n)] if self.narration[n] else [],
+                resource='tts'
+            ))
+
+            segment_deps = [f"render:{n:02d}", f"audio:{n:02d}"]
+            self.graph.add(BuildNode(
+                f"segment:{n:02d}",
+                action=lambda slide=slide: self._build_segment(slide, total),
+                inputs=self._timeline_inputs,
+                deps=segment_deps,
+                outputs=[self._segment_path(2 * n)]
+            ))
+
+            if n < total and self.transition != 'none' and self.pause > 0:
+                self.graph.add(BuildNode(
+                    f"transition:{n:02d}",
+                    action=lambda slide=slide: self._build_transition(slide),
+                    inputs=self._timeline_inputs,
+                    deps=segment_deps + [f"render:{n + 1:02d}"],
+                    outputs=[self._segment_path(2 * n + 1)]
+                ))
+
+        self.graph.add(BuildNode(
+            "deck",
+            action=lambda: self._build_deck(),
+            inputs=lambda: (self.slides, self.brand),
+            deps=self.group('images'),
+            outputs=[self.deck_path()]
+        ))
+
+        self.graph.add(BuildNode(
+            "video",
+            action=lambda: self._build_video(),
+            deps=[n for n in self.graph.nodes if n.startswith(('segment:', 'transition:'))],
+            outputs=[self.video_path()]
+        ))
+
+    def group(self, name):
+        """Node ids for a target group"""
+        prefixes = {
+            'prompts': ('prompt:',),
+            'images': ('image:',),
+            'audio': ('audio:',),
+        }
+        if name == 'deck':
+            return ['deck']
+        if name == 'video':
+            return ['video']
+        if name == 'all':
+            return ['deck', 'video']
+        return [n for n in self.graph.nodes if n.startswith(prefixes[name])]
+
+    def build(self, target='all', jobs=1, dry_run=False):
+        """Bring a target group up to date"""
+        result = self.graph.build(self.group(target), jobs=jobs, dry_run=dry_run)
+
+        if not dry_run:
+            # Up-to-date render/audio nodes are cache hits
+            for status, hit in (('up_to_date', True), ('built', False), ('retry', False)):
+                for node_id in result[status]:
+                    cache = node_id.split(':')[0]
+                    if cache in ('render', 'audio', 'image', 'segment'):
+                        metrics.cache_lookup(cache, hit)
+
+        return result
+
+    # ------------------------------------------------------------------
+    # Node actions
+    # ------------------------------------------------------------------
+
+    def _build_prompt(self, slide, prompt_gen, prompt_dir):
+        from slide_redesigner_v2 import write_prompt_file
+        write_prompt_file(slide, prompt_gen, prompt_dir)
+
+    def _image_state(self, slide_number):
+        """The image file the deck uses for a slide (manual replacements invalidate)"""
+        from placeholder_generator import find_slide_image
+
+        path = find_slide_image(self.project_dir / "images", slide_number, include_placeholders=True)
+        if path is None:
+            return None
+        stat = path.stat()
+        return (path.name, stat.st_size, stat.st_mtime_ns)
+
+    def _build_image(self, slide, prompt_dir):
+        from slide_redesigner_v2 import read_prompt_file
+
+        n = slide['number']
+        prompt_files = sorted(prompt_dir.glob(f"slide_{n:02d}_*.txt"))
+        generator = self._image_generator_for_build()
+        if not prompt_files or generator is None:
+            return False
+
+        _, prompt = read_prompt_file(prompt_files[0])
+        success, image_path, message = generator.generate_image(
+            prompt=prompt,
+            slide_number=n,
+            slide_title=slide['title']
+        )
+        print(f"  [image {n:02d}] {message}")
+
+        # Missing images are retried on the next build; the deck still builds
+        return success
+
+    def _build_deck(self):
+        from slide_redesigner_v2 import create_slides_stage
+        if not create_slides_stage(self.pptx_path, self.project_dir, brand_style=self.brand,
+                                   slides=self.slides):
+            raise RuntimeError("Could not create presentation")
+
+    def _build_audio(self, slide, total):
+        from video_creator import synthesize_slide_audio
+        synthesize_slide_audio(self._video_slide(slide), slide['number'], total,
+                               str(self.project_dir), self.voice_ref,
+                               AudioManifest(str(self.project_dir)))
+
+    def _timeline_inputs(self):
+        return (self.profile, self.pause, self.min_duration, self.transition)
+
+    def _slide_timing(self, slide, total):
+        """(segment duration, transition duration) for one slide"""
+        composer = self._composer_for_build()
+        video_slide = self._video_slide(slide)
+        duration = composer.slide_duration(slide['number'], video_slide,
+                                           self.pause, self.min_duration)
+        overlap = 0
+        if slide['number'] < total:
+            overlap = min(composer.transition_duration(self.pause), duration / 2)
+        return video_slide, duration - overlap, overlap
+
+    def _build_segment(self, slide, total):
+        video_slide, duration, _ = self._slide_timing(slide, total)
+        n = slide['number']
+        self._encoder_for_build().encode_segment({
+            'image': self._render_path(n),
+            'audio': video_slide.get('audio_file'),
+            'duration': duration
+        }, 2 * n)
+
+    def _build_transition(self, slide):
+        from video_composer import TransitionFrames
+
+        n = slide['number']
+        _, _, overlap = self._slide_timing(slide, len(self.slides))
+        if not overlap:
+            self._remove_segment(2 * n + 1)  # no transition now; drop one from an earlier build
+            return
+        self._encoder_for_build().encode_segment({
+            'frame_function': TransitionFrames(self._render_path(n), self._render_path(n + 1),
+                                               self.transition, overlap),
+            'duration': overlap
+        }, 2 * n + 1)
+
+    def _build_video(self):
+        segment_files = []
+        for n in range(1, len(self.slides) + 1):
+            segment_files.append(self._segment_path(2 * n))
+            transition = self._segment_path(2 * n + 1)
+            if f"transition:{n:02d}" not in self.graph.nodes:
+                # --transition none / --pause 0: clips of earlier builds must not be joined
+                self._remove_segment(2 * n + 1)
+            elif os.path.exists(transition):
+                segment_files.append(transition)
+
+        self._encoder_for_build().concat_segments(segment_files, str(self.video_path()))
+        print(f"  [video] {self.video_path()}")
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def deck_path(self):
+        return self.project_dir / f"{self.pres_name}_redesigned.pptx"
+
+    def video_path(self):
+        return self.project_dir / "output" / f"{self.pres_name}.mp4"
+
+    def _render_path(self, slide_number):
+        return str(self.work_dir / "slides_rendered" / f"slide_{slide_number:03d}.png")
+
+    def _segment_path(self, index):
+        return str(self.work_dir / "segments" / f"segment_{index + 1:03d}.mp4")
+
+    def _remove_segment(self, index):
+        path = self._segment_path(index)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _video_slide(self, slide):
+        """Slide dict in the shape VideoComposer expects (narration without markers)"""
+        manifest = AudioManifest(str(self.project_dir))
+        notes = self.narration[slide['number']]
+        return {
+            'slide_number': slide['number'],
+            'title': slide['title'],
+            'content': slide['content'],
+            'notes': notes,
+            'audio_file': manifest.audio_file(slide['number']) if notes else None
+        }
+
+    @staticmethod
+    def _resolve_slide_render(slide_render):
+        """Settle 'auto' once, so the render node keys name the mode actually used"""
+        if slide_render != 'auto':
+            return slide_render
+
+        from slide_export import export_available
+        if export_available():
+            return 'libreoffice'
+        print("   LibreOffice/pdftoppm not found, drawing slide images")
+        return 'draw'
+
+    def _composer_for_build(self):
+        with self._lock:
+            if self._composer is None:
+                from video_composer import VideoComposer
+                self._composer = VideoComposer(
+                    slides=[],
+                    audio_path=None,
+                    profile=self.profile,
+                    transition=self.transition,
+                    project_dir=str(self.project_dir),
+                    presentation=str(self.deck_path()),  # the slides with their images
+                    slide_render=self.slide_render,
+                    work_dir=str(self.work_dir)
+                )
+            return self._composer
+
+    def _encoder_for_build(self):
+        composer = self._composer_for_build()
+        with self._lock:
+            if self._encoder is None:
+                self._encoder = composer.create_segment_encoder()
+            return self._encoder
+
+    def _image_generator_for_build(self):
+        with self._lock:
+            if self._image_generator is None:
+                from config_manager import APIConfig
+                from api_manager import MultiAccountAPIManager
+                from async_image_generator import AsyncImageGenerator
+
+                config = APIConfig(self.config_path)
+                if self.api_keys:
+                    config.add_cli_keys(self.api_keys)
+                if not config.validate():
+                    return None
+
+                api_manager = MultiAccountAPIManager(config.get_google_accounts())
+                self._image_generator = AsyncImageGenerator.from_config(
+                    api_manager, str(self.project_dir / "images"), config.get_image_api())
+            return self._image_generator
+
+
+def print_result(result):
+    """Print build summary"""
+    labels = [
+        ('built', "[OK] Built"),
+        ('stale', "[..] Stale"),
+        ('up_to_date', "[OK] Up to date"),
+        ('retry', "[!]  Retry next build"),
+        ('failed', "[X] Failed"),
+        ('skipped', "[X] Skipped (dependency failed)"),
+    ]
+    for key, label in labels:
+        nodes = result.get(key, [])
+        if nodes:
+            print(f"{label}: {len(nodes)}")
+            if key != 'up_to_date':
+                print(f"   {', '.join(nodes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Incremental build of prompts, images, slides, audio and video",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Build everything that is out of date
+  python pipeline_build.py build presentation.pptx --jobs 4
+
+  # Only narration
+  python pipeline_build.py build presentation.pptx --target audio
+
+  # Show what a build would do
+  python pipeline_build.py status presentation.pptx
+        """
+    )
+
+    parser.add_argument('command', choices=['build', 'status'])
+    parser.add_argument('presentation', help='PowerPoint file (.pptx)')
+    parser.add_argument('--target', choices=TARGET_GROUPS, default='all',
+                       help='What to bring up to date (default: all)')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                       help='Nodes to run concurrently (default: CPU count)')
+    parser.add_argument('--voice', '-v', choices=sorted(VOICES), default='amit')
+    parser.add_argument('--quality', '-q', choices=sorted(PROFILES), default='publish')
+    parser.add_argument('--brand', default='snowbrix')
+    parser.add_argument('--transition', choices=['none', 'fade', 'slide', 'wipe'], default='fade')
+    parser.add_argument('--slide-render', choices=['auto', 'libreoffice', 'draw'], default='auto',
+                       help='Slide images: real slides exported with LibreOffice, a drawn '
+                            'title/bullets layout, or auto (LibreOffice when installed)')
+    parser.add_argument('--pause', type=float, default=0.5)
+    parser.add_argument('--min-duration', type=float, default=3.0)
+    parser.add_argument('--api-keys', help='Comma-separated API keys')
+    parser.add_argument('--config', help='Path to api_keys.json config file')
+    parser.add_argument('--project-dir',
+                       help='Project directory (default: _projects/[name])')
+    parser.add_argument('--metrics-file', metavar='PATH',
+                       help='Write Prometheus metrics (cache hit rates etc.) to a textfile')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.presentation):
+        print(f"ERROR: File not found: {args.presentation}")
+        return 1
+
+    pres_name = Path(args.presentation).stem
+    project_dir = Path(args.project_dir) if args.project_dir else Path(f"_projects/{pres_name}")
+
+    deck = DeckBuild(
+        args.presentation, project_dir,
+        voice=args.voice, quality=args.quality, brand=args.brand,
+        pause=args.pause, min_duration=args.min_duration, transition=args.transition,
+        config_path=args.config, api_keys=args.api_keys, slide_render=args.slide_render
+    )
+
+    print("=" * 70)
+    print(f"PIPELINE {args.command.upper()}: {pres_name} ({args.target})")
+    print("=" * 70)
+
+    result = deck.build(args.target, jobs=args.jobs, dry_run=(args.command == 'status'))
+    print()
+    print_result(result)
+
+    if args.command == 'build':
+        from inventory_manager import InventoryManager
+        InventoryManager().scan_project(pres_name, project_dir)
+
+        if args.metrics_file:
+            metrics.REGISTRY.write_textfile(args.metrics_file)
+
+    return 1 if result.get('failed') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
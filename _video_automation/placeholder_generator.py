@@ -0,0 +1,227 @@
+"""
+Placeholder Generator
+Stand-in slide images for a whole deck, drawn in parallel from one base canvas per slide type
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+
+PLACEHOLDER_MANIFEST = ".placeholders.json"
+
+BACKGROUND = (26, 35, 46)
+TITLE_COLOR = (255, 255, 255)
+ACCENT_COLOR = (41, 179, 209)
+INFO_COLOR = (150, 150, 150)
+
+FONT_FILES = ("arial.ttf", "DejaVuSans.ttf", "LiberationSans-Regular.ttf")
+
+
+@lru_cache(maxsize=None)
+def _font(size: int):
+    """First available TrueType font at this size (loaded once per process)"""
+    from PIL import ImageFont
+
+    for name in FONT_FILES:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def _stamp(path: Path) -> Dict:
+    """What identifies a file as unchanged (size and modification time)"""
+    stat = path.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def load_placeholders(image_dir: Path) -> Dict[int, Dict]:
+    """Slide number -> {file, size, mtime_ns} of every placeholder written to an image folder"""
+    path = Path(image_dir) / PLACEHOLDER_MANIFEST
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Manifests written before stamps were recorded list only the file name
+    return {int(number): entry if isinstance(entry, dict) else {'file': entry}
+            for number, entry in entries.items()}
+
+
+def save_placeholders(image_dir: Path, placeholders: Dict[int, Dict]):
+    """Write the placeholder manifest atomically (removed when empty)"""
+    path = Path(image_dir) / PLACEHOLDER_MANIFEST
+    if not placeholders:
+        if path.exists():
+            path.unlink()
+        return
+
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({str(n): entry for n, entry in sorted(placeholders.items())}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_placeholder(path: Path, entry: Optional[Dict]) -> bool:
+    """True if `path` is still the placeholder recorded in `entry` (not replaced by hand)"""
+    if not entry or Path(path).name != entry['file'] or not Path(path).exists():
+        return False
+    if 'size' not in entry:
+        return True  # old manifest: nothing to compare against
+    return _stamp(Path(path)) == {'size': entry['size'], 'mtime_ns': entry['mtime_ns']}
+
+
+def placeholder_files(image_dir: Path) -> Set[str]:
+    """Names of the files in an image folder that are still unchanged placeholders"""
+    image_dir = Path(image_dir)
+    return {entry['file'] for entry in load_placeholders(image_dir).values()
+            if is_placeholder(image_dir / entry['file'], entry)}
+
+
+def find_slide_image(image_dir: Path, slide_number: int,
+                     include_placeholders: bool = False) -> Optional[Path]:
+    """
+    A slide's image in a project image folder
+
+    Args:
+        image_dir: Project image folder (slide_NN.png/jpg/jpeg)
+        slide_number: Slide number
+        include_placeholders: Fall back to the slide's placeholder
+
+    Returns:
+        Manual or generated image (preferred), else the placeholder if
+        allowed, else None
+    """
+    image_dir = Path(image_dir)
+    entry = load_placeholders(image_dir).get(slide_number)
+    placeholder = None
+
+    for fmt in ['png', 'jpg', 'jpeg']:
+        image_path = image_dir / f"slide_{slide_number:02d}.{fmt}"
+        if not image_path.exists():
+            continue
+        if is_placeholder(image_path, entry):
+            placeholder = image_path
+            continue
+        return image_path
+
+    return placeholder if include_placeholders else None
+
+
+def clear_placeholders(image_dir: Path, images: Dict[int, Path]):
+    """
+    Forget placeholders that real images have replaced
+
+    Args:
+        image_dir: Project image folder
+        images: Slide number -> real image path
+    """
+    placeholders = load_placeholders(image_dir)
+    replaced = [n for n in images if n in placeholders]
+    if not replaced:
+        return
+
+    for number in replaced:
+        entry = placeholders.pop(number)
+        stale = Path(image_dir) / entry['file']
+        if stale != Path(images[number]) and is_placeholder(stale, entry):
+            stale.unlink()  # e.g. placeholder .png next to a generated .jpg
+    save_placeholders(image_dir, placeholders)
+
+
+class PlaceholderGenerator:
+    """
+    Placeholder images for slides without a real one
+
+    Everything that does not depend on the slide (background, type label,
+    hint text, fonts) is rendered once per slide type; each slide only
+    copies its base canvas and draws the title. Slides are written by a
+    thread pool and listed in images/.placeholders.json, so the image
+    stage still generates them when quota allows.
+    """
+
+    def __init__(self, output_dir: str, width: int = 1920, height: int = 1080,
+                 workers: Optional[int] = None):
+        """
+        Args:
+            output_dir: Project image folder (slide_NN.png)
+            width, height: Image size in pixels
+            workers: Images drawn concurrently (default: CPU count)
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.width = width
+        self.height = height
+        self.workers = workers or os.cpu_count() or 1
+
+        self._bases: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _base(self, slide_type: str):
+        """Pre-rendered canvas for one slide type"""
+        with self._lock:
+            base = self._bases.get(slide_type)
+            if base is None:
+                from PIL import Image, ImageDraw
+
+                base = Image.new('RGB', (self.width, self.height), color=BACKGROUND)
+                draw = ImageDraw.Draw(base)
+                draw.text((100, 500), f"[{slide_type.upper()} IMAGE]", fill=ACCENT_COLOR, font=_font(30))
+                draw.text((100, 600), "Generate manually or run with API", fill=INFO_COLOR, font=_font(30))
+                self._bases[slide_type] = base
+            return base
+
+    def _draw(self, slide_number: int, slide_title: str, slide_type: str) -> Path:
+        from PIL import ImageDraw
+
+        image = self._base(slide_type).copy()
+        ImageDraw.Draw(image).text((100, 400), slide_title[:50], fill=TITLE_COLOR, font=_font(60))
+
+        path = self.output_dir / f"slide_{slide_number:02d}.png"
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        image.save(tmp_path, format='PNG', compress_level=1)  # flat image: fast level is small enough
+        os.replace(tmp_path, path)
+        return path
+
+    def generate(self, slide_number: int, slide_title: str, slide_type: str) -> Optional[Path]:
+        """Single placeholder (same contract as ImageGenerator.generate_placeholder)"""
+        return self.generate_many([(slide_number, slide_title, slide_type)])[0]
+
+    def generate_many(self, slides: Sequence[Tuple[int, str, str]]) -> List[Optional[Path]]:
+        """
+        Draw placeholders for many slides
+
+        Args:
+            slides: (slide number, title, slide type) per slide
+
+        Returns:
+            Path per slide in input order (None where drawing failed)
+        """
+        if not slides:
+            return []
+
+        def draw(slide):
+            try:
+                return self._draw(*slide)
+            except Exception as e:
+                print(f"   Could not create placeholder for slide {slide[0]:02d}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(slides))) as pool:
+            paths = list(pool.map(draw, slides))
+
+        placeholders = load_placeholders(self.output_dir)
+        for (number, _, _), path in zip(slides, paths):
+            if path:
+                placeholders[number] = {'file': path.name, **_stamp(path)}
+        save_placeholders(self.output_dir, placeholders)
+
+        return paths
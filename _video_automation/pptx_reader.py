@@ -0,0 +1,246 @@
+"""
+PPTX Stream Reader
+Reads slide text, speaker notes and shape geometry straight from the package XML, never touching media
+"""
+
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+NS_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+NS_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+NS_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+REL_NOTES_SLIDE = '/notesSlide'
+REL_SLIDE_LAYOUT = '/slideLayout'
+REL_SLIDE_MASTER = '/slideMaster'
+TITLE_TYPES = ('title', 'ctrTitle')
+SHAPE_KINDS = {NS_P + 'sp': 'shape', NS_P + 'pic': 'picture'}
+GEOMETRY = ('x', 'y', 'cx', 'cy')
+
+# Master placeholder a layout placeholder inherits from (as python-pptx); others: 'body'
+MASTER_PLACEHOLDER = {'title': 'title', 'ctrTitle': 'title', 'dt': 'dt', 'ftr': 'ftr',
+                      'sldNum': 'sldNum'}
+
+
+class SlideContent(NamedTuple):
+    """What the reader extracts from one slide"""
+    number: int
+    title: str            # Title placeholder text ('' if none)
+    texts: List[str]      # Non-empty text of every text shape, in z-order
+    notes: str
+    shapes: List[Dict]    # Geometry of every top-level shape and picture
+
+
+class PptxStreamReader:
+    """
+    Minimal .pptx reader built on zipfile + iterparse
+
+    Only presentation.xml, the slide parts and their notes parts are
+    decompressed; images, video and fonts stay untouched in the archive
+    (pictures are recorded by part name, see read_media). Text extraction
+    mirrors python-pptx: top-level text shapes in z-order (group contents
+    and tables are skipped), paragraphs joined by newlines. Placeholders
+    without their own position inherit it from the layout placeholder with
+    the same idx, and that one from the master, as python-pptx does; layout
+    and master parts are read once per deck, and only when needed.
+    """
+
+    def __init__(self, pptx_path: str):
+        self.pptx_path = pptx_path
+        self.slide_size: Optional[Tuple[int, int]] = None  # EMU, set by iter_slides
+
+    def iter_slides(self, limit: Optional[int] = None) -> Iterator[SlideContent]:
+        """
+        Yield the content of each slide in presentation order
+
+        Args:
+            limit: Stop after this many slides (None = all)
+        """
+        with zipfile.ZipFile(self.pptx_path) as package:
+            slide_parts, self.slide_size = self._presentation(package)
+            layouts = {}
+
+            for number, slide_part in enumerate(slide_parts, 1):
+                if limit and number > limit:
+                    return
+
+                rels = self._relationships(package, slide_part)
+                title = ""
+                texts = []
+                shapes = []
+                for shape in self._shapes(package, slide_part, rels):
+                    idx = shape.pop('idx', None)
+                    if idx is not None and None in (shape[key] for key in GEOMETRY):
+                        layout = self._layout_placeholders(package, rels, layouts)
+                        _inherit(shape, layout.get(idx))
+                    shapes.append(shape)
+                    text = shape.get('text')
+                    if not text:
+                        continue
+                    texts.append(text)
+                    if not title and shape['placeholder'] in TITLE_TYPES:
+                        title = text
+
+                yield SlideContent(number, title, texts, self._notes(package, rels), shapes)
+
+    def _layout_placeholders(self, package: zipfile.ZipFile, slide_rels: Dict[str, Tuple[str, str]],
+                             layouts: Dict[str, Dict[int, Dict]]) -> Dict[int, Dict]:
+        """Placeholder idx -> shape of the slide's layout, geometry completed from the master"""
+        layout_part = next((target for target, rel_type in slide_rels.values()
+                            if rel_type.endswith(REL_SLIDE_LAYOUT)), None)
+        if layout_part is None:
+            return {}
+        if layout_part in layouts:
+            return layouts[layout_part]
+
+        master = {}
+        for target, rel_type in self._relationships(package, layout_part).values():
+            if rel_type.endswith(REL_SLIDE_MASTER):
+                for shape in self._shapes(package, target):
+                    if shape['placeholder']:
+                        master.setdefault(shape['placeholder'], shape)
+
+        placeholders = {}
+        for shape in self._shapes(package, layout_part):
+            idx = shape.pop('idx', None)
+            if idx is None:
+                continue
+            _inherit(shape, master.get(MASTER_PLACEHOLDER.get(shape['placeholder'], 'body')))
+            placeholders.setdefault(idx, shape)
+
+        layouts[layout_part] = placeholders
+        return placeholders
+
+    def _presentation(self, package: zipfile.ZipFile) -> Tuple[List[str], Optional[Tuple[int, int]]]:
+        """Slide part names in presentation order and the slide size (EMU)"""
+        rels = self._relationships(package, 'ppt/presentation.xml')
+
+        slide_ids = []
+        size = None
+        with package.open('ppt/presentation.xml') as stream:
+            for _, elem in ET.iterparse(stream):
+                if elem.tag == NS_P + 'sldId':
+                    slide_ids.append(elem.get(NS_R + 'id'))
+                elif elem.tag == NS_P + 'sldSz':
+                    size = (int(elem.get('cx')), int(elem.get('cy')))
+                    break  # nothing after the slide size is needed
+
+        return [rels[rel_id][0] for rel_id in slide_ids if rel_id in rels], size
+
+    def _relationships(self, package: zipfile.ZipFile, part: str) -> Dict[str, Tuple[str, str]]:
+        """Map rId -> (resolved part name, relationship type) for a part"""
+        folder, name = posixpath.split(part)
+        rels_part = posixpath.join(folder, '_rels', name + '.rels')
+
+        rels = {}
+        try:
+            stream = package.open(rels_part)
+        except KeyError:
+            return rels
+
+        with stream:
+            for _, elem in ET.iterparse(stream):
+                if elem.tag == NS_REL + 'Relationship' and elem.get('TargetMode') != 'External':
+                    target = posixpath.normpath(posixpath.join(folder, elem.get('Target')))
+                    rels[elem.get('Id')] = (target.lstrip('/'), elem.get('Type', ''))
+
+        return rels
+
+    def _notes(self, package: zipfile.ZipFile, slide_rels: Dict[str, Tuple[str, str]]) -> str:
+        """Text of the notes body placeholder ('' if the slide has no notes)"""
+        for target, rel_type in slide_rels.values():
+            if rel_type.endswith(REL_NOTES_SLIDE):
+                for shape in self._shapes(package, target):
+                    if shape['placeholder'] == 'body' and 'text' in shape:
+                        return shape['text']
+        return ""
+
+    def _shapes(self, package: zipfile.ZipFile, part: str,
+                rels: Optional[Dict[str, Tuple[str, str]]] = None) -> Iterator[Dict]:
+        """
+        Yield one dict per top-level shape (p:sp) and picture (p:pic)
+
+        Keys: kind ('shape'/'picture'), name, placeholder (type or None),
+        x, y, cx, cy (EMU; None when the shape has no position of its own),
+        plus 'idx' for placeholders, 'text' for shapes with a text body and
+        'image' (media part name) for pictures.
+        """
+        with package.open(part) as stream:
+            stack = []
+            tree_depth = None
+            shape = None
+            paragraphs = None
+            paragraph = None
+
+            for event, elem in ET.iterparse(stream, events=('start', 'end')):
+                tag = elem.tag
+
+                if event == 'start':
+                    stack.append(tag)
+                    if tag == NS_P + 'spTree' and tree_depth is None:
+                        tree_depth = len(stack)
+                    elif tag in SHAPE_KINDS and tree_depth and len(stack) == tree_depth + 1:
+                        shape = {'kind': SHAPE_KINDS[tag], 'name': '', 'placeholder': None,
+                                 'x': None, 'y': None, 'cx': None, 'cy': None}
+                        paragraphs = None
+                    elif shape is not None:
+                        if tag == NS_P + 'cNvPr' and not shape['name']:
+                            shape['name'] = elem.get('name', '')
+                        elif tag == NS_P + 'ph':
+                            shape['placeholder'] = elem.get('type', 'obj')
+                            shape['idx'] = int(elem.get('idx', 0))
+                        elif stack[-2] == NS_A + 'xfrm' and len(stack) == tree_depth + 4:
+                            # p:sp/p:spPr/a:xfrm/(a:off|a:ext) of this shape only
+                            if tag == NS_A + 'off':
+                                shape['x'], shape['y'] = int(elem.get('x')), int(elem.get('y'))
+                            elif tag == NS_A + 'ext':
+                                shape['cx'], shape['cy'] = int(elem.get('cx')), int(elem.get('cy'))
+                        elif tag == NS_A + 'blip' and rels is not None and 'image' not in shape:
+                            target = rels.get(elem.get(NS_R + 'embed'))
+                            if target:
+                                shape['image'] = target[0]
+                        elif tag == NS_P + 'txBody':
+                            paragraphs = []
+                        elif tag == NS_A + 'p' and paragraphs is not None:
+                            paragraph = []
+                        elif tag == NS_A + 'br' and paragraph is not None:
+                            paragraph.append('\n')
+                    continue
+
+                stack.pop()
+                if tag == NS_P + 'spTree' and len(stack) + 1 == tree_depth:
+                    return
+
+                if shape is not None:
+                    if tag == NS_A + 't' and paragraph is not None:
+                        paragraph.append(elem.text or '')
+                    elif tag == NS_A + 'p' and paragraph is not None:
+                        paragraphs.append(''.join(paragraph))
+                        paragraph = None
+                    elif tag in SHAPE_KINDS and len(stack) == tree_depth:
+                        if paragraphs is not None:
+                            shape['text'] = '\n'.join(paragraphs).strip()
+                        yield shape
+                        shape = None
+
+                # Drop each finished top-level shape (groups, tables too)
+                if tree_depth and len(stack) == tree_depth:
+                    elem.clear()
+
+
+def _inherit(shape: Dict, base: Optional[Dict]):
+    """Fill the position values a placeholder does not set from the one it inherits from"""
+    if base:
+        for key in GEOMETRY:
+            if shape[key] is None:
+                shape[key] = base[key]
+
+
+def read_media(pptx_path: str, part: str) -> bytes:
+    """Bytes of one package part (e.g. a picture's 'image' from the shape list)"""
+    with zipfile.ZipFile(pptx_path) as package:
+        return package.read(part)
@@ -0,0 +1,143 @@
+"""
+Profiling
+cProfile, sampled flamegraph stacks and torch profiler traces for selected stages
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+
+
+class StackSampler:
+    """
+    Samples every thread's Python stack on an interval
+
+    Writes the collapsed-stack format used by flamegraph.pl, speedscope and
+    py-spy ("thread;outer;...;inner count" per line). Unlike cProfile it sees
+    all threads (pipeline producers, encoder pool).
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name='stack-sampler')
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def write(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def torch_profile(output_path: str):
+    """Torch profiler Chrome trace of the block (no-op without torch)"""
+    try:
+        import torch
+        from torch.profiler import ProfilerActivity, profile
+    except ImportError:
+        yield None
+        return
+
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+
+    with profile(activities=activities, record_shapes=True) as prof:
+        yield prof
+
+    try:
+        prof.export_chrome_trace(output_path)
+        print(f"   Torch trace: {output_path}")
+    except Exception as e:
+        print(f"   Warning: Could not write torch trace: {e}")
+
+
+class StageProfiler:
+    """Profiles the stages selected on the command line"""
+
+    def __init__(self, selected: Optional[str], output_dir: str, top: int = 40):
+        """
+        Args:
+            selected: Stage name, 'all', or None (profiling off)
+            output_dir: Directory for .prof, _stats.txt, .collapsed and torch traces
+            top: Functions listed in the text report
+        """
+        self.selected = selected
+        self.output_dir = output_dir
+        self.top = top
+
+    def enabled(self, stage: str) -> bool:
+        return self.selected is not None and self.selected in ('all', stage)
+
+    def stage(self, stage: str, torch_trace: bool = False):
+        """Context manager profiling `stage` if selected (else a no-op)"""
+        if not self.enabled(stage):
+            return nullcontext()
+        return self._profile(stage, torch_trace)
+
+    @contextmanager
+    def _profile(self, stage: str, torch_trace: bool):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"{stage}_{time.strftime('%Y%m%d_%H%M%S')}")
+
+        sampler = StackSampler()
+        profiler = cProfile.Profile()
+        torch_context = torch_profile(f"{base}_torch.json") if torch_trace else nullcontext()
+
+        sampler.start()
+        try:
+            with torch_context:
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+        finally:
+            sampler.stop()
+            self._write(stage, base, profiler, sampler)
+
+    def _write(self, stage, base, profiler, sampler):
+        profiler.dump_stats(f"{base}.prof")
+        sampler.write(f"{base}.collapsed")
+
+        report = io.StringIO()
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats('cumulative').print_stats(self.top)
+        with open(f"{base}_stats.txt", 'w', encoding='utf-8') as f:
+            f.write(report.getvalue())
+
+        print(f"\n   Profile ({stage}): {base}.prof")
+        print(f"   Hot spots: {base}_stats.txt")
+        print(f"   Flamegraph stacks: {base}.collapsed (flamegraph.pl / speedscope)")
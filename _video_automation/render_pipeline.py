@@ -0,0 +1,142 @@
+"""
+Render Pipeline
+Overlaps narration synthesis, slide rendering and segment encoding
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import bind
+from video_composer import TransitionFrames
+
+
+_DONE = object()
+
+
+class RenderPipeline:
+    """
+    Producer/consumer orchestrator for one deck
+
+    - TTS thread synthesizes slide audio in order (one model, one thread)
+    - Render thread draws slide images, at most `lookahead` slides ahead
+    - Encoder pool starts slide k's segment as soon as its audio and image exist
+    Segments are joined by stream copy once the last one finishes.
+    """
+
+    def __init__(self, composer, synthesize, lookahead=2):
+        """
+        Initialize pipeline
+
+        Args:
+            composer: VideoComposer (slides, profile, rendering, encoder)
+            synthesize: Callable(slide_number, slide) -> audio path or None
+            lookahead: Max slides rendered/synthesized but not yet encoding
+        """
+        self.composer = composer
+        self.synthesize = synthesize
+        self.lookahead = max(1, lookahead)
+
+    def run(self, output_file, pause_duration=0.5, min_slide_duration=3.0):
+        """
+        Build the video
+
+        Returns:
+            Path to created video
+        """
+        slides = self.composer.slides
+        total = len(slides)
+        encoder = self.composer.create_segment_encoder()
+        transition = self.composer.transition_duration(pause_duration)
+        self.composer.prepare_slide_images()
+
+        # Bounded hand-off between producers and the dispatcher
+        events = queue.Queue(maxsize=2 * self.lookahead)
+        audio_slots = threading.Semaphore(self.lookahead)
+        image_slots = threading.Semaphore(self.lookahead)
+        stop = threading.Event()
+
+        def producer(kind, work, slots):
+            try:
+                for i, slide in enumerate(slides, 1):
+                    slots.acquire()
+                    if stop.is_set():
+                        return
+                    events.put((kind, i, work(i, slide)))
+                events.put((kind, None, _DONE))
+            except Exception as e:
+                events.put(('error', None, e))
+
+        producers = [
+            threading.Thread(target=bind(producer), daemon=True,
+                             args=('audio', self.synthesize, audio_slots)),
+            threading.Thread(target=bind(producer), daemon=True,
+                             args=('image', self.composer.render_slide_image, image_slots)),
+        ]
+        for thread in producers:
+            thread.start()
+
+        audio = {}
+        images = {}
+        overlaps = {}
+        futures = {}
+        finished = set()
+
+        print(f"      Pipelining {total} slides ({encoder.workers} encoders)...")
+
+        encode = bind(encoder.encode_segment)
+        with ThreadPoolExecutor(max_workers=encoder.workers) as pool:
+            try:
+                while len(finished) < 2:
+                    kind, i, value = events.get()
+
+                    if kind == 'error':
+                        raise value
+                    if value is _DONE:
+                        finished.add(kind)
+                        continue
+
+                    (audio if kind == 'audio' else images)[i] = value
+
+                    # Slide segment: needs its own audio and image
+                    if i in audio and i in images and 2 * i not in futures:
+                        slide = slides[i - 1]
+                        slide['audio_file'] = audio[i]
+                        duration = self.composer.slide_duration(
+                            i, slide, pause_duration, min_slide_duration)
+                        overlaps[i] = min(transition, duration / 2) if i < total else 0
+
+                        segment = {'image': images[i], 'audio': audio[i],
+                                   'duration': duration - overlaps[i]}
+                        futures[2 * i] = pool.submit(encode, segment, 2 * i)
+
+                        audio_slots.release()
+                        image_slots.release()
+
+                    # Transition k -> k+1: needs both images and slide k's timing
+                    for k in (i - 1, i):
+                        if (overlaps.get(k) and k + 1 in images
+                                and 2 * k + 1 not in futures):
+                            segment = {
+                                'frame_function': TransitionFrames(
+                                    images[k], images[k + 1],
+                                    self.composer.transition, overlaps[k]),
+                                'duration': overlaps[k]
+                            }
+                            futures[2 * k + 1] = pool.submit(encode, segment, 2 * k + 1)
+
+                segment_files = [futures[n].result() for n in sorted(futures)]
+                print(f"      Encoded {len(segment_files)} segments")
+
+            except BaseException:
+                stop.set()
+                audio_slots.release()
+                image_slots.release()
+                for future in futures.values():
+                    future.cancel()
+                raise
+
+        print("      Joining segments (stream copy)...")
+        encoder.concat_segments(segment_files, output_file)
+
+        return output_file
@@ -0,0 +1,584 @@
+"""
+Render Queue
+SQLite-backed local job queue with long-lived render workers
+"""
+
+import _thread
+import argparse
+import contextlib
+import json
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import metrics
+import video_creator
+
+
+DEFAULT_QUEUE = "_projects/render_queue.db"
+LOG_DIR = "_projects/.queue_logs"  # hidden: not a project to the inventory scan
+
+# Lower runs first: previews and drafts before publish renders
+PRIORITY_PREVIEW = 0
+PRIORITY_REVIEW = 1
+PRIORITY_PUBLISH = 2
+
+HEARTBEAT_INTERVAL = 10  # seconds between worker heartbeats
+STALE_AFTER = 60         # running jobs without a heartbeat this long are requeued
+
+
+def default_priority(deck_args: List[str]) -> int:
+    """Priority implied by a job's video_creator options"""
+    args = video_creator.build_parser().parse_args(deck_args)
+    quality = args.quality or ('draft' if args.preview else 'publish')
+    if args.preview or quality == 'draft':
+        return PRIORITY_PREVIEW
+    if quality == 'review':
+        return PRIORITY_REVIEW
+    return PRIORITY_PUBLISH
+
+
+class RenderQueue:
+    """Job table in a SQLite file shared by the CLI and every worker"""
+
+    def __init__(self, db_path: str = DEFAULT_QUEUE):
+        self.db_path = os.path.abspath(db_path)  # workers change directory per job
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    presentation TEXT NOT NULL,
+                    args TEXT NOT NULL,
+                    cwd TEXT,
+                    priority INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    submitted_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    heartbeat REAL,
+                    worker TEXT,
+                    exit_code INTEGER,
+                    video TEXT,
+                    log_file TEXT,
+                    error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_pending "
+                         "ON jobs (status, priority, id)")
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'cwd' not in columns:  # queue created before jobs kept their directory
+                conn.execute("ALTER TABLE jobs ADD COLUMN cwd TEXT")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Write transaction holding the database lock from the start"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def submit(self, presentation: str, deck_args: List[str],
+               priority: Optional[int] = None) -> int:
+        """
+        Add a render job
+
+        The job runs in the submitter's working directory, so relative
+        options (--output, --project-dir, ...) mean what they would on
+        the command line.
+
+        Args:
+            presentation: Path to .pptx file
+            deck_args: video_creator options for this deck
+            priority: Explicit priority (None = from --preview/--quality)
+
+        Returns:
+            Job id
+        """
+        presentation = os.path.abspath(presentation)
+        if priority is None:
+            priority = default_priority([presentation] + deck_args)
+
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (presentation, args, cwd, priority, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (presentation, json.dumps(deck_args), os.getcwd(), priority,
+                 datetime.now().isoformat()))
+            return cursor.lastrowid
+
+    def claim(self, worker: str) -> Optional[Dict]:
+        """Atomically take the highest-priority queued job"""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' "
+                "ORDER BY priority, id LIMIT 1").fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, "
+                "heartbeat = ? WHERE id = ?",
+                (worker, datetime.now().isoformat(), time.time(), row['id']))
+            return dict(row)
+
+    def heartbeat(self, job_id: int) -> bool:
+        """Mark a running job alive; returns True if cancellation was requested"""
+        with self._transaction() as conn:
+            conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time(), job_id))
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?",
+                               (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+
+    def finish(self, job_id: int, status: str, exit_code: Optional[int] = None,
+               video: Optional[str] = None, log_file: Optional[str] = None,
+               error: Optional[str] = None):
+        """Record a job's outcome"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, exit_code = ?, video = ?, "
+                "log_file = COALESCE(?, log_file), error = ? WHERE id = ?",
+                (status, datetime.now().isoformat(), exit_code, video, log_file, error, job_id))
+
+    def set_log_file(self, job_id: int, log_file: str):
+        """Record where a job's output is written (visible while it runs)"""
+        with self._transaction() as conn:
+            conn.execute("UPDATE jobs SET log_file = ? WHERE id = ?", (log_file, job_id))
+
+    def cancel(self, job_id: int) -> str:
+        """
+        Cancel a job
+
+        Queued jobs are cancelled immediately; running jobs are interrupted by
+        their worker at its next heartbeat.
+
+        Returns:
+            Resulting state ('cancelled', 'cancelling', or current status)
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"Unknown job: {job_id}")
+
+            if row['status'] == 'queued':
+                conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? "
+                             "WHERE id = ?", (datetime.now().isoformat(), job_id))
+                return 'cancelled'
+            if row['status'] == 'running':
+                conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+                return 'cancelling'
+            return row['status']
+
+    def requeue_stale(self) -> int:
+        """Return jobs whose worker stopped sending heartbeats to the queue"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, started_at = NULL "
+                "WHERE status = 'running' AND cancel_requested = 0 AND heartbeat < ?",
+                (time.time() - STALE_AFTER,))
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? "
+                "WHERE status = 'running' AND cancel_requested = 1 AND heartbeat < ?",
+                (datetime.now().isoformat(), time.time() - STALE_AFTER))
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+            return {row['status']: row['n'] for row in rows}
+        finally:
+            conn.close()
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        """Get one job"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+
+    def list_jobs(self, include_finished: bool = True) -> List[Dict]:
+        """List jobs in the order workers will take them"""
+        conn = self._connect()
+        try:
+            where = "" if include_finished else "WHERE status IN ('queued', 'running')"
+            rows = conn.execute(
+                f"SELECT * FROM jobs {where} ORDER BY "
+                "CASE status WHEN 'running' THEN 0 WHEN 'queued' THEN 1 ELSE 2 END, "
+                "priority, id").fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+
+@contextlib.contextmanager
+def working_dir(path: Optional[str]):
+    """Run the block in `path` (None: stay where we are)"""
+    previous = os.getcwd()
+    if path:
+        os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+@contextlib.contextmanager
+def ignore_late_cancel(cancelled: threading.Event, done: threading.Event):
+    """
+    SIGINT handler for one job: a cancel interrupt that is only delivered
+    after the render finished is dropped instead of failing the bookkeeping
+    or stopping the worker (Ctrl+C still interrupts as usual)
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def handler(signum, frame):
+        if cancelled.is_set() and done.is_set():
+            return
+        raise KeyboardInterrupt
+
+    previous = signal.signal(signal.SIGINT, handler)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+class RenderWorker:
+    """Long-lived worker: loads the TTS model once, then renders jobs in-process"""
+
+    def __init__(self, queue: RenderQueue, poll_interval: float = 2.0, preload: bool = True,
+                 exporter: Optional[metrics.MetricsExporter] = None):
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.preload = preload
+        self.exporter = exporter
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def update_metrics(self):
+        """Publish queue depth"""
+        counts = self.queue.counts()
+        for status in ('queued', 'running'):
+            metrics.QUEUE_DEPTH.set(counts.get(status, 0), status=status)
+        if self.exporter:
+            self.exporter.flush()
+
+    def warm_up(self):
+        """Load the TTS model and locate ffmpeg before the first job"""
+        if not self.preload:
+            return
+
+        try:
+            sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '_scripts'))
+            from generate_long_audio import load_tts_model
+            load_tts_model()
+        except Exception as e:
+            print(f"[!] TTS model not preloaded: {e}")
+
+        try:
+            from segment_encoder import find_ffmpeg
+            find_ffmpeg()
+        except Exception as e:
+            print(f"[!] ffmpeg not found: {e}")
+
+    def run(self, once: bool = False):
+        """
+        Process jobs until interrupted
+
+        Args:
+            once: Exit when the queue is empty instead of waiting for jobs
+        """
+        print(f"Worker {self.name} started (queue: {self.queue.db_path})")
+        self.warm_up()
+
+        while True:
+            requeued = self.queue.requeue_stale()
+            if requeued:
+                print(f"[!] Requeued {requeued} job(s) from stopped workers")
+            self.update_metrics()
+
+            job = self.queue.claim(self.name)
+            if job is None:
+                if once:
+                    print("Queue empty - worker exiting")
+                    return
+                time.sleep(self.poll_interval)
+                continue
+
+            if not self.run_job(job):
+                return
+
+    def run_job(self, job: Dict) -> bool:
+        """
+        Render one claimed job with output captured to its log file
+
+        Returns:
+            False if the worker itself was interrupted (Ctrl+C)
+        """
+        self.update_metrics()
+        status = self._run_job(job)
+        metrics.JOBS_FINISHED.inc(status=status)
+        return status != 'interrupted'
+
+    def _run_job(self, job: Dict) -> str:
+        job_id = job['id']
+        os.makedirs(LOG_DIR, exist_ok=True)
+        log_file = os.path.abspath(os.path.join(LOG_DIR, f"job_{job_id:05d}.log"))
+        self.queue.set_log_file(job_id, log_file)
+
+        name = Path(job['presentation']).name
+        print(f"[{datetime.now():%H:%M:%S}] Job {job_id}: {name} (priority {job['priority']})")
+
+        cancelled = threading.Event()
+        done = threading.Event()
+        lock = threading.Lock()  # a cancel interrupt is only sent while the render runs
+
+        def monitor():
+            # Heartbeat; interrupt the render when the job is cancelled
+            while not done.wait(HEARTBEAT_INTERVAL):
+                try:
+                    cancel = self.queue.heartbeat(job_id)
+                    with lock:
+                        if cancel and not done.is_set() and not cancelled.is_set():
+                            cancelled.set()
+                            _thread.interrupt_main()
+                    self.update_metrics()
+                except sqlite3.Error:
+                    pass
+
+        def finish_render():
+            with lock:
+                done.set()
+
+        threading.Thread(target=monitor, daemon=True).start()
+
+        with ignore_late_cancel(cancelled, done):
+            return self._render(job, log_file, cancelled, finish_render)
+
+    def _render(self, job: Dict, log_file: str, cancelled: threading.Event, finish_render) -> str:
+        job_id = job['id']
+        summary = {}
+        start = time.time()
+        try:
+            with open(log_file, 'a', encoding='utf-8') as log, \
+                    contextlib.redirect_stdout(log), contextlib.redirect_stderr(log), \
+                    working_dir(job.get('cwd')):
+                args = video_creator.build_parser().parse_args(
+                    [job['presentation']] + json.loads(job['args']))
+                code = video_creator.run(args, summary)
+                finish_render()
+
+            status = 'done' if code == 0 else 'failed'
+            self.queue.finish(job_id, status, exit_code=code,
+                              video=summary.get('video'), log_file=log_file)
+            mark = "[OK]" if code == 0 else "[X]"
+            print(f"   {mark} {status} in {time.time() - start:.1f}s")
+            return status
+
+        except KeyboardInterrupt:
+            finish_render()
+            if cancelled.is_set():
+                self.queue.finish(job_id, 'cancelled', log_file=log_file)
+                print("   [!] cancelled")
+                return 'cancelled'
+
+            self.queue.finish(job_id, 'failed', log_file=log_file, error='Worker interrupted')
+            print("   [X] worker interrupted")
+            return 'interrupted'
+
+        except BaseException as e:
+            finish_render()
+            self.queue.finish(job_id, 'failed', log_file=log_file, error=str(e))
+            print(f"   [X] failed: {e}")
+            return 'failed'
+
+
+def start_detached_workers(queue_path: str, count: int, metrics_port: Optional[int] = None,
+                           metrics_file: Optional[str] = None) -> List[int]:
+    """
+    Start workers that survive the terminal (SSH) session closing
+
+    Worker i serves metrics on metrics_port + i and writes metrics_file
+    with an _i suffix (when more than one worker is started).
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+    pids = []
+
+    for i in range(count):
+        log = open(os.path.join(LOG_DIR, "worker.log"), 'a', encoding='utf-8')
+        command = [sys.executable, os.path.abspath(__file__), '--queue', queue_path, 'worker']
+        if metrics_port:
+            command += ['--metrics-port', str(metrics_port + i)]
+        if metrics_file:
+            stem, ext = os.path.splitext(metrics_file)
+            command += ['--metrics-file', f"{stem}_{i}{ext}" if count > 1 else metrics_file]
+
+        if os.name == 'nt':
+            flags = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+            process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT,
+                                       stdin=subprocess.DEVNULL, creationflags=flags)
+        else:
+            process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT,
+                                       stdin=subprocess.DEVNULL, start_new_session=True)
+        pids.append(process.pid)
+
+    return pids
+
+
+def print_jobs(jobs: List[Dict]):
+    """Print a job table"""
+    if not jobs:
+        print("No jobs")
+        return
+
+    print(f"{'ID':>5}  {'STATUS':10s} {'PRI':>3}  {'SUBMITTED':19s}  PRESENTATION")
+    print("-" * 70)
+    for job in jobs:
+        status = job['status']
+        if status == 'running' and job['cancel_requested']:
+            status = 'cancelling'
+        print(f"{job['id']:>5}  {status:10s} {job['priority']:>3}  "
+              f"{job['submitted_at'][:19]}  {Path(job['presentation']).name}")
+
+
+def queue_main(argv=None) -> int:
+    """Entry point for `video_creator.py queue` and `render_queue.py`"""
+    parser = argparse.ArgumentParser(
+        prog='video_creator.py queue',
+        description='Local render job queue',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Queue renders (options are passed to video_creator)
+  python video_creator.py queue submit Inbound/MDF/Module_01.pptx --use-existing-audio
+  python video_creator.py queue submit Module_02.pptx --preview 5
+
+  # Start two background workers (keep running after logout)
+  python video_creator.py queue worker --detach --count 2
+
+  # Check and cancel
+  python video_creator.py queue status
+  python video_creator.py queue cancel 3
+        """
+    )
+    parser.add_argument('--queue', default=DEFAULT_QUEUE,
+                        help=f'Queue database (default: {DEFAULT_QUEUE})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    submit = commands.add_parser('submit', help='Queue a presentation for rendering')
+    submit.add_argument('presentation', help='Path to PowerPoint file')
+    submit.add_argument('--priority', type=int, default=None,
+                        help='0 = first (default: 0 preview/draft, 1 review, 2 publish)')
+
+    status = commands.add_parser('status', help='Show jobs')
+    status.add_argument('job_id', type=int, nargs='?', help='Show one job in detail')
+    status.add_argument('--active', action='store_true', help='Only queued/running jobs')
+
+    cancel = commands.add_parser('cancel', help='Cancel a queued or running job')
+    cancel.add_argument('job_id', type=int)
+
+    worker = commands.add_parser('worker', help='Run a render worker')
+    worker.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+    worker.add_argument('--poll', type=float, default=2.0, help='Seconds between queue checks')
+    worker.add_argument('--no-preload', action='store_true',
+                        help='Load the TTS model on first use instead of at start')
+    worker.add_argument('--detach', action='store_true',
+                        help='Start in the background and return')
+    worker.add_argument('--count', type=int, default=1,
+                        help='Number of workers to start with --detach')
+    worker.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help='Serve Prometheus metrics on http://127.0.0.1:PORT/metrics')
+    worker.add_argument('--metrics-file', metavar='PATH',
+                        help='Write Prometheus metrics to a textfile')
+
+    args, deck_args = parser.parse_known_args(argv)
+    if deck_args and args.command != 'submit':
+        parser.error(f"unrecognized arguments: {' '.join(deck_args)}")
+
+    queue = RenderQueue(args.queue)
+
+    if args.command == 'submit':
+        try:
+            job_id = queue.submit(args.presentation, deck_args, args.priority)
+        except SystemExit:
+            return 1  # argparse already reported the bad option
+        job = queue.get(job_id)
+        print(f"[OK] Queued job {job_id}: {Path(job['presentation']).name} "
+              f"(priority {job['priority']})")
+        return 0
+
+    if args.command == 'status':
+        if args.job_id is None:
+            print_jobs(queue.list_jobs(include_finished=not args.active))
+            return 0
+
+        job = queue.get(args.job_id)
+        if job is None:
+            print(f"ERROR: Unknown job: {args.job_id}")
+            return 1
+        job['args'] = json.loads(job['args'])
+        for key, value in job.items():
+            if value is not None:
+                print(f"{key:17s} {value}")
+        return 0
+
+    if args.command == 'cancel':
+        try:
+            state = queue.cancel(args.job_id)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return 1
+        print(f"Job {args.job_id}: {state}")
+        return 0
+
+    if args.detach:
+        pids = start_detached_workers(args.queue, max(1, args.count),
+                                      args.metrics_port, args.metrics_file)
+        print(f"[OK] Started {len(pids)} worker(s): {', '.join(map(str, pids))}")
+        print(f"     Log: {os.path.join(LOG_DIR, 'worker.log')}")
+        return 0
+
+    metrics_file = os.path.abspath(args.metrics_file) if args.metrics_file else None
+    exporter = metrics.start_exporter(args.metrics_port, metrics_file)
+    try:
+        RenderWorker(queue, poll_interval=args.poll, preload=not args.no_preload,
+                     exporter=exporter).run(args.once)
+    except KeyboardInterrupt:
+        print("\nWorker stopped")
+    finally:
+        if exporter:
+            exporter.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(queue_main())
@@ -0,0 +1,213 @@
+"""
+Segment Encoder
+Encodes per-slide video segments in parallel and joins them without re-encoding
+"""
+
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tracing import bind, span
+import metrics
+
+
+def find_ffmpeg():
+    """Locate the ffmpeg binary (prefer the one moviepy is configured with)"""
+    try:
+        from moviepy.config import FFMPEG_BINARY
+        if FFMPEG_BINARY and FFMPEG_BINARY not in ('ffmpeg-imageio', 'auto-detect'):
+            return FFMPEG_BINARY
+    except ImportError:
+        pass
+
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except ImportError:
+        pass
+
+    return shutil.which('ffmpeg') or 'ffmpeg'
+
+
+class SegmentEncoder:
+    """Encode independent slide segments concurrently, then stream-copy concat"""
+
+    # Every segment must share the same stream layout for concat without re-encoding
+    AUDIO_SAMPLE_RATE = 48000
+    AUDIO_CHANNELS = 2
+
+    def __init__(self, width, height, fps, work_dir, workers=None,
+                 preset='medium', crf=23, audio_bitrate='192k'):
+        """
+        Initialize encoder
+
+        Args:
+            width: Output width in pixels
+            height: Output height in pixels
+            fps: Frames per second
+            work_dir: Directory for segment files
+            workers: Concurrent encoder processes (None = CPU count)
+            preset: libx264 preset
+            crf: libx264 constant rate factor
+            audio_bitrate: AAC bitrate (e.g., '192k')
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.work_dir = work_dir
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.preset = preset
+        self.crf = crf
+        self.audio_bitrate = audio_bitrate
+        self.ffmpeg = find_ffmpeg()
+
+        # Split the cores between encoders instead of letting every
+        # libx264 instance spawn a thread per core
+        self.threads_per_job = max(1, (os.cpu_count() or 1) // self.workers)
+
+        os.makedirs(self.work_dir, exist_ok=True)
+
+    def encode_segments(self, segments, output_file):
+        """
+        Encode segments in a bounded worker pool and concatenate them
+
+        Args:
+            segments: List of dicts with 'duration' and either 'image' (plus
+                      optional 'audio') or 'frame_function' (transition)
+            output_file: Final video path
+
+        Returns:
+            Path to created video
+        """
+        segment_files = [None] * len(segments)
+
+        print(f"      Encoding {len(segments)} segments with {self.workers} workers...")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                pool.submit(bind(self.encode_segment), segment, i): i
+                for i, segment in enumerate(segments)
+            }
+
+            done = 0
+            try:
+                for future in as_completed(futures):
+                    i = futures[future]
+                    segment_files[i] = future.result()
+                    done += 1
+                    print(f"      [{done}/{len(segments)}] Segment {i + 1} encoded")
+            except BaseException:
+                # Cancelled job or failed segment: do not encode the rest
+                for future in futures:
+                    future.cancel()
+                raise
+
+        print("      Joining segments (stream copy)...")
+        self.concat_segments(segment_files, output_file)
+
+        return output_file
+
+    def encode_segment(self, segment, index):
+        """Encode one still-image segment with its (padded) narration"""
+        kind = 'transition' if 'frame_function' in segment else 'slide'
+        started = time.perf_counter()
+        with span('encode.segment', index=index + 1, kind=kind,
+                  duration_s=round(segment['duration'], 3)):
+            output_path = self._encode_segment(segment, index)
+
+        frames = segment['duration'] * self.fps
+        metrics.ENCODE_FPS.observe(frames / max(time.perf_counter() - started, 1e-6),
+                                   mode=kind)
+        return output_path
+
+    def _encode_segment(self, segment, index):
+        output_path = os.path.join(self.work_dir, f"segment_{index + 1:03d}.mp4")
+
+        if 'frame_function' in segment:
+            return self.encode_frames_segment(segment, output_path)
+
+        duration = f"{segment['duration']:.3f}"
+
+        cmd = [self.ffmpeg, '-y', '-loglevel', 'error',
+               '-loop', '1', '-framerate', str(self.fps), '-t', duration,
+               '-i', segment['image']]
+
+        if segment.get('audio'):
+            cmd += ['-i', segment['audio']]
+        else:
+            # Silent track so every segment has identical streams
+            cmd += ['-f', 'lavfi', '-t', duration,
+                    '-i', f"anullsrc=r={self.AUDIO_SAMPLE_RATE}:cl=stereo"]
+
+        cmd += self.video_args()
+        cmd += ['-map', '0:v', '-map', '1:a', '-af', 'apad',
+                '-t', duration, output_path]
+
+        self._run(cmd)
+        return output_path
+
+    def encode_frames_segment(self, segment, output_path):
+        """Encode a short rendered window (transition) from raw RGB frames"""
+        frame_function = segment['frame_function']
+        duration = f"{segment['duration']:.3f}"
+        frame_count = max(1, int(round(segment['duration'] * self.fps)))
+
+        first = frame_function(0)
+        height, width = first.shape[:2]
+
+        cmd = [self.ffmpeg, '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{width}x{height}",
+               '-framerate', str(self.fps), '-i', '-',
+               '-f', 'lavfi', '-t', duration,
+               '-i', f"anullsrc=r={self.AUDIO_SAMPLE_RATE}:cl=stereo"]
+        cmd += self.video_args()
+        cmd += ['-map', '0:v', '-map', '1:a', '-t', duration, output_path]
+
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            process.stdin.write(first.tobytes())
+            for n in range(1, frame_count):
+                process.stdin.write(frame_function(n / self.fps).tobytes())
+        except BrokenPipeError:
+            pass  # ffmpeg exited early; its stderr explains why
+        finally:
+            process.stdin.close()
+
+        stderr = process.stderr.read().decode(errors='replace')
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed: {stderr.strip()[-500:]}")
+
+        return output_path
+
+    def video_args(self):
+        """Shared encoder arguments (all segments must match for stream copy)"""
+        scale = (f"scale={self.width}:{self.height}:force_original_aspect_ratio=decrease,"
+                 f"pad={self.width}:{self.height}:(ow-iw)/2:(oh-ih)/2,format=yuv420p")
+
+        return ['-vf', scale, '-r', str(self.fps),
+                '-c:v', 'libx264', '-preset', self.preset, '-crf', str(self.crf),
+                '-tune', 'stillimage', '-threads', str(self.threads_per_job),
+                '-c:a', 'aac', '-b:a', self.audio_bitrate,
+                '-ar', str(self.AUDIO_SAMPLE_RATE), '-ac', str(self.AUDIO_CHANNELS)]
+
+    def concat_segments(self, segment_files, output_file):
+        """Join encoded segments with the concat demuxer (no re-encode)"""
+        list_file = os.path.join(self.work_dir, 'segments.txt')
+        with open(list_file, 'w', encoding='utf-8') as f:
+            for path in segment_files:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        cmd = [self.ffmpeg, '-y', '-loglevel', 'error',
+               '-f', 'concat', '-safe', '0', '-i', list_file,
+               '-c', 'copy', '-movflags', '+faststart', output_file]
+        with span('mux', segments=len(segment_files)):
+            self._run(cmd)
+
+    def _run(self, cmd):
+        """Run ffmpeg and surface its error output on failure"""
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()[-500:]}")
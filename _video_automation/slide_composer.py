@@ -9,7 +9,7 @@ from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN, PP_PARAGRAPH_ALIGNMENT
 from pptx.dml.color import RGBColor
-from PIL import Image as PILImage
+from image_ingest import ImageIngest
 try:
     from brand_colors_refined import RefinedBrandColors
     REFINED_AVAILABLE = True
@@ -21,9 +21,10 @@ from brand_colors import BrandColors
 class SlideComposer:
     """Composes professional presentation slides"""
 
-    def __init__(self, output_path: str, brand_style: str = 'warm'):
+    def __init__(self, output_path: str, brand_style: str = 'warm', ingest: Optional[ImageIngest] = None):
         self.output_path = output_path
         self.prs = Presentation()
+        self.ingest = ingest or ImageIngest()
 
         # Set 16:9 aspect ratio
         self.prs.slide_width = Inches(16)
@@ -93,35 +94,18 @@ class SlideComposer:
     def _add_background_image(self, slide, image_path: Path):
         """Add image as background or large focal point"""
         try:
-            # Get image dimensions
-            img = PILImage.open(image_path)
-            img_width, img_height = img.size
-            img_ratio = img_width / img_height
-
             # Slide dimensions
             slide_width = self.prs.slide_width
             slide_height = self.prs.slide_height
-            slide_ratio = slide_width / slide_height
-
-            # Calculate dimensions to fill slide
-            if img_ratio > slide_ratio:
-                # Image is wider - fit to height
-                height = slide_height
-                width = int(height * img_ratio)
-                left = -(width - slide_width) / 2
-                top = 0
-            else:
-                # Image is taller - fit to width
-                width = slide_width
-                height = int(width / img_ratio)
-                left = 0
-                top = -(height - slide_height) / 2
+
+            # Scaled and cropped to fill the slide exactly (once, cached)
+            image_path = self.ingest.ingest_for_box(image_path, slide_width, slide_height, fit='cover')
 
             # Add image
             slide.shapes.add_picture(
                 str(image_path),
-                left, top,
-                width, height
+                0, 0,
+                slide_width, slide_height
             )
 
             # Add dark overlay for text readability
@@ -10,6 +10,7 @@ from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
 from brand_colors_snowbrix import SnowbrixColors
+from image_ingest import ImageIngest
 from PIL import Image as PILImage
 from lxml.etree import Element
 import io
@@ -18,9 +19,11 @@ import io
 class SnowbrixSlideComposer:
     """Slide composer with Snowbrix professional design"""
 
-    def __init__(self, output_path: str, include_logo: bool = True):
+    def __init__(self, output_path: str, include_logo: bool = True,
+                 ingest: Optional[ImageIngest] = None):
         self.output_path = output_path
         self.prs = Presentation()
+        self.ingest = ingest or ImageIngest()
         self.prs.slide_width = Inches(16)
         self.prs.slide_height = Inches(9)
         self.include_logo = include_logo
@@ -511,8 +514,10 @@ class SnowbrixSlideComposer:
         # Add image if provided
         if image_path and Path(image_path).exists():
             try:
+                # Exact box size, cropped rather than stretched (once, cached)
+                box_image = self.ingest.ingest_for_box(image_path, Inches(image_w), Inches(image_h))
                 slide.shapes.add_picture(
-                    str(image_path),
+                    str(box_image),
                     Inches(image_x),
                     Inches(image_y),
                     width=Inches(image_w),
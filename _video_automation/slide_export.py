@@ -0,0 +1,195 @@
+"""
+Slide Export
+Renders the real deck slides with headless LibreOffice (PPTX -> PDF -> PNG per page)
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from deck_parser import file_hash
+from tracing import bind, span
+import metrics
+
+
+# Keep hidden slides so PDF pages line up with slide numbers (LibreOffice 7.4+)
+PDF_FILTER = 'pdf:impress_pdf_Export:{"ExportHiddenSlides":{"type":"boolean","value":"true"}}'
+
+CONVERT_TIMEOUT = 600   # seconds for the whole deck
+RASTER_TIMEOUT = 120    # seconds per page
+
+
+def find_soffice() -> Optional[str]:
+    """Path to the LibreOffice binary, or None"""
+    for name in ('soffice', 'libreoffice'):
+        path = shutil.which(name)
+        if path:
+            return path
+
+    for path in (r"C:\Program Files\LibreOffice\program\soffice.exe",
+                 "/Applications/LibreOffice.app/Contents/MacOS/soffice"):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def export_available() -> bool:
+    """True if both LibreOffice and pdftoppm (poppler) are installed"""
+    return find_soffice() is not None and shutil.which('pdftoppm') is not None
+
+
+class SlideExporter:
+    """
+    Real slide images for one deck
+
+    The deck is converted to PDF once, then the pages needed are rasterized
+    in parallel at the output resolution (letterboxed if the aspect ratio
+    differs). Both are cached under cache_dir/<deck hash>/, so a changed
+    deck re-exports and an unchanged one costs nothing.
+    """
+
+    def __init__(self, pptx_path: str, cache_dir: str, width: int, height: int,
+                 workers: Optional[int] = None):
+        """
+        Args:
+            pptx_path: Path to .pptx file
+            cache_dir: Directory holding exports (one subfolder per deck hash)
+            width, height: Output image size in pixels
+            workers: Pages rasterized concurrently (default: CPU count)
+        """
+        self.pptx_path = pptx_path
+        self.width = width
+        self.height = height
+        self.workers = workers or os.cpu_count() or 1
+
+        self.deck_dir = Path(cache_dir) / file_hash(pptx_path)[:16]
+        self.pages_dir = self.deck_dir / f"{width}x{height}"
+        self.pdf_path = self.deck_dir / "deck.pdf"
+        self._prune(Path(cache_dir))
+
+        self._lock = threading.Lock()
+        self._failed = False
+
+    def _prune(self, cache_dir: Path):
+        """Drop exports of earlier versions of this deck"""
+        if not cache_dir.exists():
+            return
+        for entry in cache_dir.iterdir():
+            if entry.is_dir() and entry != self.deck_dir and (entry / "source.txt").exists():
+                if (entry / "source.txt").read_text(encoding='utf-8') == os.path.abspath(self.pptx_path):
+                    shutil.rmtree(entry, ignore_errors=True)
+
+    def page_path(self, slide_number: int) -> Path:
+        return self.pages_dir / f"slide_{slide_number:03d}.png"
+
+    def export(self, slide_numbers: Iterable[int]) -> Dict[int, str]:
+        """
+        Make sure the given slides are rendered
+
+        Args:
+            slide_numbers: 1-based slide numbers
+
+        Returns:
+            Dict slide number -> PNG path (empty if export failed)
+        """
+        slide_numbers = list(slide_numbers)
+        missing = [n for n in slide_numbers if not self.page_path(n).exists()]
+        for n in slide_numbers:
+            metrics.cache_lookup('slide_export', n not in missing)
+
+        if missing:
+            if not self._convert():
+                return {}
+
+            self.pages_dir.mkdir(parents=True, exist_ok=True)
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                failed = [n for n, ok in zip(missing, pool.map(bind(self._rasterize), missing)) if not ok]
+            if failed:
+                print(f"   [!] Could not rasterize slides: {failed}")
+
+        return {n: str(self.page_path(n)) for n in slide_numbers if self.page_path(n).exists()}
+
+    def _convert(self) -> bool:
+        """Convert the deck to PDF (once per deck hash)"""
+        with self._lock:
+            if self.pdf_path.exists():
+                return True
+            if self._failed:
+                return False
+            self._failed = not self._run_soffice()
+            return not self._failed
+
+    def _run_soffice(self) -> bool:
+        """Run headless LibreOffice and move the PDF into the cache"""
+        soffice = find_soffice()
+        if not soffice:
+            print("   [!] LibreOffice not found (install it or use --slide-render draw)")
+            return False
+
+        self.deck_dir.mkdir(parents=True, exist_ok=True)
+        print(f"   Exporting slides with LibreOffice: {Path(self.pptx_path).name}")
+
+        # Private profile: concurrent soffice runs (batch mode) would share a lock otherwise
+        with tempfile.TemporaryDirectory(prefix='soffice_') as tmp_dir, \
+                span('export.pdf', deck=Path(self.pptx_path).name):
+            profile_url = Path(tmp_dir, 'profile').as_uri()
+            command = [soffice, f'-env:UserInstallation={profile_url}', '--headless',
+                       '--convert-to', PDF_FILTER, '--outdir', tmp_dir, self.pptx_path]
+            try:
+                subprocess.run(command, capture_output=True, timeout=CONVERT_TIMEOUT, check=True)
+            except (subprocess.SubprocessError, OSError) as e:
+                print(f"   [!] LibreOffice export failed: {e}")
+                return False
+
+            pdf_file = Path(tmp_dir) / (Path(self.pptx_path).stem + '.pdf')
+            if not pdf_file.exists():
+                print("   [!] LibreOffice produced no PDF")
+                return False
+
+            tmp_pdf = self.pdf_path.with_suffix('.pdf.tmp')
+            shutil.move(str(pdf_file), tmp_pdf)
+            os.replace(tmp_pdf, self.pdf_path)
+
+        (self.deck_dir / "source.txt").write_text(os.path.abspath(self.pptx_path), encoding='utf-8')
+        return True
+
+    def _rasterize(self, slide_number: int) -> bool:
+        """Render one PDF page to the output size"""
+        target = self.page_path(slide_number)
+        tmp_prefix = target.with_name(f".{target.stem}.{threading.get_ident()}")
+        tmp_png = tmp_prefix.with_name(tmp_prefix.name + '.png')
+
+        command = ['pdftoppm', '-png', '-singlefile',
+                   '-f', str(slide_number), '-l', str(slide_number),
+                   '-scale-to-x', str(self.width), '-scale-to-y', '-1',
+                   str(self.pdf_path), str(tmp_prefix)]
+
+        with span('export.page', slide=slide_number):
+            try:
+                subprocess.run(command, capture_output=True, timeout=RASTER_TIMEOUT, check=True)
+            except (subprocess.SubprocessError, OSError):
+                return False
+            if not tmp_png.exists():
+                return False
+
+            self._fit(tmp_png)
+            os.replace(tmp_png, target)
+
+        return True
+
+    def _fit(self, path: Path):
+        """Letterbox a page whose aspect ratio differs from the output"""
+        from PIL import Image
+
+        with Image.open(path) as page:
+            if page.size == (self.width, self.height):
+                return
+            page.thumbnail((self.width, self.height), Image.LANCZOS)
+            canvas = Image.new('RGB', (self.width, self.height), 'black')
+            canvas.paste(page, ((self.width - page.width) // 2, (self.height - page.height) // 2))
+        canvas.save(path)
@@ -7,158 +7,86 @@ import sys
 import os
 import argparse
 from pathlib import Path
-from pptx import Presentation
 import re
 
 # Import our modules
 from config_manager import APIConfig
 from api_manager import MultiAccountAPIManager
 from prompt_generator import PromptGenerator
-from image_generator import ImageGenerator
+from async_image_generator import AsyncImageGenerator, ImageJob
+from placeholder_generator import PlaceholderGenerator, find_slide_image
+from image_worklist import ImageWorkList
 from slide_composer import SlideComposer
 from slide_composer_snowbrix import SnowbrixSlideComposer
 from inventory_manager import InventoryManager, InventoryStage
+from deck_parser import load_deck
+from profiling import StageProfiler
 
 
-def safe_text(text: str) -> str:
-    """Safely handle unicode characters"""
-    if not text:
-        return ""
-    try:
-        # Try to encode/decode to handle special chars
-        return text.encode('utf-8', errors='ignore').decode('utf-8')
-    except:
-        return str(text)
-
-
-def parse_presentation(pptx_path: str) -> list:
-    """Parse PowerPoint and extract slide information"""
+def parse_presentation(pptx_path: str, cache_dir: Path = None) -> list:
+    """Parse PowerPoint and extract slide information (cached in cache_dir if given)"""
     print(f"Parsing presentation: {pptx_path}")
 
     try:
-        prs = Presentation(pptx_path)
-        slides = []
-
-        for slide_num, slide in enumerate(prs.slides, 1):
-            try:
-                # Extract title
-                title = ""
-                if slide.shapes.title:
-                    try:
-                        title = safe_text(slide.shapes.title.text)
-                    except:
-                        title = ""
-
-                # If no title shape, find the title from text shapes
-                if not title:
-                    for shape in slide.shapes:
-                        if hasattr(shape, "text"):
-                            try:
-                                shape_text = safe_text(shape.text).strip()
-
-                                # Skip logo text
-                                if "SNOWBRIXAI" in shape_text or "SNOWBRIX" in shape_text:
-                                    continue
-
-                                # Skip numbers (numbered circles)
-                                if shape_text.isdigit():
-                                    continue
-
-                                # Skip very short text
-                                if len(shape_text) < 10:
-                                    continue
-
-                                # Skip text that looks like bullet points (database names)
-                                if shape_text.startswith("MDF_"):
-                                    continue
-
-                                # This is likely the title
-                                title = shape_text.split('\n')[0].strip()
-                                break  # Take the first valid title found
-                            except:
-                                pass
-
-                # Extract content from all text boxes
-                content = ""
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        try:
-                            content += safe_text(shape.text) + "\n"
-                        except:
-                            pass
-
-                # Extract speaker notes
-                notes = ""
-                if slide.has_notes_slide:
-                    try:
-                        notes = safe_text(slide.notes_slide.notes_text_frame.text)
-                    except:
-                        notes = ""
-
-                # Extract key points from content
-                key_points = []
-                try:
-                    lines = [l.strip() for l in content.split('\n') if l.strip()]
-                    for i, line in enumerate(lines):
-                        # Handle various bullet characters
-                        if any(line.startswith(c) for c in ['*', '-', '*', '●', '○']):
-                            clean_line = line.lstrip('*-*●○ ').strip()
-                            if clean_line:
-                                key_points.append(clean_line)
-
-                        # Handle numbered lists (1, 2, 3, etc.)
-                        elif len(line) > 0 and line[0].isdigit() and len(line) <= 2:
-                            # Number found, check next line for content
-                            if i + 1 < len(lines):
-                                next_line = lines[i + 1].strip()
-                                # Skip if next line is empty or is the title
-                                if len(next_line) > 15 and next_line != title:
-                                    key_points.append(next_line)
-
-                        # Also catch lines with " - " pattern (descriptions)
-                        elif " - " in line and len(line) > 20 and line != title:
-                            # This looks like a description (e.g., "MDF_ADMIN - Full control...")
-                            if not any(line.startswith(skip) for skip in [title[:10]]):
-                                key_points.append(line)
-                except:
-                    key_points = []
-
-                # Deduplicate key points while preserving order
-                seen = set()
-                unique_points = []
-                for point in key_points:
-                    if point not in seen:
-                        seen.add(point)
-                        unique_points.append(point)
-
-                slides.append({
-                    'number': slide_num,
-                    'title': title,
-                    'content': content,
-                    'notes': notes,
-                    'key_points': unique_points[:5]  # Max 5 unique points
-                })
-            except Exception as e:
-                # Skip problematic slides
-                print(f"  Warning: Skipped slide {slide_num}: {str(e)[:50]}")
-                continue
-
-        print(f"Found {len(slides)} slides")
-        return slides
-
+        records = load_deck(pptx_path, cache_dir=str(cache_dir) if cache_dir else None)
+        slides = [record.as_design_slide() for record in records]
     except Exception as e:
         print(f"ERROR parsing presentation: {str(e)[:100]}")
         return []
 
+    print(f"Found {len(slides)} slides")
+    return slides
+
+
+def write_prompt_file(slide: dict, prompt_gen: PromptGenerator, prompt_dir: Path):
+    """Generate and save the image prompt for one slide"""
+    prompt, slide_type = prompt_gen.generate_prompt(
+        slide['title'],
+        slide['content'],
+        slide['number']
+    )
+
+    # Enhance prompt with key points if available
+    if slide['key_points']:
+        prompt += f"\n\nKey Points to Visualize:\n"
+        for i, point in enumerate(slide['key_points'], 1):
+            prompt += f"{i}. {point}\n"
 
-def generate_prompts_stage(pptx_path: str, project_dir: Path):
-    """Stage 1: Generate image prompts"""
+    # Drop prompts saved for this slide under a different type
+    prompt_file = prompt_dir / f"slide_{slide['number']:02d}_{slide_type.value}.txt"
+    for old_file in prompt_dir.glob(f"slide_{slide['number']:02d}_*.txt"):
+        if old_file != prompt_file:
+            old_file.unlink()
+
+    # Save prompt to file
+    with open(prompt_file, 'w', encoding='utf-8') as f:
+        f.write(f"Slide {slide['number']}: {slide['title']}\n")
+        f.write(f"Type: {slide_type.value}\n")
+        f.write("="*70 + "\n\n")
+        f.write(prompt)
+
+    return prompt_file, slide_type
+
+
+def read_prompt_file(prompt_file: Path):
+    """Read (title, prompt) from a saved prompt file"""
+    with open(prompt_file, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+        title = lines[0].replace('Slide ', '').split(':', 1)[1].strip() if len(lines) > 0 else ""
+        prompt = ''.join(lines[3:])  # Skip header lines
+
+    return title, prompt
+
+
+def generate_prompts_stage(pptx_path: str, project_dir: Path, slides: list = None):
+    """Stage 1: Generate image prompts (slides: already parsed deck, if any)"""
     print("\n" + "="*70)
     print("STAGE 1: GENERATING IMAGE PROMPTS")
     print("="*70)
 
     # Parse presentation
-    slides = parse_presentation(pptx_path)
+    if slides is None:
+        slides = parse_presentation(pptx_path, cache_dir=project_dir)
     if not slides:
         return False
 
@@ -171,25 +99,7 @@ def generate_prompts_stage(pptx_path: str, project_dir: Path):
 
     # Generate prompts for each slide
     for slide in slides:
-        prompt, slide_type = prompt_gen.generate_prompt(
-            slide['title'],
-            slide['content'],
-            slide['number']
-        )
-
-        # Enhance prompt with key points if available
-        if slide['key_points']:
-            prompt += f"\n\nKey Points to Visualize:\n"
-            for i, point in enumerate(slide['key_points'], 1):
-                prompt += f"{i}. {point}\n"
-
-        # Save prompt to file
-        prompt_file = prompt_dir / f"slide_{slide['number']:02d}_{slide_type.value}.txt"
-        with open(prompt_file, 'w', encoding='utf-8') as f:
-            f.write(f"Slide {slide['number']}: {slide['title']}\n")
-            f.write(f"Type: {slide_type.value}\n")
-            f.write("="*70 + "\n\n")
-            f.write(prompt)
+        prompt_file, slide_type = write_prompt_file(slide, prompt_gen, prompt_dir)
 
         # Clean title for display (remove problematic unicode)
         display_title = slide['title'][:50].encode('ascii', 'ignore').decode('ascii')
@@ -207,8 +117,20 @@ def generate_prompts_stage(pptx_path: str, project_dir: Path):
     return True
 
 
-def generate_images_stage(project_dir: Path, api_manager: MultiAccountAPIManager):
-    """Stage 2: Generate images from prompts"""
+def generate_images_stage(project_dir: Path, api_manager: MultiAccountAPIManager,
+                          image_api: dict = None, on_shortfall: str = 'ask'):
+    """
+    Stage 2: Generate images from prompts
+
+    Args:
+        project_dir: Project directory
+        api_manager: Accounts and quota
+        image_api: APIConfig.get_image_api() settings
+        on_shortfall: What to do when quota cannot cover every image:
+            'ask' (prompt), 'placeholder' (generate what fits, placeholders
+            for the rest), 'partial' (generate what fits, leave the rest
+            missing) or 'abort' (generate nothing)
+    """
     print("\n" + "="*70)
     print("STAGE 2: GENERATING IMAGES")
     print("="*70)
@@ -224,64 +146,86 @@ def generate_images_stage(project_dir: Path, api_manager: MultiAccountAPIManager
         return False
 
     # Create image generator
-    img_gen = ImageGenerator(api_manager, str(image_dir))
+    img_gen = AsyncImageGenerator.from_config(api_manager, str(image_dir), image_api)
+    worklist = ImageWorkList(project_dir)
+
+    existing = 0
+    rejected = 0
+    jobs = []
+    slide_types = {}
+
+    for prompt_file in prompt_files:
+        # Extract slide number and type (slide_NN_<type>.txt)
+        match = re.search(r'slide_(\d+)(?:_(\w+))?', prompt_file.name)
+        if not match:
+            continue
+
+        slide_num = int(match.group(1))
+        slide_types[slide_num] = match.group(2) or 'simple'
+
+        # Manual or previously generated images are kept
+        existing_image = img_gen.check_existing_image(slide_num)
+        if existing_image:
+            print(f"  [{slide_num:02d}] Using existing image: {existing_image.name}")
+            existing += 1
+            worklist.mark_done(slide_num)
+            continue
+
+        title, prompt = read_prompt_file(prompt_file)
+        if worklist.is_rejected(slide_num, prompt):
+            print(f"  [{slide_num:02d}] Skipped: prompt was rejected by the API (edit it to retry)")
+            rejected += 1
+            continue
+        jobs.append(ImageJob(slide_num, title, prompt))
+
+    if not jobs:
+        worklist.save()
+        print(f"\n[OK] No images to generate ({existing} existing, {rejected} rejected)")
+        return True
 
     # Check API capacity
     print(f"\n{api_manager.get_status_summary()}\n")
 
-    capacity = api_manager.check_capacity(len(prompt_files))
-    print(f"Need: {capacity['required']} images")
+    # Images already in the shared cache and repeated prompts need no request
+    capacity = api_manager.check_capacity(img_gen.requests_needed(jobs))
+    print(f"Need: {len(jobs)} images ({capacity['required']} API requests)")
     print(f"Available: {capacity['available']} API requests")
+    print(api_manager.format_plan(capacity))
 
     if not capacity['sufficient']:
         print(f"[!]  Warning: Only {capacity['available']} requests available")
         print(f"   Missing: {capacity['shortfall']} images")
-        print("   Will generate what we can + use placeholders for rest")
-        response = input("\nContinue? (y/n): ")
-        if response.lower() != 'y':
+        if capacity['next_reset']:
+            print(f"   Quota resets in {capacity['next_reset']}")
+
+        if on_shortfall == 'ask':
+            print("   Will generate what we can + use placeholders for rest")
+            response = input("\nContinue? (y/n): ")
+            on_shortfall = 'placeholder' if response.lower() == 'y' else 'abort'
+        elif on_shortfall == 'placeholder':
+            print("   Generating what we can + placeholders for the rest")
+        elif on_shortfall == 'partial':
+            print("   Generating what we can; the rest stays in the work list")
+
+        if on_shortfall == 'abort':
+            print("   Nothing generated (--on-shortfall abort)")
             return False
 
     print("\nGenerating images...")
     print("="*70)
 
-    generated = 0
-    existing = 0
-    failed = 0
-
-    for prompt_file in prompt_files:
-        # Extract slide number
-        match = re.search(r'slide_(\d+)', prompt_file.name)
-        if not match:
-            continue
-
-        slide_num = int(match.group(1))
-
-        # Read prompt
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            title = lines[0].replace('Slide ', '').split(':', 1)[1].strip() if len(lines) > 0 else ""
-            prompt = ''.join(lines[3:])  # Skip header lines
+    # All missing images at once, spread over every account
+    results = img_gen.generate_many(jobs)
+    generated = sum(1 for result in results if result.success)
+    failed = len(results) - generated
+    worklist.update(jobs, results)
+    worklist.save()
 
-        # Generate image
-        print(f"\n[{slide_num:02d}/{len(prompt_files)}] {title[:50]}")
-
-        success, image_path, message = img_gen.generate_image(
-            prompt=prompt,
-            slide_number=slide_num,
-            slide_title=title
-        )
-
-        print(f"  {message}")
-
-        if success:
-            if "existing" in message.lower():
-                existing += 1
-            else:
-                generated += 1
-        else:
-            failed += 1
-            # Generate placeholder
-            print(f"  Creating placeholder...")
+    # Placeholders for the rest, all at once (replaced by real images on a later run)
+    if failed > 0 and on_shortfall != 'partial':
+        missing = [(r.slide_number, job.title, slide_types[r.slide_number])
+                   for job, r in zip(jobs, results) if not r.success]
+        PlaceholderGenerator(str(image_dir)).generate_many(missing)
 
     print("\n" + "="*70)
     print("IMAGE GENERATION COMPLETE")
@@ -289,7 +233,12 @@ def generate_images_stage(project_dir: Path, api_manager: MultiAccountAPIManager
     print(f"[OK] Generated: {generated}")
     print(f"[OK] Existing: {existing}")
     if failed > 0:
-        print(f"[!]  Failed: {failed} (placeholders created)")
+        created = " (placeholders created)" if on_shortfall != 'partial' else ""
+        print(f"[!]  Failed: {failed}{created}")
+    if worklist.slides:
+        print(f"[!]  Remaining: {worklist.count('pending')} pending, {worklist.count('rejected')} rejected "
+              f"-> {worklist.path}")
+        print("   Run --generate again (or --generate-inventory on a schedule) once quota resets")
 
     print(f"\n{api_manager.get_status_summary()}")
 
@@ -299,14 +248,41 @@ def generate_images_stage(project_dir: Path, api_manager: MultiAccountAPIManager
     return True
 
 
-def create_slides_stage(pptx_path: str, project_dir: Path, brand_style: str = 'snowbrix'):
-    """Stage 3: Create presentation with images"""
+def generate_inventory_stage(api_manager: MultiAccountAPIManager, image_api: dict = None,
+                             on_shortfall: str = 'placeholder'):
+    """Stage 2 for every project with missing images (unattended, e.g. from cron)"""
+    inventory = InventoryManager()
+    inventory.scan_all_projects()
+
+    pending = inventory.get_pending_work(InventoryStage.IMAGES)
+    if not pending:
+        print("\n[OK] No projects need images")
+        return True
+
+    print(f"\n{len(pending)} project(s) need images")
+    for project in pending:
+        if not api_manager.get_usable_accounts():
+            print("\n[!] All API accounts exhausted; the remaining projects resume on the next run")
+            break
+
+        print(f"\nProject: {project.name}")
+        project_dir = Path(project.project_dir)
+        generate_images_stage(project_dir, api_manager, image_api, on_shortfall)
+        inventory.scan_project(project.name, project_dir)
+
+    return True
+
+
+def create_slides_stage(pptx_path: str, project_dir: Path, brand_style: str = 'snowbrix',
+                        slides: list = None):
+    """Stage 3: Create presentation with images (slides: already parsed deck, if any)"""
     print("\n" + "="*70)
     print("STAGE 3: CREATING PRESENTATION")
     print("="*70)
 
     # Parse original presentation
-    slides = parse_presentation(pptx_path)
+    if slides is None:
+        slides = parse_presentation(pptx_path, cache_dir=project_dir)
     if not slides:
         return False
 
@@ -331,13 +307,8 @@ def create_slides_stage(pptx_path: str, project_dir: Path, brand_style: str = 's
     for slide in slides:
         slide_num = slide['number']
 
-        # Find image
-        image_path = None
-        for ext in ['png', 'jpg', 'jpeg']:
-            img_file = image_dir / f"slide_{slide_num:02d}.{ext}"
-            if img_file.exists():
-                image_path = img_file
-                break
+        # Find image (a manual or generated one before a placeholder)
+        image_path = find_slide_image(image_dir, slide_num, include_placeholders=True)
 
         # First slide is title
         if slide_num == 1:
@@ -401,6 +372,9 @@ Examples:
 
   # Generate images (with API keys)
   python slide_redesigner_v2.py presentation.pptx --generate --api-keys key1,key2
+
+  # Unattended: resume every project's missing images (e.g. hourly from cron)
+  python slide_redesigner_v2.py --generate-inventory --on-shortfall partial
         """
     )
 
@@ -434,6 +408,11 @@ Examples:
     parser.add_argument('--generate-inventory', action='store_true',
                        help='Generate images for all pending projects')
 
+    parser.add_argument('--on-shortfall', choices=['ask', 'placeholder', 'partial', 'abort'],
+                       help='When quota cannot cover all images: ask, placeholder (generate what fits, '
+                            'placeholders for the rest), partial (generate what fits, rest stays pending) '
+                            'or abort (default: ask if interactive, else placeholder)')
+
     # Output
     parser.add_argument('--project-dir',
                        help='Project directory (default: _projects/[name])')
@@ -444,6 +423,11 @@ Examples:
                        default='snowbrix',
                        help='Brand color scheme (default: snowbrix - authentic cream+green design)')
 
+    # Diagnostics
+    parser.add_argument('--profile', nargs='?', const='all',
+                       choices=['all', 'prompts', 'images', 'slides'], metavar='STAGE',
+                       help='Profile a stage (all, prompts, images, slides) -> [project]/profile/')
+
     args = parser.parse_args()
 
     print("="*70)
@@ -458,6 +442,8 @@ Examples:
         print("\n" + inventory.get_dashboard())
         return 0
 
+    on_shortfall = args.on_shortfall or ('ask' if sys.stdin.isatty() else 'placeholder')
+
     # Need presentation file for other commands
     if not args.presentation and not args.generate_inventory:
         parser.print_help()
@@ -472,14 +458,23 @@ Examples:
         pres_name = Path(args.presentation).stem
         project_dir = Path(args.project_dir) if args.project_dir else Path(f"_projects/{pres_name}")
         project_dir.mkdir(parents=True, exist_ok=True)
+        profiler = StageProfiler(args.profile, str(project_dir / "profile"))
 
         print(f"\nProject: {project_dir}")
         print(f"Presentation: {args.presentation}")
         print()
 
+    # Parse once; every stage of this run reuses the same slides
+    slides = None
+    if args.presentation and (args.plan_only or args.create_slides or args.all):
+        slides = parse_presentation(args.presentation, cache_dir=project_dir)
+        if not slides:
+            return 1
+
     # Stage 1: Generate prompts
     if args.plan_only or args.all:
-        success = generate_prompts_stage(args.presentation, project_dir)
+        with profiler.stage('prompts'):
+            success = generate_prompts_stage(args.presentation, project_dir, slides=slides)
         if not success:
             return 1
 
@@ -499,16 +494,34 @@ Examples:
         # Create API manager
         api_manager = MultiAccountAPIManager(config.get_google_accounts())
 
-        success = generate_images_stage(project_dir, api_manager)
+        with profiler.stage('images'):
+            success = generate_images_stage(project_dir, api_manager, config.get_image_api(),
+                                            on_shortfall)
         if not success:
             return 1
 
         if args.generate:
             return 0
 
+    # Stage 2 for all projects
+    if args.generate_inventory:
+        config = APIConfig(args.config)
+        if args.api_keys:
+            config.add_cli_keys(args.api_keys)
+
+        if not config.validate():
+            return 1
+
+        api_manager = MultiAccountAPIManager(config.get_google_accounts())
+        generate_inventory_stage(api_manager, config.get_image_api(),
+                                 'placeholder' if on_shortfall == 'ask' else on_shortfall)
+        return 0
+
     # Stage 3: Create slides
     if args.create_slides or args.all:
-        success = create_slides_stage(args.presentation, project_dir, brand_style=args.brand)
+        with profiler.stage('slides'):
+            success = create_slides_stage(args.presentation, project_dir,
+                                          brand_style=args.brand, slides=slides)
         if not success:
             return 1
 
@@ -10,15 +10,18 @@ from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
 from brand_colors_snowbrix import SnowbrixColors
+from image_ingest import ImageIngest
 from lxml.etree import Element
 
 
 class SnowbrixLayoutsComplete:
     """Complete professional layout system for Snowbrix"""
 
-    def __init__(self, output_path: str, include_logo: bool = True, include_page_numbers: bool = False):
+    def __init__(self, output_path: str, include_logo: bool = True, include_page_numbers: bool = False,
+                 ingest: Optional[ImageIngest] = None):
         self.output_path = output_path
         self.prs = Presentation()
+        self.ingest = ingest or ImageIngest()
         self.prs.slide_width = Inches(16)
         self.prs.slide_height = Inches(9)
         self.include_logo = include_logo
@@ -399,8 +402,9 @@ class SnowbrixLayoutsComplete:
         # Add image or placeholder
         if image_path and Path(image_path).exists():
             try:
+                box_image = self.ingest.ingest_for_box(image_path, Inches(image_w), Inches(image_h))
                 slide.shapes.add_picture(
-                    str(image_path),
+                    str(box_image),
                     Inches(image_x), Inches(image_y),
                     width=Inches(image_w), height=Inches(image_h)
                 )
@@ -0,0 +1,232 @@
+"""
+Tracing
+Lightweight spans with wall time, CPU time and peak memory for each pipeline stage
+"""
+
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process so far (None if unavailable)"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # KiB on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if os.uname().sysname == 'Darwin' else 1024), 1)
+
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        peak = getattr(info, 'peak_wset', None) or info.rss
+        return round(peak / (1024 * 1024), 1)
+
+    return None
+
+
+def child_cpu_seconds() -> float:
+    """CPU time used by finished child processes (ffmpeg) so far"""
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+class Tracer:
+    """
+    Collects spans from every thread; disabled (near zero cost) until enabled
+
+    Each deck run records into its own Tracer (see use_tracer), so decks
+    rendered side by side in one process keep their spans apart.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.records: List[Dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._origin = time.perf_counter()
+
+    def enable(self):
+        """Start recording spans"""
+        self.clear()
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording spans (recorded spans are kept)"""
+        self.enabled = False
+
+    def clear(self):
+        """Drop recorded spans and restart the clock"""
+        with self._lock:
+            self.records = []
+            self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """
+        Time a block of work
+
+        Yields the span's attribute dict so callers can add results
+        (e.g., audio seconds produced) before the span closes.
+
+        Args:
+            name: Stage name, dotted for sub-stages (e.g., 'tts.sentence')
+            **attrs: Extra attributes recorded with the span
+        """
+        if not self.enabled:
+            yield attrs
+            return
+
+        stack = self._local.__dict__.setdefault('stack', [])
+        span_id = next(self._ids)
+        parent_id = stack[-1] if stack else None
+        stack.append(span_id)
+
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        child_start = child_cpu_seconds()
+        error = None
+
+        try:
+            yield attrs
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            end = time.perf_counter()
+            record = {
+                'id': span_id,
+                'parent': parent_id,
+                'name': name,
+                'thread': threading.current_thread().name,
+                'tid': threading.get_ident(),
+                'start_s': round(start - self._origin, 6),
+                'wall_s': round(end - start, 6),
+                'cpu_s': round(time.thread_time() - cpu_start, 6),
+                'child_cpu_s': round(child_cpu_seconds() - child_start, 6),
+                'peak_rss_mb': peak_rss_mb(),
+                'attrs': attrs
+            }
+            if error:
+                record['error'] = error
+
+            with self._lock:
+                self.records.append(record)
+
+    def export_jsonl(self, path: str) -> str:
+        """Write one JSON object per span"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in sorted(self.records, key=lambda r: r['start_s']):
+                f.write(json.dumps(record, default=str) + '\n')
+        return path
+
+    def export_chrome(self, path: str) -> str:
+        """Write Chrome trace format (open in chrome://tracing or Perfetto)"""
+        pid = os.getpid()
+        events = []
+        threads = {}
+
+        for record in self.records:
+            threads[record['tid']] = record['thread']
+            args = dict(record['attrs'])
+            args.update({key: record[key] for key in
+                         ('cpu_s', 'child_cpu_s', 'peak_rss_mb', 'error') if key in record})
+            events.append({
+                'name': record['name'],
+                'cat': record['name'].split('.')[0],
+                'ph': 'X',
+                'ts': round(record['start_s'] * 1e6),
+                'dur': round(record['wall_s'] * 1e6),
+                'pid': pid,
+                'tid': record['tid'],
+                'args': args
+            })
+
+        for tid, thread_name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'name': thread_name}})
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+        return path
+
+    def summary(self) -> List[Dict]:
+        """Totals per span name, slowest first"""
+        totals = defaultdict(lambda: {'count': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'child_cpu_s': 0.0})
+        for record in self.records:
+            entry = totals[record['name']]
+            entry['count'] += 1
+            entry['wall_s'] += record['wall_s']
+            entry['cpu_s'] += record['cpu_s']
+            entry['child_cpu_s'] += record['child_cpu_s']
+
+        rows = [dict(name=name, **values) for name, values in totals.items()]
+        return sorted(rows, key=lambda row: row['wall_s'], reverse=True)
+
+    def print_summary(self):
+        """Print per-stage totals"""
+        print(f"   {'STAGE':24s} {'COUNT':>6} {'WALL':>9} {'CPU':>9} {'FFMPEG CPU':>11}")
+        for row in self.summary():
+            print(f"   {row['name']:24s} {row['count']:>6} {row['wall_s']:>8.2f}s "
+                  f"{row['cpu_s']:>8.2f}s {row['child_cpu_s']:>10.2f}s")
+        peak = peak_rss_mb()
+        if peak is not None:
+            print(f"   Peak memory: {peak:.0f} MB")
+
+
+# Fallback when no run has installed its own tracer (never enabled)
+tracer = Tracer()
+
+_current = contextvars.ContextVar('tracer')
+
+
+def current_tracer() -> Tracer:
+    """Tracer of the run this code belongs to"""
+    return _current.get(tracer)
+
+
+@contextmanager
+def use_tracer(run_tracer: Tracer):
+    """Record spans of this thread (and of work passed to bind()) into `run_tracer`"""
+    token = _current.set(run_tracer)
+    try:
+        yield run_tracer
+    finally:
+        _current.reset(token)
+
+
+def span(name: str, **attrs):
+    """Tracer.span on the current run's tracer"""
+    return current_tracer().span(name, **attrs)
+
+
+def bind(fn):
+    """
+    Wrap a callable handed to a worker thread so its spans go to the
+    caller's tracer (threads do not inherit the caller's context)
+    """
+    run_tracer = current_tracer()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        with use_tracer(run_tracer):
+            return fn(*args, **kwargs)
+
+    return run
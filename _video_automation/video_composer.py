@@ -5,6 +5,9 @@ Assembles slides, audio, and B-roll into final video
 
 import os
 import glob
+import shutil
+import time
+from functools import lru_cache
 from pathlib import Path
 
 try:
@@ -28,13 +31,35 @@ except ImportError:
     print("Install with: pip install Pillow")
     raise
 
+from audio_track import AudioTrackAssembler
+from encoding_profiles import get_profile
+from tracing import span
+import metrics
+
+
+@lru_cache(maxsize=None)
+def load_font(size):
+    """Load (and keep) a slide font, falling back to PIL's default"""
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except Exception:
+        return ImageFont.load_default()
+
 
 class VideoComposer:
     """Compose video from slides, audio, and B-roll"""
 
+    # Slide images are laid out on this canvas, then scaled to the output size
+    DESIGN_WIDTH = 1920
+    DESIGN_HEIGHT = 1080
+
+    # Transitions play in the pause between slides (seconds)
+    TRANSITION_DURATION = 0.5
+
     def __init__(self, slides, audio_path, broll_dir=None,
-                 resolution='1920x1080', fps=30, transition='fade',
-                 project_dir='_projects/temp'):
+                 resolution=None, fps=None, transition='fade',
+                 project_dir='_projects/temp', workers=None, profile=None,
+                 presentation=None, slide_render='draw', work_dir=None):
         """
         Initialize composer
 
@@ -42,27 +67,59 @@ class VideoComposer:
             slides: List of slide data dicts from PowerPointParser
             audio_path: Path to narration audio file
             broll_dir: Directory containing B-roll footage
-            resolution: Video resolution (e.g., '1920x1080')
-            fps: Frames per second
+            resolution: Video resolution override (e.g., '1920x1080')
+            fps: Frames per second override
             transition: Transition effect ('none', 'fade', 'slide', 'wipe')
             project_dir: Project directory for intermediate files
+            workers: Encode per-slide segments in parallel with this many
+                     workers (None = single one-shot encode)
+            profile: EncodingProfile (default: publish)
+            presentation: Source .pptx (needed to export the real slides)
+            slide_render: 'libreoffice' (real slides), 'draw' (text layout),
+                          or 'auto' (LibreOffice when installed)
+            work_dir: Where rendered slides and segments go (default: project_dir)
         """
         self.slides = slides
         self.audio_path = audio_path
         self.broll_dir = broll_dir
-        self.fps = fps
         self.transition = transition
         self.project_dir = project_dir
+        self.work_dir = str(work_dir or project_dir)
+        self.workers = workers
 
-        # Parse resolution
-        w, h = resolution.lower().split('x')
-        self.width = int(w)
-        self.height = int(h)
+        # Resolve encoding settings (explicit resolution/fps win over the profile)
+        self.profile = (profile or get_profile('publish')).with_overrides(resolution, fps)
+        self.width = self.profile.width
+        self.height = self.profile.height
+        self.fps = self.profile.fps
 
         # Create slides directory
-        self.slides_dir = f"{project_dir}/slides_rendered"
+        self.slides_dir = f"{self.work_dir}/slides_rendered"
         os.makedirs(self.slides_dir, exist_ok=True)
 
+        self.exporter = self._create_exporter(presentation, slide_render)
+        self.exported_images = {}
+
+    def _create_exporter(self, presentation, slide_render):
+        """SlideExporter for the real slides, or None to draw them"""
+        if not presentation or slide_render == 'draw':
+            return None
+
+        from slide_export import SlideExporter, export_available
+
+        if slide_render == 'auto' and not export_available():
+            print("   LibreOffice/pdftoppm not found, drawing slide images")
+            return None
+
+        return SlideExporter(presentation, f"{self.project_dir}/slide_exports",
+                             self.width, self.height, workers=self.workers)
+
+    def prepare_slide_images(self):
+        """Export every slide in one batch (no-op when drawing)"""
+        if self.exporter:
+            numbers = [slide.get('slide_number', i) for i, slide in enumerate(self.slides, 1)]
+            self.exported_images.update(self.exporter.export(numbers))
+
     def create_video(self, output_file, pause_duration=0.5, min_slide_duration=3.0):
         """
         Create final video
@@ -75,6 +132,7 @@ class VideoComposer:
         Returns:
             Path to created video
         """
+        print(f"   Profile: {self.profile.name} ({self.profile.preset}, CRF {self.profile.crf})")
         print(f"   Resolution: {self.width}x{self.height}")
         print(f"   FPS: {self.fps}")
         print(f"   Slides: {len(self.slides)}")
@@ -86,77 +144,123 @@ class VideoComposer:
         # Step 2: Calculate timing
         print("   Calculating timing...")
         timings = self._calculate_timings(pause_duration, min_slide_duration)
+        segments = self._plan_segments(slide_images, timings, pause_duration)
+
+        # Parallel mode: independent per-slide segments, joined by stream copy
+        if self.workers:
+            print("   Encoding segments in parallel...")
+            return self._create_video_segmented(segments, output_file)
 
         # Step 3: Create video clips
         print("   Creating video clips...")
-        video_clips = self._create_video_clips(slide_images, timings)
+        video_clips = self._create_video_clips(segments)
 
-        # Step 4: Concatenate clips
+        # Step 4: Concatenate clips (all clips share one size, no compositing)
         print("   Combining clips...")
-        final_video = concatenate_videoclips(video_clips, method='compose')
+        final_video = concatenate_videoclips(video_clips, method='chain')
 
         # Step 5: Add audio if available
-        if self.audio_path:
+        if self.audio_path or any(slide.get('audio_file') for slide in self.slides):
             print("   Adding audio...")
-            final_video = self._add_audio(final_video)
+            final_video = self._add_audio(final_video, timings)
 
         # Step 6: Write output
         print(f"   Writing video: {output_file}")
-        final_video.write_videofile(
-            output_file,
-            fps=self.fps,
-            codec='libx264',
-            audio_codec='aac',
-            preset='medium',
-            ffmpeg_params=['-crf', '23']
-        )
+        started = time.perf_counter()
+        with span('encode', mode='single', duration_s=round(final_video.duration, 2)):
+            final_video.write_videofile(
+                output_file,
+                fps=self.fps,
+                codec='libx264',
+                audio_codec='aac',
+                preset=self.profile.preset,
+                audio_bitrate=self.profile.audio_bitrate,
+                ffmpeg_params=['-crf', str(self.profile.crf)]
+            )
+        metrics.ENCODE_FPS.observe(final_video.duration * self.fps /
+                                   max(time.perf_counter() - started, 1e-6), mode='single')
 
         # Cleanup
         final_video.close()
 
         return output_file
 
+    def _create_video_segmented(self, segments, output_file):
+        """Encode each segment concurrently, then concatenate"""
+        encoder = self.create_segment_encoder()
+
+        print(f"   Writing video: {output_file}")
+        return encoder.encode_segments(segments, output_file)
+
+    def create_segment_encoder(self):
+        """Segment encoder configured with this composer's profile"""
+        from segment_encoder import SegmentEncoder
+
+        return SegmentEncoder(
+            width=self.width,
+            height=self.height,
+            fps=self.fps,
+            work_dir=f"{self.work_dir}/segments",
+            workers=self.workers,
+            preset=self.profile.preset,
+            crf=self.profile.crf,
+            audio_bitrate=self.profile.audio_bitrate
+        )
+
     def _generate_slide_images(self):
         """Generate images for each slide"""
         slide_images = []
+        self.prepare_slide_images()
 
         for i, slide in enumerate(self.slides, 1):
-            image_path = f"{self.slides_dir}/slide_{i:03d}.png"
-
-            # Create slide image
-            self._create_slide_image(
-                slide=slide,
-                output_path=image_path,
-                slide_number=i
-            )
-
-            slide_images.append(image_path)
+            slide_images.append(self.render_slide_image(i, slide))
             print(f"      [{i}/{len(self.slides)}] {slide['title'][:40]}...")
 
         return slide_images
 
+    def render_slide_image(self, slide_number, slide):
+        """Render one slide image and return its path"""
+        image_path = f"{self.slides_dir}/slide_{slide_number:03d}.png"
+
+        with span('render.slide', slide=slide_number):
+            exported = self._exported_image(slide.get('slide_number', slide_number))
+            if exported:
+                shutil.copyfile(exported, image_path)
+            else:
+                self._create_slide_image(
+                    slide=slide,
+                    output_path=image_path,
+                    slide_number=slide_number
+                )
+        metrics.SLIDES_RENDERED.inc()
+
+        return image_path
+
+    def _exported_image(self, deck_number):
+        """Path of the exported slide, or None (drawing mode or export failed)"""
+        if not self.exporter:
+            return None
+        if deck_number not in self.exported_images:
+            self.exported_images.update(self.exporter.export([deck_number]))
+        return self.exported_images.get(deck_number)
+
     def _create_slide_image(self, slide, output_path, slide_number):
         """Create an image representation of a slide"""
 
         # Create blank slide
-        img = Image.new('RGB', (self.width, self.height), color='white')
+        width, height = self.DESIGN_WIDTH, self.DESIGN_HEIGHT
+        img = Image.new('RGB', (width, height), color='white')
         draw = ImageDraw.Draw(img)
 
-        # Try to load fonts
-        try:
-            title_font = ImageFont.truetype("arial.ttf", 72)
-            content_font = ImageFont.truetype("arial.ttf", 48)
-            footer_font = ImageFont.truetype("arial.ttf", 32)
-        except:
-            # Fallback to default font
-            title_font = ImageFont.load_default()
-            content_font = ImageFont.load_default()
-            footer_font = ImageFont.load_default()
+        # Fonts are loaded once per process
+        title_font = load_font(72)
+        content_font = load_font(48)
+        footer_font = load_font(32)
 
         # Add colored header bar
         header_height = 150
         draw.rectangle(
-            [(0, 0), (self.width, header_height)],
+            [(0, 0), (width, header_height)],
             fill='#2c3e50'
         )
 
@@ -179,7 +283,7 @@ class VideoComposer:
             title = '\n'.join(lines[:2])  # Max 2 lines
 
         draw.text(
-            (self.width // 2, title_y),
+            (width // 2, title_y),
             title,
             fill='white',
             font=title_font,
@@ -210,89 +314,131 @@ class VideoComposer:
         # Add slide number in footer
         footer_text = f"Slide {slide_number}"
         draw.text(
-            (self.width - 100, self.height - 50),
+            (width - 100, height - 50),
             footer_text,
             fill='#95a5a6',
             font=footer_font,
             anchor='rm'
         )
 
+        # Scale to output resolution (draft/review profiles)
+        if (width, height) != (self.width, self.height):
+            img = img.resize((self.width, self.height), Image.LANCZOS)
+
         # Save image
         img.save(output_path)
 
     def _calculate_timings(self, pause_duration, min_slide_duration):
         """Calculate duration for each slide based on individual audio files"""
 
-        timings = []
+        return [
+            self.slide_duration(i, slide, pause_duration, min_slide_duration)
+            for i, slide in enumerate(self.slides, 1)
+        ]
+
+    def slide_duration(self, slide_number, slide, pause_duration, min_slide_duration):
+        """Duration of one slide: its audio length (or the minimum) plus the pause"""
+        # Check if this slide has its own audio file
+        if 'audio_file' in slide and slide['audio_file']:
+            try:
+                # Read the header only to get its duration
+                slide_audio_duration = sf.info(slide['audio_file']).duration
+
+                # Use actual audio duration + pause
+                duration = slide_audio_duration + pause_duration
+                print(f"      Slide {slide_number}: {slide_audio_duration:.1f}s audio + {pause_duration:.1f}s pause = {duration:.1f}s")
+                return duration
+
+            except Exception as e:
+                print(f"      Warning: Could not load audio for slide {slide_number}, using default: {e}")
+                return min_slide_duration + pause_duration
+
+        # No audio for this slide, use minimum duration
+        print(f"      Slide {slide_number}: {min_slide_duration + pause_duration:.1f}s (no audio)")
+        return min_slide_duration + pause_duration
+
+    def transition_duration(self, pause_duration):
+        """Length of the transition window between slides (0 = none)"""
+        if self.transition == 'none':
+            return 0
+        return min(self.TRANSITION_DURATION, pause_duration)
+
+    def _plan_segments(self, slide_images, timings, pause_duration):
+        """
+        Split the timeline into static slide segments and short transitions
 
-        for i, slide in enumerate(self.slides):
-            # Check if this slide has its own audio file
-            if 'audio_file' in slide and slide['audio_file']:
-                try:
-                    # Load this slide's audio to get its duration
-                    audio_data, sample_rate = sf.read(slide['audio_file'])
-                    slide_audio_duration = len(audio_data) / sample_rate
+        The transition between two slides replaces the end of the outgoing
+        slide's pause, so slide start times (and audio sync) are unchanged.
+        Only the transition window is rendered frame by frame.
+        """
+        transition_duration = self.transition_duration(pause_duration)
 
-                    # Use actual audio duration + pause
-                    duration = slide_audio_duration + pause_duration
-                    timings.append(duration)
-                    print(f"      Slide {i+1}: {slide_audio_duration:.1f}s audio + {pause_duration:.1f}s pause = {duration:.1f}s")
+        segments = []
+        last = len(slide_images) - 1
 
-                except Exception as e:
-                    print(f"      Warning: Could not load audio for slide {i+1}, using default: {e}")
-                    timings.append(min_slide_duration + pause_duration)
-            else:
-                # No audio for this slide, use minimum duration
-                timings.append(min_slide_duration + pause_duration)
-                print(f"      Slide {i+1}: {min_slide_duration + pause_duration:.1f}s (no audio)")
+        for i, (slide, image_path, duration) in enumerate(zip(self.slides, slide_images, timings)):
+            overlap = min(transition_duration, duration / 2) if i < last else 0
 
-        return timings
+            segments.append({
+                'image': image_path,
+                'audio': slide.get('audio_file'),
+                'duration': duration - overlap
+            })
 
-    def _create_video_clips(self, slide_images, timings):
-        """Create video clips from slide images"""
+            if overlap > 0:
+                segments.append({
+                    'frame_function': TransitionFrames(
+                        image_path, slide_images[i + 1], self.transition, overlap
+                    ),
+                    'duration': overlap
+                })
 
-        clips = []
+        return segments
 
-        for i, (image_path, duration) in enumerate(zip(slide_images, timings)):
-            # Create image clip
-            clip = ImageClip(image_path).with_duration(duration)
+    def _create_video_clips(self, segments):
+        """Create video clips from planned segments"""
 
-            # Add transition effects (TODO: implement for moviepy 2.x)
-            # if self.transition == 'fade' and i > 0:
-            #     clip = clip.fadein(0.5)
+        clips = []
+
+        for segment in segments:
+            if 'frame_function' in segment:
+                # Short precomputed transition window
+                clip = VideoClip(segment['frame_function'], duration=segment['duration'])
+            else:
+                # Static slide
+                clip = ImageClip(segment['image']).with_duration(segment['duration'])
 
             clips.append(clip)
 
         return clips
 
-    def _add_audio(self, video_clip):
-        """Add audio narration to video by concatenating per-slide audio"""
-
-        # Collect audio clips from slides
-        audio_clips = []
-        for i, slide in enumerate(self.slides):
-            if 'audio_file' in slide and slide['audio_file']:
-                try:
-                    audio_clip = AudioFileClip(slide['audio_file'])
-                    audio_clips.append(audio_clip)
-                except Exception as e:
-                    print(f"      Warning: Could not load audio for slide {i+1}: {e}")
+    def _add_audio(self, video_clip, timings):
+        """Add narration as one track with each slide's audio at its start offset"""
 
-        if not audio_clips:
-            print("      Warning: No audio files found, skipping audio")
-            return video_clip
+        audio_files = [slide.get('audio_file') for slide in self.slides]
 
         try:
-            # Concatenate all slide audio clips
-            from moviepy import concatenate_audioclips
-            combined_audio = concatenate_audioclips(audio_clips)
+            if any(audio_files):
+                # Timeline-driven track: audio + exact silence for each slide's pause
+                track_path = f"{self.project_dir}/narration_track.wav"
+                with span('audio.assemble', slides=len(audio_files)):
+                    track_path = AudioTrackAssembler().assemble(audio_files, timings, track_path)
+            else:
+                track_path = self.audio_path
+
+            if not track_path:
+                print("      Warning: No audio files found, skipping audio")
+                return video_clip
+
+            audio = AudioFileClip(track_path)
 
             # Adjust video duration to match audio if needed
-            if combined_audio.duration > video_clip.duration:
-                print(f"      Note: Audio longer than video ({combined_audio.duration:.1f}s vs {video_clip.duration:.1f}s)")
+            if audio.duration > video_clip.duration:
+                print(f"      Note: Audio longer than video ({audio.duration:.1f}s vs {video_clip.duration:.1f}s)")
+                audio = audio.subclipped(0, video_clip.duration)
 
             # Set audio
-            video_clip = video_clip.with_audio(combined_audio)
+            video_clip = video_clip.with_audio(audio)
 
         except Exception as e:
             print(f"      Warning: Could not add audio: {e}")
@@ -300,6 +446,68 @@ class VideoComposer:
         return video_clip
 
 
+class TransitionFrames:
+    """Frame function blending two stills over a short window (vectorized NumPy)"""
+
+    def __init__(self, image_a, image_b, style, duration):
+        """
+        Args:
+            image_a: Outgoing slide image path
+            image_b: Incoming slide image path
+            style: 'fade', 'slide' or 'wipe'
+            duration: Transition length (seconds)
+        """
+        self.image_a = image_a
+        self.image_b = image_b
+        self.style = style
+        self.duration = duration
+        self._a = None
+        self._b = None
+
+    def _load(self):
+        """Load both stills once, on first frame"""
+        a = np.asarray(Image.open(self.image_a).convert('RGB'))
+        b = np.asarray(Image.open(self.image_b).convert('RGB'))
+        if a.shape != b.shape:
+            b = np.asarray(Image.open(self.image_b).convert('RGB').resize(
+                (a.shape[1], a.shape[0]), Image.LANCZOS))
+
+        if self.style == 'fade':
+            # Keep float copies so each frame is one multiply-add
+            self._a = a.astype(np.float32)
+            self._b = b.astype(np.float32) - self._a
+        else:
+            self._a = a
+            self._b = b
+
+    def __call__(self, t):
+        """Return the RGB frame at time t (seconds into the transition)"""
+        if self._a is None:
+            self._load()
+
+        p = min(max(t / self.duration, 0.0), 1.0)
+
+        if self.style == 'fade':
+            return (self._a + self._b * p).astype(np.uint8)
+
+        width = self._a.shape[1]
+
+        if self.style == 'slide':
+            # Push: incoming slide enters from the right (ease in/out)
+            p = p * p * (3 - 2 * p)
+            offset = int(round(width * (1 - p)))
+            frame = np.empty_like(self._a)
+            frame[:, :offset] = self._a[:, width - offset:]
+            frame[:, offset:] = self._b[:, :width - offset]
+            return frame
+
+        # Wipe: reveal incoming slide left to right
+        edge = int(round(width * p))
+        frame = self._a.copy()
+        frame[:, :edge] = self._b[:, :edge]
+        return frame
+
+
 def test_composer():
     """Test the composer"""
     import sys
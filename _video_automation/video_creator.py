@@ -12,7 +12,52 @@ from datetime import datetime
 # Add parent directory to path to import voice generation
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def main():
+from audio_manifest import AudioManifest
+from encoding_profiles import PROFILES, get_profile
+from profiling import StageProfiler
+from tracing import Tracer, span, use_tracer
+import metrics
+
+
+def synthesize_slide_audio(slide, slide_number, total, project_dir, voice_ref,
+                           manifest, regenerate=False):
+    """Generate narration for one slide; returns the audio path (None without notes)"""
+    if not slide['notes']:
+        print(f"   [{slide_number}/{total}] (no notes)")
+        return None
+
+    # Reuse the current take if notes and voice are unchanged
+    reuse = not regenerate and manifest.is_current(slide_number, slide['notes'], voice_ref)
+    metrics.cache_lookup('audio', reuse)
+    if reuse:
+        audio_file = manifest.audio_file(slide_number)
+        print(f"   [{slide_number}/{total}] Unchanged: {os.path.basename(audio_file)}")
+        return audio_file
+
+    # Import voice generation
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '_scripts'))
+    from generate_long_audio import generate_long_audio
+
+    print(f"   [{slide_number}/{total}] {slide['notes'][:60]}...")
+
+    # Generate audio for this specific slide under its stable name
+    with span('tts.slide', slide=slide_number, chars=len(slide['notes'])):
+        audio_file = generate_long_audio(
+            text=slide['notes'],
+            voice_reference=voice_ref,
+            output_name=f"{project_dir}/output/slide_{slide_number:02d}_audio",
+            save_parts=False,  # Don't need parts for individual slides
+            output_file=AudioManifest.audio_path_for(project_dir, slide_number)
+        )
+
+    if audio_file:
+        manifest.record(slide_number, audio_file, slide['notes'], voice_ref)
+
+    return audio_file
+
+
+def build_parser():
+    """Command line options for a single deck"""
     parser = argparse.ArgumentParser(
         description="Create videos from PowerPoint presentations with voice narration",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -33,8 +78,23 @@ Examples:
   # Include B-roll footage
   python video_creator.py slides.pptx --broll demos/ --captions
 
-  # Quick preview (first 3 slides only)
+  # Quick preview (first 3 slides only, draft quality)
   python video_creator.py slides.pptx --preview 3
+
+  # Fast review render of the whole deck
+  python video_creator.py slides.pptx --use-existing-audio --quality draft
+
+  # Encode per-slide segments on all cores, then join without re-encoding
+  python video_creator.py slides.pptx --use-existing-audio --parallel
+
+  # Overlap voice generation with rendering and encoding
+  python video_creator.py slides.pptx --pipeline
+
+  # Where does the render time go? (per-stage spans + Chrome trace)
+  python video_creator.py slides.pptx --use-existing-audio --trace
+
+  # Whole course in one process (see: python video_creator.py batch --help)
+  python video_creator.py batch Inbound/MDF/ --workers 2 --use-existing-audio
         """
     )
 
@@ -52,14 +112,17 @@ Examples:
     parser.add_argument('--output', '-o',
                        help='Output video file (default: auto-generated)')
 
+    parser.add_argument('--quality', '-q',
+                       choices=sorted(PROFILES),
+                       help='Encoding profile: resolution, fps, preset, CRF and audio '
+                            'bitrate (default: publish, or draft with --preview)')
+
     parser.add_argument('--resolution',
-                       default='1920x1080',
-                       help='Video resolution (default: 1920x1080)')
+                       help='Override profile resolution (e.g., 1920x1080)')
 
     parser.add_argument('--fps',
                        type=int,
-                       default=30,
-                       help='Frames per second (default: 30)')
+                       help='Override profile frames per second')
 
     # B-roll options
     parser.add_argument('--broll', '-b',
@@ -96,6 +159,12 @@ Examples:
                        default='fade',
                        help='Transition effect between slides (default: fade)')
 
+    parser.add_argument('--slide-render',
+                       choices=['auto', 'libreoffice', 'draw'],
+                       default='auto',
+                       help='Slide images: real slides exported with LibreOffice, a drawn '
+                            'title/bullets layout, or auto (LibreOffice when installed)')
+
     # Advanced options
     parser.add_argument('--audio-only',
                        action='store_true',
@@ -105,11 +174,117 @@ Examples:
                        action='store_true',
                        help='Use existing audio files, skip audio generation')
 
+    parser.add_argument('--regenerate-audio',
+                       action='store_true',
+                       help='Record new takes even for slides whose notes are unchanged')
+
     parser.add_argument('--project-dir',
                        help='Project directory for outputs (default: _projects/[name])')
 
-    args = parser.parse_args()
+    parser.add_argument('--parallel',
+                       type=int,
+                       nargs='?',
+                       const=os.cpu_count() or 1,
+                       metavar='WORKERS',
+                       help='Encode per-slide segments concurrently and join them '
+                            'without re-encoding (default workers: CPU count)')
+
+    parser.add_argument('--pipeline',
+                       action='store_true',
+                       help='Render and encode slides while narration is still being '
+                            'synthesized (implies --parallel)')
+
+    parser.add_argument('--trace',
+                       action='store_true',
+                       help='Record per-stage timing, CPU and memory to '
+                            '[project]/output/trace_*.jsonl and a Chrome trace')
+
+    parser.add_argument('--profile',
+                       nargs='?',
+                       const='all',
+                       choices=['all', 'parse', 'tts', 'video'],
+                       metavar='STAGE',
+                       help='Profile a stage (all, parse, tts, video) with cProfile, sampled '
+                            'flamegraph stacks and a torch trace for TTS -> [project]/profile/')
+
+    parser.add_argument('--metrics-port',
+                       type=int,
+                       metavar='PORT',
+                       help='Serve Prometheus metrics on http://127.0.0.1:PORT/metrics')
+
+    parser.add_argument('--metrics-file',
+                       metavar='PATH',
+                       help='Write Prometheus metrics to a textfile (node_exporter collector)')
+
+    return parser
+
 
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    # Many decks in one long-lived process
+    if argv and argv[0] == 'batch':
+        from batch_runner import batch_main
+        return batch_main(argv[1:])
+
+    # Background job queue (submit/status/cancel/worker)
+    if argv and argv[0] == 'queue':
+        from render_queue import queue_main
+        return queue_main(argv[1:])
+
+    return run(build_parser().parse_args(argv))
+
+
+def run(args, summary=None):
+    """
+    Create the video (or audio) for one deck
+
+    Args:
+        args: Parsed options from build_parser()
+        summary: Optional dict filled with project_dir, slides and video path
+
+    Returns:
+        Exit code (0 = success)
+    """
+    summary = summary if summary is not None else {}
+    exporter = metrics.start_exporter(args.metrics_port, args.metrics_file)
+
+    try:
+        if not args.trace:
+            return create_deck(args, summary)
+
+        # Own tracer per run: batch decks in other threads record separately
+        tracer = Tracer()
+        tracer.enable()
+        try:
+            with use_tracer(tracer), span('deck', presentation=Path(args.presentation).name):
+                return create_deck(args, summary)
+        finally:
+            tracer.disable()
+            write_trace(tracer, summary)
+    finally:
+        if exporter:
+            exporter.flush()
+
+
+def write_trace(tracer, summary):
+    """Export recorded spans next to the deck's outputs and print totals"""
+    if not tracer.records or 'project_dir' not in summary:
+        return
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base = f"{summary['project_dir']}/output/trace_{timestamp}"
+    summary['trace'] = tracer.export_jsonl(f"{base}.jsonl")
+    tracer.export_chrome(f"{base}.chrome.json")
+
+    print("\nTrace:")
+    tracer.print_summary()
+    print(f"   Spans: {base}.jsonl")
+    print(f"   Chrome trace: {base}.chrome.json (open in chrome://tracing)")
+
+
+def create_deck(args, summary):
+    """Pipeline body for one deck (see run())"""
     # Validate presentation file
     if not os.path.exists(args.presentation):
         print(f"ERROR: Presentation file not found: {args.presentation}")
@@ -143,6 +318,10 @@ Examples:
         print(f"ERROR: Voice reference not found: {voice_ref}")
         return 1
 
+    # Resolve encoding profile (preview renders default to draft)
+    quality = args.quality or ('draft' if args.preview else 'publish')
+    profile = get_profile(quality).with_overrides(args.resolution, args.fps)
+
     # Setup project directory
     pres_name = Path(args.presentation).stem
     if args.project_dir:
@@ -152,12 +331,26 @@ Examples:
 
     os.makedirs(project_dir, exist_ok=True)
     os.makedirs(f"{project_dir}/output", exist_ok=True)
+    manifest = AudioManifest(project_dir)
+
+    # Projects from before the manifest: adopt the newest take per slide
+    # (before any generation, so earlier takes are tracked, not orphaned)
+    if not manifest.exists():
+        adopted = manifest.adopt_legacy_takes()
+        if adopted:
+            print(f"Indexed {adopted} existing audio takes")
+
+    profiler = StageProfiler(args.profile, f"{project_dir}/profile")
+    summary['project_dir'] = project_dir
 
     print(f"Project: {project_dir}")
     print(f"Voice: {voice_name}")
-    print(f"Resolution: {args.resolution}")
-    print(f"FPS: {args.fps}")
+    print(f"Quality: {profile.name}")
+    print(f"Resolution: {profile.resolution}")
+    print(f"FPS: {profile.fps}")
     print(f"Transition: {args.transition}")
+    if args.parallel:
+        print(f"Parallel Encoding: {args.parallel} workers")
     if args.preview:
         print(f"Preview Mode: First {args.preview} slides only")
     print()
@@ -167,10 +360,13 @@ Examples:
     print("-" * 70)
 
     try:
-        parser_obj = PowerPointParser(args.presentation)
-        slides = parser_obj.parse(preview_count=args.preview)
+        with profiler.stage('parse'), span('parse') as attrs:
+            parser_obj = PowerPointParser(args.presentation, cache_dir=project_dir)
+            slides = parser_obj.parse(preview_count=args.preview)
+            attrs['slides'] = len(slides)
 
         print(f"Found {len(slides)} slides")
+        summary['slides'] = len(slides)
         for i, slide in enumerate(slides, 1):
             print(f"   {i}. {slide['title'][:50]}...")
         print()
@@ -184,19 +380,20 @@ Examples:
         print("Step 2: Loading existing audio files...")
         print("-" * 70)
 
-        import glob
         slide_audio_files = []
         found_count = 0
 
         for i, slide in enumerate(slides, 1):
-            # Look for existing audio file for this slide
-            slide_audio_pattern = f"{project_dir}/output/slide_{i:02d}_audio_*_complete.wav"
-            audio_files = glob.glob(slide_audio_pattern)
+            # Look up this slide's current take
+            audio_file = manifest.audio_file(i)
 
-            if audio_files:
-                slide_audio_files.append(audio_files[0])
+            if audio_file:
+                slide_audio_files.append(audio_file)
                 found_count += 1
-                print(f"   [{i}/{len(slides)}] Found: {os.path.basename(audio_files[0])}")
+                note = ""
+                if manifest.get(i).get('hash') and not manifest.is_current(i, slide['notes'], voice_ref):
+                    note = " (notes changed since this take)"
+                print(f"   [{i}/{len(slides)}] Found: {os.path.basename(audio_file)}{note}")
             else:
                 slide_audio_files.append(None)
                 print(f"   [{i}/{len(slides)}] Missing audio file")
@@ -209,51 +406,38 @@ Examples:
 
         if found_count == 0:
             print("\nWARNING: No audio files found!")
-            print("Expected files like: slide_01_audio_*_complete.wav")
+            print("Expected files like: slide_01_audio.wav")
             print(f"In directory: {project_dir}/output/")
             return 1
 
+    elif args.pipeline and not args.audio_only:
+        print("Step 2: Voice narration runs alongside video creation (pipeline mode)")
+        print("-" * 70)
+
     else:
         print("Step 2: Generating voice narration...")
         print("-" * 70)
 
         try:
-            # Import voice generation
-            sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '_scripts'))
-            from generate_long_audio import generate_long_audio, split_into_sentences
-
             # Generate separate audio for each slide
             slide_audio_files = []
-            for i, slide in enumerate(slides, 1):
-                if slide['notes']:
-                    print(f"   [{i}/{len(slides)}] {slide['notes'][:60]}...")
-
-                    # Generate audio for this specific slide
-                    slide_audio_name = f"{project_dir}/output/slide_{i:02d}_audio"
-                    generate_long_audio(
-                        text=slide['notes'],
-                        voice_reference=voice_ref,
-                        output_name=slide_audio_name,
-                        save_parts=False  # Don't need parts for individual slides
+            with profiler.stage('tts', torch_trace=True):
+                for i, slide in enumerate(slides, 1):
+                    slide_audio_files.append(
+                        synthesize_slide_audio(slide, i, len(slides), project_dir, voice_ref,
+                                               manifest, regenerate=args.regenerate_audio)
                     )
 
-                    # Find the generated audio file
-                    import glob
-                    audio_files = glob.glob(f"{slide_audio_name}_*_complete.wav")
-                    if audio_files:
-                        slide_audio_files.append(audio_files[0])
-                    else:
-                        slide_audio_files.append(None)
-                else:
-                    print(f"   [{i}/{len(slides)}] (no notes)")
-                    slide_audio_files.append(None)
-
             # Store audio files in slides data for VideoComposer
             for i, slide in enumerate(slides):
                 slide['audio_file'] = slide_audio_files[i] if i < len(slide_audio_files) else None
 
             print(f"\n   Generated {len([f for f in slide_audio_files if f])} audio files")
 
+            removed = manifest.collect_garbage()
+            if removed:
+                print(f"   Removed {removed} old audio takes")
+
         except Exception as e:
             print(f"ERROR generating audio: {e}")
             import traceback
@@ -268,7 +452,7 @@ Examples:
         print("AUDIO GENERATION COMPLETE!")
         print("=" * 70)
         print(f"\nProject directory: {project_dir}/")
-        print(f"Audio files: {project_dir}/output/slide_*_audio_*_complete.wav")
+        print(f"Audio files: {project_dir}/output/slide_*_audio.wav")
         print(f"\nGenerated {len([s for s in slides if s.get('audio_file')])} audio files")
         print("\nNext steps:")
         print(f"   To create video: python video_creator.py {args.presentation} --use-existing-audio")
@@ -283,10 +467,12 @@ Examples:
             slides=slides,
             audio_path=None,  # Audio files now in slide data
             broll_dir=args.broll,
-            resolution=args.resolution,
-            fps=args.fps,
+            profile=profile,
             transition=args.transition,
-            project_dir=project_dir
+            project_dir=project_dir,
+            workers=args.parallel or (os.cpu_count() if args.pipeline else None),
+            presentation=args.presentation,
+            slide_render=args.slide_render
         )
 
         # Determine output filename
@@ -299,13 +485,31 @@ Examples:
         print(f"   Creating: {output_file}")
 
         # Compose video
-        video_path = composer.create_video(
-            output_file=output_file,
-            pause_duration=args.pause,
-            min_slide_duration=args.min_duration
-        )
+        pipelined = args.pipeline and not args.use_existing_audio
+        with profiler.stage('video', torch_trace=pipelined):
+            if pipelined:
+                from render_pipeline import RenderPipeline
+
+                def synthesize(slide_number, slide):
+                    return synthesize_slide_audio(slide, slide_number, len(slides),
+                                                  project_dir, voice_ref, manifest,
+                                                  regenerate=args.regenerate_audio)
+
+                video_path = RenderPipeline(composer, synthesize).run(
+                    output_file=output_file,
+                    pause_duration=args.pause,
+                    min_slide_duration=args.min_duration
+                )
+                manifest.collect_garbage()
+            else:
+                video_path = composer.create_video(
+                    output_file=output_file,
+                    pause_duration=args.pause,
+                    min_slide_duration=args.min_duration
+                )
 
         print(f"Video created: {video_path}")
+        summary['video'] = video_path
 
     except Exception as e:
         print(f"ERROR creating video: {e}")
@@ -346,7 +550,7 @@ Examples:
     print("=" * 70)
     print(f"\nProject directory: {project_dir}/")
     print(f"Video file: {video_path}")
-    print(f"Audio files: {project_dir}/output/slide_*_audio_*_complete.wav")
+    print(f"Audio files: {project_dir}/output/slide_*_audio.wav")
     if args.chapters:
         print(f"Timestamps: {timestamps_file}")
 
@@ -361,5 +565,6 @@ Examples:
 
     return 0
 
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -14,18 +14,13 @@ from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN
 from PIL import Image
+from image_ingest import ImageIngest
 import copy
 
 def remove_watermark(image_path, crop_percent=10):
-    """Crop bottom to remove watermark."""
-    img = Image.open(image_path)
-    width, height = img.size
-    new_height = int(height * (100 - crop_percent) / 100)
-    cropped = img.crop((0, 0, width, new_height))
-
-    output_path = str(image_path).replace('.png', '_clean.png')
-    cropped.save(output_path, 'PNG', quality=95)
-    return output_path
+    """Crop bottom to remove watermark, sized for a full-screen slide (cached)."""
+    return str(ImageIngest().ingest(image_path, 1920, 1080, fit='contain',
+                                    crop_bottom=crop_percent / 100))
 
 def create_zoom_slide(prs, image_path):
     """Create a full-screen zoom slide."""
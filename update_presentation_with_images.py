@@ -15,11 +15,15 @@ from pptx import Presentation
 from pptx.util import Inches
 from pptx.dml.color import RGBColor
 from PIL import Image
+from image_ingest import ImageIngest
 
 def remove_watermark_from_image(image_path, crop_percentage=10):
     """
     Crop the bottom portion of image to remove Gemini watermark.
 
+    The result is scaled to fit a 1920x1080 slide and re-encoded
+    (JPEG, or PNG if transparent).
+
     Args:
         image_path: Path to original image
         crop_percentage: Percentage of height to crop from bottom (default 10%)
@@ -27,18 +31,10 @@ def remove_watermark_from_image(image_path, crop_percentage=10):
     Returns:
         Path to cropped image
     """
-    # Open image
-    img = Image.open(image_path)
-    width, height = img.size
-
-    # Crop bottom percentage (where watermarks appear)
-    crop_height = int(height * (100 - crop_percentage) / 100)
-
-    cropped_img = img.crop((0, 0, width, crop_height))
-
-    # Save as new file
-    cropped_path = str(image_path).replace('.png', '_nowatermark.png')
-    cropped_img.save(cropped_path, 'PNG', quality=95)
+    # Crop bottom percentage (where watermarks appear) and fit the slide,
+    # once per source image (cached by content hash)
+    cropped_path = str(ImageIngest().ingest(image_path, 1920, 1080, fit='contain',
+                                            crop_bottom=crop_percentage / 100))
 
     print(f"       Cropped {crop_percentage}% from bottom: {cropped_path}")
     return cropped_path